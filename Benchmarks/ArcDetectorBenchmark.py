@@ -0,0 +1,113 @@
+"""
+Arc detector benchmark against the simulated supply (GUI/HVSimulator.py).
+
+Run from the repository root:
+    python -m Benchmarks.ArcDetectorBenchmark --spikes 20 --spike-current 20 --current-interval 0.04
+
+The supply runs at --voltage with noisy M0/M1. After a quiet period (false trip count) arcs are injected at
+random times. Reported: detections and misses, trip reasons, injection-to-detection latency, detection-to-GPIO
+latency and the CPU time of the detector per reading.
+"""
+import argparse
+import random
+import threading
+import time
+from collections import Counter
+
+from GUI.ArcDetector import ArcDetector
+from GUI.HVControl import HVController
+from GUI.HVSimulator import HVSimulator
+from GUI.Instrumentation import LatencyStats
+
+
+class SimulatedGPIO:
+    """GPIOController stand-in driving the HV enable input of the simulator."""
+    def __init__(self, simulator: HVSimulator):
+        self.simulator = simulator
+
+    def enable_HV(self, enable: bool):
+        self.simulator.set_hardware_enable(enable)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Arc detector benchmark on the simulated supply")
+    parser.add_argument('--spikes', type=int, default=20, help="Number of injected arcs")
+    parser.add_argument('--spike-current', type=float, default=20.0, help="Arc current (uA)")
+    parser.add_argument('--spike-duration', type=float, default=0.1, help="Arc duration (s)")
+    parser.add_argument('--voltage-drop', type=float, default=0.3, help="Voltage sag during the arc (fraction)")
+    parser.add_argument('--voltage', type=float, default=5000.0, help="Output voltage (V)")
+    parser.add_argument('--current-interval', type=float, default=0.04, help="M1 sampling interval (s)")
+    parser.add_argument('--voltage-interval', type=float, default=0.1, help="M0 sampling interval (s)")
+    parser.add_argument('--status-interval', type=float, default=0.5, help="SR sampling interval (s)")
+    parser.add_argument('--quiet', type=float, default=5.0, help="Time without arcs to count false trips (s)")
+    parser.add_argument('--voltage-noise', type=float, default=5.0, help="M0 noise standard deviation (V)")
+    parser.add_argument('--current-noise', type=float, default=0.05, help="M1 noise standard deviation (uA)")
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    simulator = HVSimulator(voltage_noise=args.voltage_noise, current_noise=args.current_noise, seed=args.seed)
+    simulator.start()
+    gpio = SimulatedGPIO(simulator)
+    controller = HVController(port=simulator.port, timeout=0.2)
+    tripped = threading.Event()
+    detector = ArcDetector(gpio, on_trip=lambda event: tripped.set())
+
+    def rearm():
+        gpio.enable_HV(True)
+        time.sleep(1.0)  # Output back at the setpoint
+        detector.reset()
+        tripped.clear()
+        time.sleep(args.current_interval * (detector.baseline_samples + 2))  # Baseline filled
+
+    try:
+        controller.connect()
+        controller.set_current_limit(100.0)
+        controller.set_voltage(args.voltage)
+        controller.set_enable_state(True)
+        controller.start_current_monitor(interval=args.current_interval)
+        controller.start_voltage_monitor(interval=args.voltage_interval)
+        controller.start_status_monitor(interval=args.status_interval)
+        detector.attach(controller)
+        rearm()
+
+        # False trips without arcs
+        false_trips = 0
+        end = time.perf_counter() + args.quiet
+        while time.perf_counter() < end:
+            if tripped.wait(timeout=end - time.perf_counter()):
+                false_trips += 1
+                rearm()
+
+        detection_latency = LatencyStats()
+        reasons = Counter()
+        missed = 0
+        for _ in range(args.spikes):
+            time.sleep(rng.uniform(0.2, 0.6))
+            events_before = len(detector.events)
+            injected_at = time.perf_counter()
+            simulator.inject_arc(args.spike_current, args.spike_duration, args.voltage_drop)
+            if tripped.wait(timeout=1.0) and len(detector.events) > events_before:
+                event = detector.events[-1]
+                detection_latency.add(event.detected_at - injected_at)
+                reasons[event.reason] += 1
+            else:
+                missed += 1
+            rearm()
+
+        print()
+        print(f"Arcs injected: {args.spikes}, detected: {args.spikes - missed}, missed: {missed}, "
+              f"false trips in {args.quiet:.0f} s: {false_trips}")
+        print(f"Trip reasons: {dict(reasons)}")
+        print(f"Injection -> detection: {detection_latency}")
+        print(f"Detection -> GPIO: {detector.gpio_latency}")
+        print(f"Detector CPU per reading: {detector.evaluation_time}")
+        controller.print_telemetry_stats()
+    finally:
+        detector.detach()
+        controller.close()
+        simulator.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+G-code encoding benchmark: full fixed point lines vs the compact GCodeEncoder (GUI/GCodeEncoder.py).
+
+Run from the repository root:
+    python -m Benchmarks.GCodeEncoderBenchmark --segments 20000 --stream 5
+
+Offline, every scenario's experiment trajectory is generated with CompactGCode off and on. Reported: bytes per
+segment (with newline), segments that fit into GRBL's 64 byte RX window, generation speed and the pump position
+the written lines add up to, against the exact trajectory (in motor steps, must stay below 0.5).
+With --stream each trajectory is also streamed to the virtual GRBL device (GUI/GRBLSimulator.py) for that many
+seconds: achieved vs required segments per second and planner underruns.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from GUI.GRBLSettings import OPERATING_SETTINGS
+from GUI.GRBLSimulator import GRBLSimulator
+from GUI.PositioningControl import PositioningController
+
+
+SCENARIOS = {
+    # name: (stroke sub segments, stage profile)
+    'linear': (1, 'linear'),
+    'linear-200': (200, 'linear'),
+    'linear-1000': (1000, 'linear'),
+    'sinusoidal': (1, 'sinusoidal'),
+    'dwell': (1, 'dwell'),
+}
+
+
+def build_trajectory(controller, name, compact, args):
+    sub_segments, profile = SCENARIOS[name]
+    controller.stroke_sub_segments = sub_segments
+    controller.stage_profile = profile
+    controller.compact_gcode = compact
+    controller.generate_experiment_initial_command(args.pump_1, args.pump_2, args.stage_feedrate, args.stage_amplitude)
+    controller.trajectory.reset()
+    return controller.trajectory
+
+
+def pump_drift_steps(controller, lines, trajectory) -> float:
+    """Largest difference between the sum of the written X / Y words and the exact pump position, in steps."""
+    written = np.zeros(2)
+    for line in lines:
+        coords = controller.parse_move_command(line) if not line.startswith('G4') else {}
+        written += (coords.get('X', 0.0), coords.get('Y', 0.0))
+    # Unrounded pump travel since reset(), the flow rates never changed
+    exact = np.array([trajectory._x_units_per_segment, trajectory._y_units_per_segment]) \
+        * trajectory.segment_index / trajectory._scale
+    steps_per_mm = np.array([OPERATING_SETTINGS['100'], OPERATING_SETTINGS['101']])
+    return float(np.max(np.abs(written - exact) * steps_per_mm))
+
+
+def offline(controller, name, compact, args) -> dict:
+    trajectory = build_trajectory(controller, name, compact, args)
+    started = time.perf_counter()
+    lines = [trajectory.next_command() for _ in range(args.segments)]
+    elapsed = time.perf_counter() - started
+    bytes_per_segment = sum(len(line) + 1 for line in lines) / len(lines)
+    return {
+        'bytes': bytes_per_segment,
+        'window': 64 / bytes_per_segment,
+        'generated': args.segments / elapsed,
+        'drift': pump_drift_steps(controller, lines, trajectory),
+        'example': lines[1],
+    }
+
+
+def stream(name, compact, args) -> dict:
+    simulator = GRBLSimulator(homing_time=0.5)
+    simulator.start()
+    controller = None
+    try:
+        controller = PositioningController(port=simulator.port)
+        controller.home()
+        sub_segments, profile = SCENARIOS[name]
+        controller.stroke_sub_segments = sub_segments
+        controller.compact_gcode = compact
+        controller.start_experiment(args.pump_1, args.pump_2, args.stage_feedrate, args.stage_amplitude,
+                                    stage_profile=profile)
+        simulator.reset_stats()
+        time.sleep(args.stream)
+        underruns = simulator.stats()['planner_underruns']
+        stats = controller.grbl_streamer.get_stream_stats()
+        controller.grbl_streamer.stop()
+        return {'required': stats['required_rate'], 'achieved': stats['average_rate'], 'underruns': underruns}
+    finally:
+        if controller is not None:
+            controller.grbl_streamer.close()
+        simulator.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Full vs compact G-code encoding of the experiment trajectory")
+    parser.add_argument('--segments', type=int, default=20000, help="Segments generated per scenario")
+    parser.add_argument('--stream', type=float, default=0.0, help="Also stream every scenario for this many seconds")
+    parser.add_argument('--scenario', choices=list(SCENARIOS), action='append', help="Scenario(s) to run (default all)")
+    parser.add_argument('--pump-1', type=float, default=1.0, help="Pump 1 flowrate (ml/h)")
+    parser.add_argument('--pump-2', type=float, default=2.0, help="Pump 2 flowrate (ml/h)")
+    parser.add_argument('--stage-feedrate', type=float, default=1000.0, help="Stage speed (mm/min)")
+    parser.add_argument('--stage-amplitude', type=float, default=20.0, help="Stage amplitude (mm)")
+    args = parser.parse_args()
+
+    controller = PositioningController(port="offline", connect=False)
+    rows = []
+    for name in args.scenario or SCENARIOS:
+        for compact in (False, True):
+            row = {'scenario': name, 'encoding': 'compact' if compact else 'full'}
+            row.update(offline(controller, name, compact, args))
+            if args.stream:
+                print(f"--- {name}, {row['encoding']} ---")
+                row.update(stream(name, compact, args))
+            rows.append(row)
+
+    print()
+    header = f"{'scenario':<12}{'encoding':<9}{'B/seg':>7}{'seg/64B':>8}{'gen seg/s':>11}{'drift steps':>12}"
+    if args.stream:
+        header += f"{'req/s':>8}{'avg/s':>8}{'underrun':>9}"
+    print(header + "  example")
+    for r in rows:
+        line = (f"{r['scenario']:<12}{r['encoding']:<9}{r['bytes']:>7.1f}{r['window']:>8.1f}{r['generated']:>11,.0f}"
+                f"{r['drift']:>12.2f}")
+        if args.stream:
+            line += f"{r['required']:>8.1f}{r['achieved']:>8.1f}{r['underruns']:>9d}"
+        print(line + f"  {r['example']}")
+
+
+if __name__ == "__main__":
+    main()
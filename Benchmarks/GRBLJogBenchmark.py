@@ -0,0 +1,76 @@
+"""
+Continuous jogging benchmark against the virtual GRBL device (GUI/GRBLSimulator.py).
+
+Run from the repository root:
+    python -m Benchmarks.GRBLJogBenchmark --jogs 20 --feedrate 1000
+
+The stage (Z) is jogged back and forth --jogs times, each jog held for a random time like a button press.
+Reported per release: time until 0x85 was written, until the simulated axis stood still and until GRBL reported
+Idle, the overshoot after the release and how far the motion was queued ahead.
+"""
+import argparse
+import random
+import time
+
+from GUI.GRBLSimulator import GRBLSimulator
+from GUI.Instrumentation import LatencyStats
+from GUI.PositioningControl import PositioningController
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Continuous jogging benchmark on the virtual GRBL device")
+    parser.add_argument('--jogs', type=int, default=20, help="Number of press / release cycles")
+    parser.add_argument('--feedrate', type=float, default=1000.0, help="Jog feedrate (mm/min)")
+    parser.add_argument('--segment-time', type=float, default=0.05, help="Motion per $J= segment (s)")
+    parser.add_argument('--lookahead', type=float, default=0.2, help="Motion queued ahead of the clock (s)")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    simulator = GRBLSimulator(homing_time=0.5)
+    simulator.start()
+    controller = None
+    try:
+        controller = PositioningController(port=simulator.port)
+        streamer = controller.grbl_streamer
+        streamer.jog_segment_time = args.segment_time
+        streamer.jog_lookahead = args.lookahead
+        controller.home()
+
+        start_latency = LatencyStats()
+        standstill = LatencyStats()
+        idle_reported = LatencyStats()
+        overshoot = []  # mm
+        for i in range(args.jogs):
+            direction = -1 if i % 2 == 0 else 1
+            pressed = time.perf_counter()
+            streamer.jog('Z', direction, args.feedrate)
+            streamer.wait_for_state("Jog", timeout=2.0, after=time.monotonic())
+            start_latency.add(time.perf_counter() - pressed)
+            time.sleep(rng.uniform(0.3, 1.0))
+
+            released = time.perf_counter()
+            position_at_release = simulator.position[2]
+            streamer.jog_cancel()
+            streamer.wait_for_idle(timeout=5.0)
+            idle_reported.add(time.perf_counter() - released)
+            standstill.add(simulator.standstill_at - released)
+            overshoot.append(abs(simulator.position[2] - position_at_release))
+
+        decel = args.feedrate / 60 / controller.settings.get_snapshot()[122]
+        print()
+        print(f"Jogs: {args.jogs} at {args.feedrate:.0f} mm/min, segment {args.segment_time * 1000:.0f} ms, "
+              f"lookahead {args.lookahead * 1000:.0f} ms")
+        print(f"Press -> Jog reported:     {start_latency}")
+        print(f"Release -> 0x85 written:   {streamer.jog_cancel_latency}")
+        print(f"Release -> standstill:     {standstill}  (deceleration alone {decel * 1000:.0f} ms)")
+        print(f"Release -> Idle reported:  {idle_reported}")
+        print(f"Overshoot after release:   mean={sum(overshoot) / len(overshoot):.3f} mm, max={max(overshoot):.3f} mm")
+    finally:
+        if controller is not None:
+            controller.grbl_streamer.close()
+        simulator.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Live rate change benchmark against the virtual GRBL device (GUI/GRBLSimulator.py).
+
+Run from the repository root:
+    python -m Benchmarks.GRBLOverrideBenchmark --changes 6
+
+For every scenario a fresh simulator is started, the experiment is streamed and the pump flows are changed
+--changes times with set_flow_rates() (regenerated segments, with --stage-factor the stage speed changes too), then the feed override is stepped with the real-time
+bytes. Reported: time from the call until GRBL executes the new motion, as measured by the controller from the
+status reports, the planner depth in segment time and, for comparison, what a stop_experiment / start_experiment
+restart costs.
+"""
+import argparse
+import time
+
+from GUI.GRBLSimulator import GRBLSimulator
+from GUI.Instrumentation import LatencyStats
+from GUI.PositioningControl import PositioningController
+
+
+SCENARIOS = {
+    # name: (stroke sub segments, stage profile)
+    'linear-20': (20, 'linear'),
+    'linear-50': (50, 'linear'),
+    'sinusoidal': (1, 'sinusoidal'),
+}
+
+
+def wait_for_count(stats: LatencyStats, count: int, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while stats.summary()['count'] < count:
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+def run_scenario(name, sub_segments, profile, changes, pump_1_flowrate, pump_2_flowrate, stage_feedrate, stage_amplitude,
+                 stage_factor=1.0):
+    simulator = GRBLSimulator(homing_time=0.5)
+    simulator.start()
+    controller = None
+    try:
+        controller = PositioningController(port=simulator.port)
+        streamer = controller.grbl_streamer
+        controller.home()
+        controller.stroke_sub_segments = sub_segments
+        controller.start_experiment(pump_1_flowrate, pump_2_flowrate, stage_feedrate, stage_amplitude, stage_profile=profile)
+        time.sleep(1.0)  # Let the planner fill up
+        simulator.reset_stats()
+
+        for i in range(changes):
+            factor = 2.0 if i % 2 == 0 else 1.0
+            controller.set_flow_rates(pump_1_flowrate * factor, pump_2_flowrate * factor,
+                                      stage_feedrate * (stage_factor if i % 2 == 0 else 1.0))
+            if not wait_for_count(controller.rate_change_latency, i + 1, timeout=30.0):
+                print(f"[{name}] Rate change {i + 1} was not observed")
+            time.sleep(0.3)
+
+        for i, percent in enumerate((150, 100, 50, 100)):
+            streamer.set_feed_override(percent)
+            wait_for_count(streamer.feed_override_latency, i + 1, timeout=2.0)
+            time.sleep(0.2)
+        sim_stats = simulator.stats()
+
+        # The old way: stop (soft reset + unlock) and start again (move back to the start point)
+        started = time.perf_counter()
+        streamer.stop()
+        controller.start_experiment(pump_1_flowrate, pump_2_flowrate, stage_feedrate, stage_amplitude, stage_profile=profile)
+        restart_time = time.perf_counter() - started
+        streamer.stop()
+
+        rate_change = controller.rate_change_latency.summary()
+        override = streamer.feed_override_latency.summary()
+        return {
+            'scenario': name,
+            'segment_ms': 1000 / controller.trajectory.segment_rate,
+            'planner_ms': sim_stats['mean_planner_blocks'] * 1000 / controller.trajectory.segment_rate,
+            'rate_p50_ms': rate_change['p50_ms'],
+            'rate_max_ms': rate_change['max_ms'],
+            'override_p50_ms': override['p50_ms'],
+            'override_max_ms': override['max_ms'],
+            'restart_s': restart_time,
+            'underruns': sim_stats['planner_underruns'],
+        }
+    finally:
+        if controller is not None:
+            controller.grbl_streamer.close()
+        simulator.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Live flow change / feed override benchmark on the virtual GRBL device")
+    parser.add_argument('--changes', type=int, default=6, help="Flow rate changes per scenario")
+    parser.add_argument('--scenario', choices=list(SCENARIOS), action='append', help="Scenario(s) to run (default all)")
+    parser.add_argument('--pump-1', type=float, default=1.0, help="Pump 1 flowrate (ml/h)")
+    parser.add_argument('--pump-2', type=float, default=2.0, help="Pump 2 flowrate (ml/h)")
+    parser.add_argument('--stage-feedrate', type=float, default=1000.0, help="Stage speed (mm/min)")
+    parser.add_argument('--stage-amplitude', type=float, default=20.0, help="Stage amplitude (mm)")
+    parser.add_argument('--stage-factor', type=float, default=1.0, help="Stage speed factor of every other change")
+    args = parser.parse_args()
+
+    results = []
+    for name in args.scenario or SCENARIOS:
+        sub_segments, profile = SCENARIOS[name]
+        print(f"--- {name} ---")
+        results.append(run_scenario(name, sub_segments, profile, args.changes, args.pump_1, args.pump_2,
+                                    args.stage_feedrate, args.stage_amplitude, args.stage_factor))
+
+    print()
+    print(f"{'scenario':<12}{'segment ms':>11}{'planner ms':>11}{'rate p50':>10}{'rate max':>10}"
+          f"{'Ov p50':>8}{'Ov max':>8}{'restart s':>10}{'underrun':>9}")
+    for r in results:
+        print(f"{r['scenario']:<12}{r['segment_ms']:>11.1f}{r['planner_ms']:>11.0f}{r['rate_p50_ms']:>10.0f}"
+              f"{r['rate_max_ms']:>10.0f}{r['override_p50_ms']:>8.0f}{r['override_max_ms']:>8.0f}"
+              f"{r['restart_s']:>10.2f}{r['underruns']:>9d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Feed hold pause / resume benchmark against the virtual GRBL device (GUI/GRBLSimulator.py).
+
+Run from the repository root:
+    python -m Benchmarks.GRBLPauseBenchmark --pauses 5 --hold 0.5
+
+The experiment is streamed and paused --pauses times at random moments with GRBLStreamer.pause() / resume().
+Reported: pause -> standstill (reported by GRBL and in the simulator, bounded by the deceleration), resume ->
+motion, how far the trajectory cursor moved while paused (the send loop parks, so at most the one line it held)
+and whether the streamed lines and the executed motion still agree after the last resume.
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from GUI.GRBLSimulator import GRBLSimulator
+from GUI.Instrumentation import LatencyStats
+from GUI.PositioningControl import PositioningController
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Feed hold pause / resume benchmark on the virtual GRBL device")
+    parser.add_argument('--pauses', type=int, default=5, help="Number of pause / resume cycles")
+    parser.add_argument('--hold', type=float, default=0.5, help="Time paused (s)")
+    parser.add_argument('--profile', default='sinusoidal', help="Stage profile")
+    parser.add_argument('--sub-segments', type=int, default=20, help="Stroke sub segments of the linear profile")
+    parser.add_argument('--pump-1', type=float, default=1.0, help="Pump 1 flowrate (ml/h)")
+    parser.add_argument('--pump-2', type=float, default=2.0, help="Pump 2 flowrate (ml/h)")
+    parser.add_argument('--stage-feedrate', type=float, default=1000.0, help="Stage speed (mm/min)")
+    parser.add_argument('--stage-amplitude', type=float, default=20.0, help="Stage amplitude (mm)")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    simulator = GRBLSimulator(homing_time=0.5)
+    simulator.start()
+    controller = None
+    try:
+        controller = PositioningController(port=simulator.port)
+        streamer = controller.grbl_streamer
+        controller.home()
+        controller.stroke_sub_segments = args.sub_segments
+        pumps_before = simulator.position[:2].copy()  # The move to the start point only moves the stage
+        controller.start_experiment(args.pump_1, args.pump_2, args.stage_feedrate, args.stage_amplitude,
+                                    stage_profile=args.profile)
+        simulator.reset_stats()
+
+        standstill = LatencyStats()
+        cursor_moves = []
+        for _ in range(args.pauses):
+            time.sleep(rng.uniform(0.5, 1.5))
+            requested = time.perf_counter()
+            streamer.pause()
+            standstill.add(simulator.standstill_at - requested)
+            cursor = controller.trajectory.segment_index
+            time.sleep(args.hold)
+            cursor_moves.append(controller.trajectory.segment_index - cursor)
+            streamer.resume()
+        time.sleep(1.0)
+        underruns = simulator.stats()['planner_underruns']
+
+        # Streamed lines vs executed motion: let the queued lines run out, then compare the pump positions
+        streamer.stop_flag.set()
+        streamer.send_thread.join(timeout=2.0)
+        streamer.wait_for_idle(timeout=60.0)
+        acked = streamer.stream_lines_acked
+        commanded = np.array(controller.trajectory.commanded_pump_distance(acked))
+        moved = simulator.position[:2] - pumps_before
+
+        print()
+        print(f"Pauses: {args.pauses}, held {args.hold * 1000:.0f} ms each, profile {args.profile}")
+        print(f"Pause -> hold complete reported: {streamer.pause_latency}")
+        print(f"Pause -> standstill (simulator): {standstill}")
+        print(f"Resume -> motion reported:       {streamer.resume_latency}")
+        print(f"Trajectory cursor moved while paused: {cursor_moves} lines")
+        print(f"Planner underruns: {underruns}")
+        print(f"Pumps after {acked} lines: commanded {commanded.round(3).tolist()} mm, "
+              f"executed {moved.round(3).tolist()} mm")
+    finally:
+        if controller is not None:
+            controller.grbl_streamer.close()
+        simulator.close()
+
+
+if __name__ == "__main__":
+    main()
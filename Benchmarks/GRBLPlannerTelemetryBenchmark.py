@@ -0,0 +1,141 @@
+"""
+Planner telemetry benchmark: underruns and planner occupancy seen from the 'Bf:' status reports
+(GUI/PlannerTelemetry.py) against what the virtual GRBL device (GUI/GRBLSimulator.py) actually did.
+
+Run from the repository root:
+    python -m Benchmarks.GRBLPlannerTelemetryBenchmark --duration 6 --low-water-poll-rate 0 --low-water-poll-rate 50
+
+Every scenario is streamed for --duration seconds with the status polled at 10 Hz, once without (0) and once with
+faster polling while the planner is low. 'linear-1000 full' needs more bytes per second than the 115200 baud link
+carries, GRBL then runs with a nearly empty planner and slows down. The 'stall' scenarios stop the send loop for
+that many ms every 2 s (a busy host), long enough for the planner to run dry and the machine to stop.
+Reported: underruns of the simulator and flagged by the telemetry, mean planner blocks (host reports vs the
+simulator's time weighted occupancy), share at or below the low water mark, low-water episodes flagged, status
+reports per second, the strokes flagged, and the cost of PlannerTelemetry.add() per report.
+"""
+import argparse
+import time
+
+from GUI.GRBLSimulator import GRBLSimulator
+from GUI.GRBLStatus import GRBLStatus
+from GUI.PlannerTelemetry import PlannerTelemetry
+from GUI.PositioningControl import PositioningController
+
+
+SCENARIOS = {
+    # name: (stroke sub segments, stage profile, compact G-code, host stall every 2 s (s))
+    'linear-1000 full': (1000, 'linear', False, 0.0),
+    'linear-1000': (1000, 'linear', True, 0.0),
+    'sinusoidal': (1, 'sinusoidal', True, 0.0),
+    'stall-350': (1, 'sinusoidal', True, 0.35),
+    'stall-500': (1, 'sinusoidal', True, 0.5),
+}
+STALL_INTERVAL = 2.0  # s
+
+
+def stalling(loop_method, stall: float):
+    """loop_method that blocks the send loop for stall seconds every STALL_INTERVAL."""
+    state = {'next': time.perf_counter() + STALL_INTERVAL}
+
+    def method(previous_command):
+        if time.perf_counter() >= state['next']:
+            time.sleep(stall)
+            state['next'] = time.perf_counter() + STALL_INTERVAL
+        return loop_method(previous_command)
+    return method
+
+
+def run(name: str, low_water_poll_rate: float, args) -> dict:
+    sub_segments, profile, compact, stall = SCENARIOS[name]
+    simulator = GRBLSimulator(homing_time=0.5)
+    simulator.start()
+    controller = None
+    try:
+        controller = PositioningController(port=simulator.port, connect=False)
+        streamer = controller.grbl_streamer
+        streamer.status_poll_rate = args.poll_rate
+        streamer.low_water_poll_rate = low_water_poll_rate
+        controller.connect()
+        controller.home()
+        controller.stroke_sub_segments = sub_segments
+        controller.compact_gcode = compact
+        if stall:
+            streamer.loop_method = stalling(controller.loop_method, stall)
+        controller.start_experiment(args.pump_1, args.pump_2, args.stage_feedrate, args.stage_amplitude,
+                                    stage_profile=profile)
+        simulator.reset_stats()
+        telemetry = streamer.planner_telemetry
+        telemetry.start()  # Same window as the simulator statistics
+        started = time.monotonic()
+        time.sleep(args.duration)
+        sim_stats = simulator.stats()
+        summary = telemetry.summary()
+        reports = len(telemetry.planner_used.since(started)[0])
+        streamer.stop()
+        return {
+            'scenario': name,
+            'low_water_poll_rate': low_water_poll_rate,
+            'sim_underruns': sim_stats['planner_underruns'],
+            'flagged': summary['underruns'],
+            'sim_blocks': sim_stats['mean_planner_blocks'],
+            'host_blocks': summary['mean_blocks'] or 0.0,
+            'sim_low': sum(sim_stats['planner_occupancy'][:telemetry.low_water + 1]),
+            'host_low': summary['low'] or 0.0,
+            'reports_per_second': reports / args.duration,
+            'strokes': summary['underrun_strokes'],
+            'low_episodes': summary['low_episodes'],
+            'low_strokes': summary['low_strokes'],
+        }
+    finally:
+        if controller is not None:
+            controller.grbl_streamer.close()
+        simulator.close()
+
+
+def add_cost(n: int = 100000) -> float:
+    """Time per PlannerTelemetry.add() of a streaming report (s)."""
+    telemetry = PlannerTelemetry()
+    telemetry.stroke_of = lambda line: line // 200
+    telemetry.add(GRBLStatus.parse("<Idle|MPos:0.000,0.000,0.000|Bf:15,128|FS:0,0>", -1.0), False)
+    # 1..15 blocks used, no underrun (it would print)
+    reports = [GRBLStatus.parse(f"<Run|MPos:0.000,0.000,0.000|Bf:{i % 15},{100 + i % 28}|FS:1000,0>", float(i))
+               for i in range(1000)]
+    started = time.perf_counter()
+    for i in range(n):
+        telemetry.add(reports[i % 1000], True, i)
+    return (time.perf_counter() - started) / n
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Planner telemetry against the virtual GRBL device")
+    parser.add_argument('--duration', type=float, default=5.0, help="Streaming time per run (s)")
+    parser.add_argument('--poll-rate', type=float, default=10.0, help="Status poll rate (Hz)")
+    parser.add_argument('--low-water-poll-rate', type=float, action='append',
+                        help="Poll rate(s) while the planner is low (Hz), 0 disables, default 0 and 50")
+    parser.add_argument('--scenario', choices=list(SCENARIOS), action='append', help="Scenario(s) to run (default all)")
+    parser.add_argument('--pump-1', type=float, default=1.0, help="Pump 1 flowrate (ml/h)")
+    parser.add_argument('--pump-2', type=float, default=2.0, help="Pump 2 flowrate (ml/h)")
+    parser.add_argument('--stage-feedrate', type=float, default=1000.0, help="Stage speed (mm/min)")
+    parser.add_argument('--stage-amplitude', type=float, default=20.0, help="Stage amplitude (mm)")
+    args = parser.parse_args()
+
+    results = []
+    for name in args.scenario or SCENARIOS:
+        for low_water_poll_rate in args.low_water_poll_rate or [0.0, 50.0]:
+            print(f"--- {name}, low water poll {low_water_poll_rate:g} Hz ---")
+            results.append(run(name, low_water_poll_rate, args))
+
+    print()
+    print(f"{'scenario':<18}{'low Hz':>7}{'reports/s':>10}{'sim underruns':>14}{'flagged':>8}{'sim Bf':>8}{'host Bf':>8}"
+          f"{'sim low':>8}{'host low':>9}{'low ep':>7}  strokes flagged (underrun / low water)")
+    for r in results:
+        strokes = r['strokes'] or r['low_strokes']
+        strokes = ", ".join(map(str, strokes[:8])) + (" ..." if len(strokes) > 8 else "")
+        print(f"{r['scenario']:<18}{r['low_water_poll_rate']:>7g}{r['reports_per_second']:>10.1f}{r['sim_underruns']:>14d}"
+              f"{r['flagged']:>8d}{r['sim_blocks']:>8.1f}{r['host_blocks']:>8.1f}{r['sim_low']:>8.1%}{r['host_low']:>9.1%}"
+              f"{r['low_episodes']:>7d}  {strokes}")
+    print(f"PlannerTelemetry.add(): {add_cost() * 1e6:.1f} us per report")
+
+
+if __name__ == "__main__":
+    main()
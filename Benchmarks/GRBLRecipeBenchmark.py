@@ -0,0 +1,130 @@
+"""
+Recipe benchmark: a multi-phase recipe (GUI/Recipe.py) streamed to the virtual GRBL device (GUI/GRBLSimulator.py).
+
+Run from the repository root:
+    python -m Benchmarks.GRBLRecipeBenchmark --profile linear --profile sinusoidal --lead 0 --lead 0.25
+
+The recipe primes with the stage standing, oscillates at three flow ratios and two stage speeds, purges and waits.
+Every profile runs once with phase callbacks from the status reports only (lead 0) and once with the predicted
+timer (lead > 0). Reported per run: planner underruns of the simulator (a standing stage phase ends with a stop,
+so only those between moving phases count against the stream), the longest loop_method call at a phase switch
+against the longest overall (all phases are generated before the stream starts), and the error of the on_phase
+callbacks against the time the simulator finished the last block of the previous phase.
+"""
+import argparse
+import time
+
+from GUI.GRBLSimulator import GRBLSimulator
+from GUI.PositioningControl import PositioningController
+from GUI.Recipe import Recipe, RecipeRunner
+
+RECIPE = {
+    'name': "benchmark",
+    'stage_amplitude': 10.0,
+    'phases': [
+        {'name': "prime", 'duration': 1.5, 'pump_1': 5, 'pump_2': 5},
+        {'name': "hv ramp", 'duration': 2.0, 'pump_1': 1, 'pump_2': 1, 'stage_feedrate': 1000, 'voltage': 15000},
+        {'name': "ratio 1:2", 'duration': 3.0, 'pump_1': 1, 'pump_2': 2, 'stage_feedrate': 1000, 'voltage': 18000},
+        {'name': "ratio 2:1", 'duration': 3.0, 'pump_1': 2, 'pump_2': 1, 'stage_feedrate': 1500},
+        {'name': "purge", 'duration': 1.5, 'pump_1': 10, 'voltage': 0},
+        {'name': "wait", 'duration': 1.0},
+    ],
+}
+
+
+def timed(loop_method, trajectory, samples: dict):
+    """loop_method that records its call time, separately for the first line of a phase."""
+    def method(previous_command):
+        phase = trajectory.phase_index
+        started = time.perf_counter()
+        command = loop_method(previous_command)
+        elapsed = time.perf_counter() - started
+        key = 'switch' if trajectory.phase_index != phase else 'line'
+        samples[key] = max(samples.get(key, 0.0), elapsed)
+        return command
+    return method
+
+
+def run(profile: str, lead: float, args) -> dict:
+    recipe = Recipe.from_dict(dict(RECIPE, stage_profile=profile))
+    simulator = GRBLSimulator(homing_time=0.5)
+    simulator.start()
+    controller = None
+    try:
+        controller = PositioningController(port=simulator.port, connect=False)
+        streamer = controller.grbl_streamer
+        streamer.status_poll_rate = args.poll_rate
+        controller.connect()
+        controller.home()
+        controller.stroke_sub_segments = args.sub_segments
+        # start_recipe() step by step, so the simulator statistics start with the stream
+        trajectory = controller.generate_recipe_trajectory(recipe)
+        controller.move_stage_to_start_position(recipe.stage_amplitude, 1500)
+        streamer.wait_for_idle(timeout=10.0)
+        samples = {}
+        streamer.loop_method = timed(controller.loop_method, trajectory, samples)
+        runner = RecipeRunner(streamer, trajectory, lead=lead)
+        simulator.reset_stats()
+        simulator.block_times = []
+        runner.start()
+        streamer.start()
+        if not runner.done.wait(recipe.duration * 2 + 10):
+            raise TimeoutError("Recipe did not finish")
+        sim_stats = simulator.stats()
+        underrun_times = list(simulator.planner_underruns)
+        block_times = simulator.block_times
+        streamer.stop()
+
+        # GRBL starts phase k once it finished the last line of phase k - 1
+        errors = []
+        for index, entered, how in runner.entered[1:]:
+            finished = block_times[trajectory.phase_starts[index] - 1]
+            errors.append(((entered - finished) * 1000, how))
+        # Underruns are expected where a standing stage phase begins or ends, and after the last line
+        boundaries = [block_times[start - 1] for start in trajectory.phase_starts[1:]]
+        moving = [phase.stage_feedrate > 0 for phase, _ in trajectory.phases]
+        expected = [t for k, t in enumerate(boundaries) if not (moving[k] and moving[k + 1])] + [block_times[-1]]
+        unexpected = sum(1 for t in underrun_times if not any(abs(t - b) < 0.05 for b in expected))
+        return {
+            'profile': profile,
+            'lead': lead,
+            'lines': trajectory.segment_index,
+            'seconds': block_times[-1] - block_times[0],
+            'nominal': recipe.duration,
+            'sim_underruns': sim_stats['planner_underruns'],
+            'unexpected': unexpected,
+            'switch_ms': samples.get('switch', 0.0) * 1000,
+            'line_ms': samples.get('line', 0.0) * 1000,
+            'errors': errors,
+        }
+    finally:
+        if controller is not None:
+            controller.grbl_streamer.close()
+        simulator.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-phase recipe against the virtual GRBL device")
+    parser.add_argument('--profile', action='append', help="Stage profile(s), default linear and sinusoidal")
+    parser.add_argument('--lead', type=float, action='append', help="RecipeRunner lead(s) (s), default 0 and 0.25")
+    parser.add_argument('--poll-rate', type=float, default=10.0, help="Status poll rate (Hz)")
+    parser.add_argument('--sub-segments', type=int, default=100, help="Stroke sub segments of the linear profile")
+    args = parser.parse_args()
+
+    results = []
+    for profile in args.profile or ['linear', 'sinusoidal']:
+        for lead in args.lead or [0.0, 0.25]:
+            print(f"--- {profile}, lead {lead:g} s ---")
+            results.append(run(profile, lead, args))
+
+    print()
+    print(f"{'profile':<12}{'lead s':>7}{'lines':>7}{'run s':>7}{'nominal':>8}{'underruns':>10}{'unexpected':>11}"
+          f"{'switch ms':>10}{'line ms':>8}  phase callback error ms (r: report, p: predicted)")
+    for r in results:
+        errors = " ".join(f"{error:+.0f}{how[0]}" for error, how in r['errors'])
+        print(f"{r['profile']:<12}{r['lead']:>7g}{r['lines']:>7}{r['seconds']:>7.1f}{r['nominal']:>8.1f}"
+              f"{r['sim_underruns']:>10}{r['unexpected']:>11}{r['switch_ms']:>10.2f}{r['line_ms']:>8.2f}  {errors}")
+
+
+if __name__ == "__main__":
+    main()
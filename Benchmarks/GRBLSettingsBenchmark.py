@@ -0,0 +1,76 @@
+"""
+GRBL settings upload benchmark against the virtual GRBL device (GUI/GRBLSimulator.py).
+
+Run from the repository root:
+    python -m Benchmarks.GRBLSettingsBenchmark --write-time 0.02 --depth 1 --depth 4
+
+Uploads OPERATING_SETTINGS to a simulator whose EEPROM holds either the same values ('in sync') or
+HOMING_SETTINGS ('homing'), once every setting with send-response ('all') and once through GRBLSettingsManager
+(diff, pipelined, verified). Reported: upload time, '$n=' writes the device executed and '$$' reads.
+"""
+import argparse
+import time
+
+from GUI.GRBLSettings import GRBLSettingsManager, HOMING_SETTINGS, OPERATING_SETTINGS, format_setting
+from GUI.GRBLSimulator import GRBLSimulator
+from GUI.PositioningControl import GRBLStreamer
+
+
+def run(eeprom: str, method: str, depth: int, write_time: float) -> dict:
+    simulator = GRBLSimulator(settings=HOMING_SETTINGS if eeprom == 'homing' else OPERATING_SETTINGS,
+                              setting_write_time=write_time)
+    simulator.start()
+    streamer = GRBLStreamer(port=simulator.port, status_poll_rate=0)
+    try:
+        streamer.connect()
+        manager = GRBLSettingsManager(streamer, pipeline_depth=depth)
+        started = time.perf_counter()
+        if method == 'all':
+            for number, value in OPERATING_SETTINGS.items():
+                streamer.send_command(format_setting(int(number), value))
+        else:
+            manager.apply(OPERATING_SETTINGS)
+        elapsed = time.perf_counter() - started
+
+        # Toggling hard limits afterwards needs no readback
+        toggle_started = time.perf_counter()
+        for enabled in (False, True):
+            manager.set(21, enabled)
+        toggle_time = (time.perf_counter() - toggle_started) / 2
+        in_sync = all(float(simulator.settings[str(k)]) == float(v) for k, v in OPERATING_SETTINGS.items())
+        return {
+            'eeprom': eeprom,
+            'method': method if method == 'all' else f"diff d={depth}",
+            'seconds': elapsed,
+            'writes': simulator.stats()['setting_writes'] - 2,
+            'reads': manager.reads,
+            'toggle_ms': toggle_time * 1000,
+            'in_sync': in_sync,
+        }
+    finally:
+        streamer.io_stop_flag.set()
+        streamer.ser.close()
+        simulator.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GRBL settings upload benchmark on the virtual GRBL device")
+    parser.add_argument('--write-time', type=float, default=0.02, help="Simulated EEPROM write time per setting (s)")
+    parser.add_argument('--depth', type=int, action='append', help="Pipeline depth(s), default 1 and 4")
+    args = parser.parse_args()
+
+    results = []
+    for eeprom in ('in sync', 'homing'):
+        results.append(run(eeprom, 'all', 1, args.write_time))
+        for depth in args.depth or [1, 4]:
+            results.append(run(eeprom, 'diff', depth, args.write_time))
+
+    print()
+    print(f"{'EEPROM':<10}{'method':<12}{'upload s':>10}{'writes':>8}{'reads':>7}{'$21 ms':>8}  in sync")
+    for r in results:
+        print(f"{r['eeprom']:<10}{r['method']:<12}{r['seconds']:>10.3f}{r['writes']:>8}{r['reads']:>7}"
+              f"{r['toggle_ms']:>8.1f}  {r['in_sync']}")
+
+
+if __name__ == "__main__":
+    main()
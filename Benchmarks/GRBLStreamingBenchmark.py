@@ -0,0 +1,117 @@
+"""
+Offline GRBL streaming benchmark against the virtual GRBL device (GUI/GRBLSimulator.py).
+
+Run from the repository root:
+    python -m Benchmarks.GRBLStreamingBenchmark --duration 10 --time-scale 1
+
+For every scenario a fresh simulator is started, PositioningController connects to it, uploads the
+operating settings, homes, streams the experiment trajectory for --duration seconds and stops.
+Reported: streamer throughput and ack latency, planner underruns / occupancy, RX overflows, stop latency,
+and the time from start_experiment() (move to the start point) until streaming begins.
+"""
+import argparse
+import time
+
+from GUI.GRBLSimulator import GRBLSimulator
+from GUI.PositioningControl import PositioningController
+
+
+SCENARIOS = {
+    # name: (stroke sub segments, stage profile)
+    'linear': (1, 'linear'),
+    'linear-20': (20, 'linear'),
+    'sinusoidal': (1, 'sinusoidal'),
+    'dwell': (1, 'dwell'),
+}
+
+
+def run_scenario(name, sub_segments, profile, duration, time_scale, pump_1_flowrate, pump_2_flowrate,
+                 stage_feedrate, stage_amplitude):
+    simulator = GRBLSimulator(time_scale=time_scale, homing_time=0.5)
+    simulator.start()
+    controller = None
+    try:
+        started = time.perf_counter()
+        controller = PositioningController(port=simulator.port)
+        connect_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        controller.home()  # Returns once the pump pull-off moves are done
+        home_time = time.perf_counter() - started
+
+        controller.stroke_sub_segments = sub_segments
+        started = time.perf_counter()
+        controller.start_experiment(pump_1_flowrate, pump_2_flowrate, stage_feedrate, stage_amplitude, stage_profile=profile)
+        start_time = time.perf_counter() - started  # Move to the start point until streaming begins
+        simulator.reset_stats()
+        time.sleep(duration)
+        sim_stats = simulator.stats()
+
+        stop_requested = time.perf_counter()
+        controller.grbl_streamer.stop()
+        stop_returned = time.perf_counter() - stop_requested
+        standstill = simulator.standstill_at - stop_requested if simulator.standstill_at else float('nan')
+
+        stream_stats = controller.grbl_streamer.get_stream_stats()
+        return {
+            'scenario': name,
+            'connect_s': connect_time,
+            'home_s': home_time,
+            'start_s': start_time,
+            'required_rate': stream_stats['required_rate'] or 0.0,
+            'average_rate': stream_stats['average_rate'],
+            'peak_rate': stream_stats['peak_sustained_rate'],
+            'ack_p50_ms': stream_stats['ack_latency']['p50_ms'],
+            'ack_p99_ms': stream_stats['ack_latency']['p99_ms'],
+            'bytes_per_line': stream_stats['average_line_length'] or 0.0,
+            'underruns': sim_stats['planner_underruns'],
+            'mean_planner_blocks': sim_stats['mean_planner_blocks'],
+            'rx_overflows': sim_stats['rx_overflows'],
+            'stop_to_standstill_ms': standstill * 1000,
+            'stop_call_ms': stop_returned * 1000,
+        }
+    finally:
+        if controller is not None:
+            controller.grbl_streamer.close()
+        simulator.close()
+
+
+def print_results(results):
+    columns = [
+        ('scenario', '{:<12}'), ('required_rate', '{:>9.1f}'), ('average_rate', '{:>9.1f}'), ('peak_rate', '{:>9.1f}'),
+        ('ack_p50_ms', '{:>9.2f}'), ('ack_p99_ms', '{:>9.2f}'), ('bytes_per_line', '{:>7.1f}'),
+        ('underruns', '{:>9d}'), ('mean_planner_blocks', '{:>7.1f}'), ('rx_overflows', '{:>6d}'),
+        ('stop_to_standstill_ms', '{:>9.1f}'), ('stop_call_ms', '{:>9.1f}'), ('connect_s', '{:>7.2f}'), ('home_s', '{:>7.2f}'),
+        ('start_s', '{:>7.2f}'),
+    ]
+    headers = ['scenario', 'req/s', 'avg/s', 'peak/s', 'ack p50', 'ack p99', 'B/line', 'underrun', 'Bf', 'RXovf',
+               'stop ms', 'stop() ms', 'conn s', 'home s', 'start s']
+    widths = [len(fmt.format(0 if key != 'scenario' else '')) for key, fmt in columns]
+    print("  ".join(header.rjust(width) for header, width in zip(headers, widths)))
+    for result in results:
+        print("  ".join(fmt.format(result[key]) for key, fmt in columns))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GRBL streaming benchmark on the virtual GRBL device")
+    parser.add_argument('--duration', type=float, default=10.0, help="Streaming time per scenario (s)")
+    parser.add_argument('--time-scale', type=float, default=1.0, help="Simulated motion speed-up")
+    parser.add_argument('--scenario', choices=list(SCENARIOS), action='append', help="Scenario(s) to run (default all)")
+    parser.add_argument('--pump-1', type=float, default=1.0, help="Pump 1 flowrate (ml/h)")
+    parser.add_argument('--pump-2', type=float, default=2.0, help="Pump 2 flowrate (ml/h)")
+    parser.add_argument('--stage-feedrate', type=float, default=1000.0, help="Stage speed (mm/min)")
+    parser.add_argument('--stage-amplitude', type=float, default=20.0, help="Stage amplitude (mm)")
+    args = parser.parse_args()
+
+    results = []
+    for name in args.scenario or SCENARIOS:
+        sub_segments, profile = SCENARIOS[name]
+        print(f"--- {name} ---")
+        results.append(run_scenario(name, sub_segments, profile, args.duration, args.time_scale,
+                                    args.pump_1, args.pump_2, args.stage_feedrate, args.stage_amplitude))
+    print()
+    print_results(results)
+
+
+if __name__ == "__main__":
+    main()
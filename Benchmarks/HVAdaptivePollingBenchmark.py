@@ -0,0 +1,97 @@
+"""
+Adaptive HV polling benchmark against the simulated supply (GUI/HVSimulator.py).
+
+Run from the repository root:
+    python -m Benchmarks.HVAdaptivePollingBenchmark --min-interval 0.05 --max-interval 1.0 --budget 0.6
+
+The same sequence of phases (output disabled, ramp, steady, noisy current, steady) is run once with fixed
+polling at --min-interval and once with adaptive polling between --min-interval and --max-interval.
+Reported per phase: achieved M0 / M1 sample rates and the share of the serial link used by telemetry.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from GUI.HVControl import HVController
+from GUI.HVRamp import HVRamp
+from GUI.HVSimulator import HVSimulator
+
+
+def phase_rate(controller, name, started, finished):
+    timestamps, _ = controller.get_monitor_history(name).last()
+    return np.count_nonzero((timestamps >= started) & (timestamps < finished)) / (finished - started)
+
+
+def run(mode, args):
+    simulator = HVSimulator(voltage_noise=5.0, current_noise=0.05)
+    simulator.start()
+    controller = HVController(port=simulator.port, timeout=0.2)
+    controller.link_budget = args.budget
+    results = []
+    try:
+        controller.connect()
+        controller.set_voltage(0.0)
+        controller.set_enable_state(False)
+        if mode == 'adaptive':
+            bounds = dict(interval=args.max_interval, min_interval=args.min_interval, max_interval=args.max_interval)
+        else:
+            bounds = dict(interval=args.min_interval)
+        controller.start_voltage_monitor(**bounds)
+        controller.start_current_monitor(**bounds)
+        controller.start_status_monitor(interval=1.0)
+        ramp = HVRamp(controller, slew_rate=args.voltage / args.ramp_time)
+
+        def phase(name, duration, action=None):
+            started = time.monotonic()
+            requests = simulator.requests
+            if action:
+                action()
+            time.sleep(max(0.0, duration - (time.monotonic() - started)))
+            finished = time.monotonic()
+            results.append({
+                'mode': mode,
+                'phase': name,
+                'voltage_hz': phase_rate(controller, 'voltage', started, finished),
+                'current_hz': phase_rate(controller, 'current', started, finished),
+                'requests_hz': (simulator.requests - requests) / (finished - started),
+                'telemetry_share': controller.telemetry_busy.rate,
+            })
+
+        phase('disabled', args.phase_time)
+        controller.set_enable_state(True)
+        phase('ramp', args.ramp_time, lambda: (ramp.start(args.voltage, start_voltage=0.0), ramp.wait()))
+        phase('steady', args.phase_time)
+        simulator.current_noise = 2.0
+        phase('noisy', args.phase_time)
+        simulator.current_noise = 0.05
+        phase('steady', args.phase_time)
+        controller.set_voltage(0.0)
+        controller.set_enable_state(False)
+        phase('disabled', args.phase_time)
+    finally:
+        controller.close()
+        simulator.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Adaptive HV polling benchmark on the simulated supply")
+    parser.add_argument('--min-interval', type=float, default=0.05, help="Fastest M0/M1 interval (s)")
+    parser.add_argument('--max-interval', type=float, default=1.0, help="Slowest M0/M1 interval (s)")
+    parser.add_argument('--budget', type=float, default=0.6, help="Telemetry link budget (share of the port time)")
+    parser.add_argument('--voltage', type=float, default=5000.0, help="Ramp target (V)")
+    parser.add_argument('--ramp-time', type=float, default=5.0, help="Ramp duration (s)")
+    parser.add_argument('--phase-time', type=float, default=6.0, help="Duration of the other phases (s)")
+    args = parser.parse_args()
+
+    results = run('fixed', args) + run('adaptive', args)
+    print()
+    print(f"{'mode':<10}{'phase':<10}{'M0 Hz':>8}{'M1 Hz':>8}{'req/s':>8}{'telemetry':>11}")
+    for r in results:
+        print(f"{r['mode']:<10}{r['phase']:<10}{r['voltage_hz']:>8.2f}{r['current_hz']:>8.2f}{r['requests_hz']:>8.1f}"
+              f"{r['telemetry_share']:>11.0%}")
+
+
+if __name__ == "__main__":
+    main()
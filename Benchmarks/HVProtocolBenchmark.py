@@ -0,0 +1,114 @@
+"""
+Offline MPD HV protocol benchmark against the simulated supply (GUI/HVSimulator.py).
+
+Run from the repository root:
+    python -m Benchmarks.HVProtocolBenchmark --iterations 200
+    python -m Benchmarks.HVProtocolBenchmark --drop-rate 0.01 --corrupt-rate 0.01 --fault-rate 0.05 --timeout 0.2
+
+Every query and set command is sent --iterations times through HVController._send_command.
+Reported per command: round-trips/s, p50/p99/max latency and error rates (timeouts, checksum, other).
+"""
+import argparse
+import time
+
+from GUI.HVControl import HVController, HVControllerError
+from GUI.HVSimulator import HVSimulator
+from GUI.Instrumentation import LatencyStats
+
+
+COMMANDS = [
+    # name: (cmd, operator, data)
+    ('M0?', ('M0', '?', '')),
+    ('M1?', ('M1', '?', '')),
+    ('SR?', ('SR', '?', '')),
+    ('V1?', ('V1', '?', '')),
+    ('I1?', ('I1', '?', '')),
+    ('EN?', ('EN', '?', '')),
+    ('V1=', ('V1', '=', '02500.0')),
+    ('I1=', ('I1', '=', '00050.0')),
+    ('EN=', ('EN', '=', '1')),
+]
+
+
+def classify_error(error: HVControllerError) -> str:
+    message = str(error)
+    if message.startswith("No response"):
+        return 'timeout'
+    if message.startswith("Checksum mismatch"):
+        return 'checksum'
+    return 'other'
+
+
+def run_command(controller, name, command, iterations):
+    latency = LatencyStats(maxlen=iterations)
+    errors = {'timeout': 0, 'checksum': 0, 'other': 0}
+    faults = 0
+    started = time.perf_counter()
+    for _ in range(iterations):
+        sent = time.perf_counter()
+        try:
+            response = controller._send_command(*command)
+        except HVControllerError as e:
+            errors[classify_error(e)] += 1
+            continue
+        latency.add(time.perf_counter() - sent)
+        if name == 'SR?' and int(response[1:], 16) & 0x02:
+            faults += 1
+    elapsed = time.perf_counter() - started
+    summary = latency.summary()
+    return {
+        'command': name,
+        'round_trips_per_s': iterations / elapsed,
+        'p50_ms': summary['p50_ms'],
+        'p99_ms': summary['p99_ms'],
+        'max_ms': summary['max_ms'],
+        'timeout_rate': errors['timeout'] / iterations,
+        'checksum_rate': errors['checksum'] / iterations,
+        'other_rate': errors['other'] / iterations,
+        'fault_reports': faults,
+    }
+
+
+def print_results(results):
+    print(f"{'command':<8}{'rt/s':>8}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}{'timeout':>9}{'csum':>8}{'other':>8}{'faults':>8}")
+    for r in results:
+        print(f"{r['command']:<8}{r['round_trips_per_s']:>8.1f}{r['p50_ms']:>9.2f}{r['p99_ms']:>9.2f}{r['max_ms']:>9.2f}"
+              f"{r['timeout_rate']:>9.1%}{r['checksum_rate']:>8.1%}{r['other_rate']:>8.1%}{r['fault_reports']:>8d}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MPD HV protocol benchmark on the simulated supply")
+    parser.add_argument('--iterations', type=int, default=200, help="Round-trips per command")
+    parser.add_argument('--baudrate', type=int, default=9600)
+    parser.add_argument('--timeout', type=float, default=0.2, help="HVController read timeout (s)")
+    parser.add_argument('--reply-delay', type=float, default=0.002, help="Device processing time before a reply (s)")
+    parser.add_argument('--reply-jitter', type=float, default=0.0, help="Uniform extra reply delay (s)")
+    parser.add_argument('--voltage-noise', type=float, default=5.0, help="M0 noise standard deviation (V)")
+    parser.add_argument('--current-noise', type=float, default=0.05, help="M1 noise standard deviation (uA)")
+    parser.add_argument('--fault-rate', type=float, default=0.0, help="Probability of a fault bit in SR")
+    parser.add_argument('--corrupt-rate', type=float, default=0.0, help="Probability of a reply with a bad checksum")
+    parser.add_argument('--drop-rate', type=float, default=0.0, help="Probability of a missing reply")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--command', choices=[name for name, _ in COMMANDS], action='append', help="Command(s) to run (default all)")
+    args = parser.parse_args()
+
+    simulator = HVSimulator(baudrate=args.baudrate, reply_delay=args.reply_delay, reply_jitter=args.reply_jitter,
+                            voltage_noise=args.voltage_noise, current_noise=args.current_noise,
+                            fault_rate=args.fault_rate, corrupt_rate=args.corrupt_rate, drop_rate=args.drop_rate,
+                            seed=args.seed)
+    simulator.start()
+    controller = HVController(port=simulator.port, baudrate=args.baudrate, timeout=args.timeout)
+    try:
+        controller.connect()
+        results = [run_command(controller, name, command, args.iterations)
+                   for name, command in COMMANDS if not args.command or name in args.command]
+        print()
+        print_results(results)
+        print(f"\nSimulator: {simulator.stats()}")
+    finally:
+        controller.close()
+        simulator.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+CPU cost of the MPD HV protocol layer per command, without any serial I/O.
+
+Run from the repository root:
+    python -m Benchmarks.HVProtocolMicroBenchmark --iterations 100000
+
+HVController talks to an in-memory port that answers instantly with a canned reply, so only framing,
+checksum and response parsing are measured. 'before' is the previous string based implementation
+(kept below as the reference), 'after' is the current HVController.
+"""
+import argparse
+import time
+
+from GUI.HVControl import HVController, frame_checksum
+
+
+class LoopbackSerial:
+    """Minimal serial.Serial stand-in that replies to every frame with a canned response."""
+    is_open = True
+
+    def __init__(self, header: bytes):
+        self.header = header
+        self.replies = {}
+        self._pending = b""
+
+    def add_reply(self, cmd: bytes, data: bytes):
+        body = self.header + cmd + b"=" + data
+        self.replies[cmd] = b"\x02" + body + frame_checksum(body) + b"\n"
+
+    def reset_input_buffer(self):
+        self._pending = b""
+
+    def write(self, frame):
+        self._pending = self.replies[bytes(frame[5:7])]
+
+    def read_until(self, terminator=b"\n"):
+        return self._pending
+
+    def close(self):
+        pass
+
+
+def legacy_checksum(addr: str, devtype: str, cmd: str, operator: str, data: str = "") -> str:
+    msg = addr + devtype + cmd + operator + data
+    total = sum(ord(c) for c in msg)
+    checksum = 0x200 - total
+    checksum &= 0xFF
+    checksum &= 0x7F
+    checksum |= 0x40
+    return f"{checksum:02X}"
+
+
+def legacy_send_command(controller: HVController, cmd: str, operator: str, data: str = "") -> str:
+    """The string based _build_command/_send_command the protocol layer used before."""
+    STX = chr(0x02)
+    LF = chr(0x0A)
+    csum = legacy_checksum(controller.addr, controller.devtype, cmd, operator, data)
+    raw = (STX + controller.addr + controller.devtype + cmd + operator + data + csum + LF).encode('ascii')
+    with controller.communication_lock:
+        controller.ser.reset_input_buffer()
+        controller.ser.write(raw)
+        resp = controller.ser.read_until(b'\n')
+        resp_ascii = resp.decode('ascii')
+        if not resp_ascii.startswith(chr(0x02)):
+            raise ValueError(resp_ascii)
+        body = resp_ascii[1:].rstrip('\n').rstrip('\r')
+        addr_r, devtype_r, cmd_r, operator_r = body[0:2], body[2:4], body[4:6], body[6:7]
+        data_r, csum_r = body[7:-2], body[-2:]
+        if addr_r != controller.addr or devtype_r != controller.devtype or cmd_r != cmd:
+            raise ValueError(body)
+        if legacy_checksum(addr_r, devtype_r, cmd_r, operator_r, data_r).upper() != csum_r.upper():
+            raise ValueError(body)
+        return operator_r + data_r
+
+
+def legacy_get_output_voltage(controller: HVController) -> float:
+    return float(legacy_send_command(controller, "M0", "?")[1:])
+
+
+def legacy_set_voltage(controller: HVController) -> None:
+    legacy_send_command(controller, "V1", "=", f"{2500.0:07.1f}")
+
+
+def legacy_get_status(controller: HVController) -> int:
+    return int(legacy_send_command(controller, "SR", "?")[1:], 16)
+
+
+CASES = [
+    # name, before, after
+    ('M0? get_output_voltage', legacy_get_output_voltage, lambda c: c.get_output_voltage()),
+    ('V1= set_voltage', legacy_set_voltage, lambda c: c.set_voltage(2500.0)),
+    ('SR? status register', legacy_get_status, lambda c: int(c._request(b"SR", b"?")[1:], 16)),
+    ('M1? _send_command (str)', lambda c: legacy_send_command(c, "M1", "?"), lambda c: c._send_command("M1", "?")),
+]
+
+
+def measure(func, controller, iterations, repeat=3):
+    """Best of repeat runs, CPU seconds per call."""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.process_time()
+        for _ in range(iterations):
+            func(controller)
+        best = min(best, time.process_time() - started)
+    return best / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-command CPU cost of the HV protocol layer")
+    parser.add_argument('--iterations', type=int, default=100000)
+    args = parser.parse_args()
+
+    controller = HVController(port="loopback")
+    controller.ser = LoopbackSerial(controller._header)
+    controller.ser.add_reply(b"M0", b"02500.0")
+    controller.ser.add_reply(b"M1", b"002.500")
+    controller.ser.add_reply(b"V1", b"02500.0")
+    controller.ser.add_reply(b"SR", b"C1")
+
+    print(f"{'command':<26}{'before us':>10}{'after us':>10}{'speed-up':>10}")
+    for name, before, after in CASES:
+        before_s = measure(before, controller, args.iterations)
+        after_s = measure(after, controller, args.iterations)
+        print(f"{name:<26}{before_s * 1e6:>10.2f}{after_s * 1e6:>10.2f}{before_s / after_s:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
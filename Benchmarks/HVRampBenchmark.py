@@ -0,0 +1,56 @@
+"""
+HV ramp engine benchmark against the simulated supply (GUI/HVSimulator.py).
+
+Run from the repository root:
+    python -m Benchmarks.HVRampBenchmark --target 10000 --slew 500 --slew 1000 --slew 2000
+
+For every slew rate the setpoint is ramped 0 -> target -> 0 with the usual M0/M1/SR telemetry running.
+Reported: configured vs achieved ramp duration, step count and V1= round-trip, and the time held
+because M0 lagged the setpoint (raise --time-constant to provoke holds).
+"""
+import argparse
+
+from GUI.HVControl import HVController
+from GUI.HVRamp import HVRamp
+from GUI.HVSimulator import HVSimulator
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HV ramp engine benchmark on the simulated supply")
+    parser.add_argument('--target', type=float, default=10000.0, help="Ramp target (V)")
+    parser.add_argument('--slew', type=float, action='append', help="Slew rate(s) (V/s), default 500, 1000, 2000")
+    parser.add_argument('--max-lag', type=float, default=500.0, help="Hold when M0 lags by more than this (V)")
+    parser.add_argument('--time-constant', type=float, default=0.2, help="Simulated output time constant (s)")
+    parser.add_argument('--monitor-interval', type=float, default=0.25, help="M0/M1 telemetry interval (s)")
+    args = parser.parse_args()
+
+    simulator = HVSimulator(voltage_noise=5.0, current_noise=0.05, time_constant=args.time_constant)
+    simulator.start()
+    controller = HVController(port=simulator.port, timeout=0.2)
+    try:
+        controller.connect()
+        controller.set_voltage(0.0)
+        controller.set_enable_state(True)
+        controller.start_voltage_monitor(interval=args.monitor_interval)
+        controller.start_current_monitor(interval=args.monitor_interval)
+        controller.start_status_monitor(interval=1.0)
+
+        print(f"{'slew V/s':>9}{'ramp':>14}{'expected s':>11}{'actual s':>10}{'error':>8}{'steps':>7}{'step p50 ms':>12}{'held s':>8}  state")
+        for slew in args.slew or [500.0, 1000.0, 2000.0]:
+            ramp = HVRamp(controller, slew_rate=slew, max_lag=args.max_lag)
+            for start, target in ((0.0, args.target), (args.target, 0.0)):
+                ramp.start(target, start_voltage=start)
+                ramp.wait()
+                expected = abs(target - start) / slew
+                step_p50 = ramp.step_time.summary()['p50_ms'] or 0.0
+                print(f"{slew:>9.0f}{f'{start:.0f}->{target:.0f}':>14}{expected:>11.2f}{ramp.duration:>10.2f}"
+                      f"{(ramp.duration - expected) / expected:>8.1%}{ramp.steps:>7d}{step_p50:>12.1f}{ramp.hold_time:>8.2f}  {ramp.state}")
+        print()
+        controller.print_telemetry_stats()
+    finally:
+        controller.close()
+        simulator.close()
+
+
+if __name__ == "__main__":
+    main()
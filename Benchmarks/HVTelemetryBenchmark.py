@@ -0,0 +1,61 @@
+"""
+HV telemetry scheduler benchmark against the simulated supply (GUI/HVSimulator.py).
+
+Run from the repository root:
+    python -m Benchmarks.HVTelemetryBenchmark --duration 10 --voltage-rate 10 --current-rate 10 --status-rate 2
+
+M0, M1 and SR are polled by the controller's telemetry scheduler while the main thread sends set_voltage
+like the GUI does. Reported: achieved sample rate and scheduling jitter per signal and the latency of the
+interleaved commands.
+"""
+import argparse
+import time
+
+from GUI.HVControl import HVController
+from GUI.HVSimulator import HVSimulator
+from GUI.Instrumentation import LatencyStats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HV telemetry scheduler benchmark on the simulated supply")
+    parser.add_argument('--duration', type=float, default=10.0, help="Benchmark time (s)")
+    parser.add_argument('--voltage-rate', type=float, default=10.0, help="M0 sample rate (Hz)")
+    parser.add_argument('--current-rate', type=float, default=10.0, help="M1 sample rate (Hz)")
+    parser.add_argument('--status-rate', type=float, default=2.0, help="SR sample rate (Hz)")
+    parser.add_argument('--command-interval', type=float, default=0.5, help="Time between set_voltage commands (s)")
+    parser.add_argument('--baudrate', type=int, default=9600)
+    parser.add_argument('--drop-rate', type=float, default=0.0, help="Probability of a missing reply")
+    parser.add_argument('--timeout', type=float, default=0.2, help="HVController read timeout (s)")
+    args = parser.parse_args()
+
+    simulator = HVSimulator(baudrate=args.baudrate, voltage_noise=5.0, current_noise=0.05, drop_rate=args.drop_rate)
+    simulator.start()
+    controller = HVController(port=simulator.port, baudrate=args.baudrate, timeout=args.timeout)
+    try:
+        controller.connect()
+        controller.set_enable_state(True)
+        controller.start_voltage_monitor(interval=1.0 / args.voltage_rate)
+        controller.start_current_monitor(interval=1.0 / args.current_rate)
+        controller.start_status_monitor(interval=1.0 / args.status_rate)
+
+        command_latency = LatencyStats()
+        volts = 0.0
+        end = time.perf_counter() + args.duration
+        while time.perf_counter() < end:
+            time.sleep(args.command_interval)
+            volts = 5000.0 if volts == 0.0 else 0.0
+            sent = time.perf_counter()
+            controller.set_voltage(volts)
+            command_latency.add(time.perf_counter() - sent)
+
+        print()
+        controller.print_telemetry_stats()
+        print(f"set_voltage round-trip: {command_latency}")
+        print(f"Simulator: {simulator.stats()}")
+    finally:
+        controller.close()
+        simulator.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Job queue crash benchmark: a queue of two recipes (GUI/JobQueue.py) on the virtual GRBL device
+(GUI/GRBLSimulator.py), with the application killed in the middle of the first job.
+
+Run from the repository root:
+    python -m Benchmarks.JobQueueBenchmark --crash-after 6 --policy resume --policy restart --policy skip --policy resume-twice
+
+The queue runs in a child process that is killed with SIGKILL (no cleanup, like a crash or power loss)
+--crash-after seconds after its first job started streaming. A new process then loads the queue file, recovers the interrupted
+job with the resume policy, homes and runs the rest. The 'reference' run has no crash. 'resume-twice' starts from a
+queue file left by an earlier crash 0.5 s before the end of the first phase (too short to resume, so the resumed
+recipe starts with the next phase), crashes again and resumes again: the checkpoint of the second crash has to be
+in the phase after the first one, not in the dropped one.
+Reported per policy: last checkpoint at the crash and its age, state and attempts of both jobs, pump 1 volume of the
+first job from its checkpoints against the reference (a resumed job repeats what ran after its last checkpoint, a
+restarted job counts the volume of both attempts),
+and the time from the crash until the new process streams again (connect, settings, homing).
+"""
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from GUI.GRBLSimulator import GRBLSimulator
+from GUI.GRBLSettings import PUMP_ML_PER_MM
+from GUI.JobQueue import Checkpoint, JobQueue, JobQueueRunner
+from GUI.PositioningControl import PositioningController
+
+RECIPES = {
+    'first': {
+        'stage_amplitude': 10.0,
+        'phases': [
+            {'name': "prime", 'duration': 2.0, 'pump_1': 20, 'pump_2': 20},
+            {'name': "deposition", 'duration': 6.0, 'pump_1': 10, 'pump_2': 5, 'stage_feedrate': 1200},
+            {'name': "purge", 'duration': 2.0, 'pump_1': 30},
+        ],
+    },
+    'second': {
+        'stage_amplitude': 10.0,
+        'phases': [
+            {'name': "deposition", 'duration': 4.0, 'pump_1': 5, 'pump_2': 10, 'stage_feedrate': 1200},
+        ],
+    },
+}
+
+
+def run_queue(port: str, queue_path: str, policy: str, home_first: bool, checkpoint_interval: float,
+              max_attempts: int = 2):
+    """Run all pending jobs like the application does, returns time.monotonic() the first job started streaming."""
+    controller = PositioningController(port=port, connect=False)
+    controller.stroke_sub_segments = 20
+    controller.connect()
+    first_start = []
+
+    def on_phase(job, recipe, index, phase):
+        if index == 0:
+            first_start.append(time.monotonic())
+            print(f"JOB STREAMING {job.id}", flush=True)  # The parent times the crash from this line
+
+    runner = JobQueueRunner(JobQueue(queue_path), controller, resume_policy=policy, max_attempts=max_attempts,
+                            home_first=home_first,
+                            checkpoint_interval=checkpoint_interval, make_safe=lambda: print("[GUI] Safe state"),
+                            on_phase=on_phase)
+    runner.start()
+    runner._thread.join()
+    controller.grbl_streamer.close()
+    return first_start[0] if first_start else None
+
+
+def run(policy: str, args, recipe_paths: list) -> dict:
+    directory = tempfile.mkdtemp()
+    queue_path = os.path.join(directory, "jobs.json")
+    job_queue = JobQueue(queue_path)
+    for path in recipe_paths:
+        job_queue.add(path)
+    max_attempts = 2
+    if policy == 'resume-twice':
+        # As left by a first crash: 0.5 s of the 2 s 'prime' phase to go
+        prime = RECIPES['first']['phases'][0]
+        volume = lambda flowrate: flowrate * 1.5 / 60 * PUMP_ML_PER_MM  # ml/h = mm/min of pump feed, for 1.5 s
+        job_queue.update(job_queue.jobs[0], state='running', attempts=1, started_at=time.time(),
+                         checkpoint=Checkpoint(phase=0, phase_elapsed=1.5, elapsed=1.5,
+                                               pump_1_volume=volume(prime['pump_1']),
+                                               pump_2_volume=volume(prime['pump_2']), saved_at=time.time()))
+        max_attempts = 3
+    simulator = GRBLSimulator(homing_time=0.5)
+    simulator.start()
+    try:
+        crash_age = crashed = checkpoint = None
+        if policy != 'reference':
+            child = subprocess.Popen([sys.executable, "-m", "Benchmarks.JobQueueBenchmark", "--child", simulator.port,
+                                      queue_path, str(args.checkpoint_interval), str(max_attempts)],
+                                     stdout=subprocess.PIPE, text=True)
+            for line in child.stdout:
+                if line.startswith("JOB STREAMING"):
+                    break
+            threading.Thread(target=child.stdout.read, daemon=True).start()  # Keep the pipe drained
+            time.sleep(args.crash_after)
+            child.send_signal(signal.SIGKILL)
+            child.wait()
+            crashed = time.monotonic()
+            checkpoint = JobQueue(queue_path).jobs[0].checkpoint
+            crash_age = time.time() - checkpoint.saved_at if checkpoint else None
+        first_start = run_queue(simulator.port, queue_path, policy if policy in ('restart', 'skip') else 'resume',
+                                home_first=True, checkpoint_interval=args.checkpoint_interval,
+                                max_attempts=max_attempts)
+        jobs = JobQueue(queue_path).jobs
+        return {
+            'policy': policy,
+            'crash_age': crash_age,
+            'checkpoint': f"phase {checkpoint.phase + 1} +{checkpoint.phase_elapsed:.1f} s" if checkpoint else "-",
+            'jobs': [(job.state, job.attempts) for job in jobs],
+            'volume': jobs[0].checkpoint.pump_1_volume if jobs[0].checkpoint else 0.0,
+            'recovery': first_start - crashed if crashed is not None and first_start is not None else None,
+        }
+    finally:
+        simulator.close()
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        port, queue_path, checkpoint_interval, max_attempts = sys.argv[2], sys.argv[3], float(sys.argv[4]), int(sys.argv[5])
+        run_queue(port, queue_path, 'resume', home_first=True, checkpoint_interval=checkpoint_interval,
+                  max_attempts=max_attempts)
+        return
+
+    parser = argparse.ArgumentParser(description="Job queue crash and resume on the virtual GRBL device")
+    parser.add_argument('--crash-after', type=float, default=6.0, help="Kill the application this long into job 1 (s)")
+    parser.add_argument('--checkpoint-interval', type=float, default=2.0, help="Checkpoint interval (s)")
+    parser.add_argument('--policy', action='append',
+                        help="Resume policies, default resume, restart, skip and resume-twice")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    recipe_paths = []
+    for name, recipe in RECIPES.items():
+        path = os.path.join(directory, f"{name}.json")
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(recipe, file)
+        recipe_paths.append(path)
+
+    results = []
+    for policy in ['reference'] + (args.policy or ['resume', 'restart', 'skip', 'resume-twice']):
+        print(f"--- {policy} ---")
+        results.append(run(policy, args, recipe_paths))
+
+    print()
+    print(f"{'policy':<13}{'checkpoint':>16}{'age s':>7}{'job 1':>14}{'job 2':>14}{'job 1 pump 1 ml':>16}{'recovery s':>11}")
+    for r in results:
+        age = f"{r['crash_age']:.1f}" if r['crash_age'] is not None else "-"
+        recovery = f"{r['recovery']:.1f}" if r['recovery'] is not None else "-"
+        jobs = [f"{state} x{attempts}" for state, attempts in r['jobs']]
+        print(f"{r['policy']:<13}{r['checkpoint']:>16}{age:>7}{jobs[0]:>14}{jobs[1]:>14}{r['volume']:>16.4f}{recovery:>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Live plot decimation benchmark (GUI/MinMaxHistory.py).
+
+Run from the repository root:
+    python -m Benchmarks.LivePlotBenchmark --hours 8 --rate 20 --bins 2048
+
+Feeds a simulated run of --hours at --rate samples per second into a MinMaxHistory (synthetic timestamps, so it
+runs in seconds). Reported at every checkpoint: samples so far, bin width, points per frame, envelope time
+(what a blitted frame has to copy) and memory, all of which should stay flat while the sample count grows.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from GUI.Instrumentation import LatencyStats
+from GUI.MinMaxHistory import MinMaxHistory
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Min / max decimation benchmark for the live plot")
+    parser.add_argument('--hours', type=float, default=8.0, help="Simulated run length (h)")
+    parser.add_argument('--rate', type=float, default=20.0, help="Samples per second")
+    parser.add_argument('--bins', type=int, default=2048, help="Bins per trace")
+    parser.add_argument('--checkpoints', type=int, default=8, help="Number of report lines")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    history = MinMaxHistory(bins=args.bins)
+    history.clear(0.0)
+    samples = int(args.hours * 3600 * args.rate)
+    timestamps = np.arange(samples) / args.rate
+    values = 5000.0 + rng.normal(0.0, 5.0, samples)
+    values[rng.integers(0, samples, 20)] += 3000.0  # Spikes that must survive decimation
+    checkpoints = set(np.linspace(0, samples, args.checkpoints + 1, dtype=int)[1:])
+    append_time = LatencyStats()
+
+    print(f"{'hours':>7}{'samples':>12}{'bin s':>9}{'points':>8}{'append us':>11}{'envelope ms':>13}{'KiB':>6}{'max V':>9}")
+    chunk_started = time.perf_counter()
+    for i, (t, v) in enumerate(zip(timestamps.tolist(), values.tolist()), start=1):
+        history.append(v, t)
+        if i % 1000 == 0:
+            append_time.add((time.perf_counter() - chunk_started) / 1000)
+            chunk_started = time.perf_counter()
+        if i in checkpoints:
+            frame = LatencyStats()
+            for _ in range(20):
+                started = time.perf_counter()
+                t_env, y_env = history.envelope()
+                frame.add(time.perf_counter() - started)
+            print(f"{t / 3600:>7.2f}{history.total:>12,}{history.bin_width:>9.2f}{t_env.size:>8}"
+                  f"{append_time.summary()['p50_ms'] * 1000:>11.2f}{frame.summary()['p50_ms']:>13.3f}"
+                  f"{history.nbytes / 1024:>6.0f}{np.nanmax(y_env):>9.0f}")
+            chunk_started = time.perf_counter()
+    print(f"Spike maximum kept: {np.isclose(history.value_range()[1], values.max(), rtol=1e-6)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,9 +3,12 @@ import sys
 import time
 import traceback
 
+_LAUNCHED = time.perf_counter()  # Before the Qt / matplotlib imports, for the startup timing
+
 import logging
 logger = logging.getLogger(__name__)
 
+from PySide6 import QtCore
 from PySide6 import QtGui
 from PySide6 import QtWidgets
 
@@ -15,12 +18,29 @@ from GUI.mainwindow import Ui_MainWindow
 from GUI.GPIOControl import GPIOController
 from GUI.HVControl import HVController
 from GUI.PositioningControl import PositioningController
+from GUI.UIUpdateBridge import UIUpdateBridge
+from GUI.LivePlot import LivePlotPanel
+from GUI.CommandExecutor import CommandExecutor
+from GUI.EventLoopMonitor import EventLoopMonitor
 
 from GUI.LEDControlBhv import LEDControlBhv
 from GUI.HVControlBhv import HVControlBhv
 from GUI.PositioningControlBhv import PositioningControlBhv
 
 
+class FirstPaintFilter(QtCore.QObject):
+    """Calls callback once, on the first paint event of the watched widget."""
+    def __init__(self, callback, parent: QtCore.QObject = None):
+        super().__init__(parent)
+        self.callback = callback
+
+    def eventFilter(self, watched, event):
+        if event.type() == QtCore.QEvent.Type.Paint and self.callback is not None:
+            callback, self.callback = self.callback, None
+            callback()
+        return False
+
+
 class ElSpinApplication:
     def __init__(self):
         self.app = QtWidgets.QApplication(sys.argv)
@@ -31,16 +51,28 @@ class ElSpinApplication:
         self.ui.setupUi(self.MainWindow)
         self.MainWindow.setWindowTitle("ElSpin Control")
         self.ui.log_box_groupBox.setVisible(False)
+        self.ui.log_box_textBrowser.setVisible(False)
         self.set_icons()
 
         self.gpio_controller: GPIOController = None
         self.hv_controller: HVController = None
         self.positioning_controller: PositioningController = None
+        self.ui_bridge: UIUpdateBridge = None
+        self.ui_stats_label: QtWidgets.QLabel = None
+        self.ui_stats_timer: QtCore.QTimer = None
+        self.live_plot: LivePlotPanel = None
+        self.executor: CommandExecutor = None
+        self.event_loop_monitor: EventLoopMonitor = None
 
         self.led_control_bhv: LEDControlBhv = None
         self.hv_control_bhv: HVControlBhv = None
         self.positioning_control_bhv: PositioningControlBhv = None
 
+        # Device bring-up, name -> "starting", "ready" or "failed"
+        self.device_state = {}
+        self.startup_times = {}  # Seconds since launch
+        self.first_paint_filter: FirstPaintFilter = None
+
         self.init()
         self.connections()
 
@@ -54,22 +86,121 @@ class ElSpinApplication:
             QtGui.QIcon(os.path.join(icon_folder, "spider-web.png")))
 
     def init(self):
-        self.gpio_controller = GPIOController()
-        self.hv_controller = HVController(port=get_config_parser().get("HVControl", "COMPort"))
-        self.positioning_controller = PositioningController()
-
-        self.led_control_bhv = LEDControlBhv(self.ui, self.gpio_controller)
-        self.hv_control_bhv = HVControlBhv(self.ui, self.hv_controller, self.gpio_controller)
-        self.positioning_control_bhv = PositioningControlBhv(self.ui, self.positioning_controller, self.gpio_controller)
+        config = get_config_parser()
+        self.ui_bridge = UIUpdateBridge(frame_rate=config.getfloat("GUI", "FrameRate", fallback=30.0),
+                                        parent=self.MainWindow)
+        self.executor = CommandExecutor(self.ui_bridge, max_workers=config.getint("GUI", "HardwareWorkers", fallback=4))
+        self.event_loop_monitor = EventLoopMonitor(stall_threshold=config.getfloat("GUI", "StallThreshold", fallback=0.1),
+                                                   parent=self.MainWindow)
+        self.ui_stats_label = QtWidgets.QLabel(self.ui_stats_text())
+        self.ui.statusbar.addPermanentWidget(self.ui_stats_label)
+        self.ui_stats_timer = QtCore.QTimer(self.MainWindow)
+        self.ui_stats_timer.timeout.connect(lambda: self.ui_stats_label.setText(self.ui_stats_text()))
+        self.ui_stats_timer.start(1000)
+
+        self.init_live_plot()
+        self.start_devices()
+
+    def start_devices(self):
+        """
+        Bring up GPIO, HV and GRBL in parallel on their executor lanes, the window shows meanwhile.
+        A group box is enabled once every device it needs is ready.
+        """
+        for group_box in (self.ui.LED_groupBox, self.ui.HV_groupBox, self.ui.positioning_groupBox):
+            group_box.setEnabled(False)
+        hv_port = get_config_parser().get("HVControl", "COMPort")
+        devices = (
+            ("gpio", GPIOController),
+            ("hv", lambda: HVController(port=hv_port)),
+            ("grbl", PositioningController),
+        )
+        for name, factory in devices:
+            self.device_state[name] = "starting"
+            started = time.perf_counter()
+            future = self.executor.submit(name, factory)
+            future.add_done_callback(
+                lambda f, name=name, started=started: self.ui_bridge.call(self._on_device_started, name, f, started))
+
+    def _on_device_started(self, name: str, future, started: float):
+        took = time.perf_counter() - started
+        self.startup_times[name] = time.perf_counter() - _LAUNCHED
+        error = future.exception()
+        if error is not None:
+            self.device_state[name] = "failed"
+            print(f"[GUI] Startup: {name} failed after {took:.2f} s: {error}")
+        else:
+            self.device_state[name] = "ready"
+            print(f"[GUI] Startup: {name} ready after {took:.2f} s ({self.startup_times[name]:.2f} s since launch)")
+            if name == "gpio":
+                self.gpio_controller = future.result()
+            elif name == "hv":
+                self.hv_controller = future.result()
+                if self.live_plot:
+                    self.hv_controller.add_sample_listener(self.live_plot.on_hv_sample)
+            elif name == "grbl":
+                self.positioning_controller = future.result()
+                if self.live_plot:
+                    self.positioning_controller.grbl_streamer.add_status_listener(self.live_plot.on_grbl_status)
+        self._init_ready_behaviours()
+
+        if "starting" not in self.device_state.values():
+            self.startup_times["devices"] = time.perf_counter() - _LAUNCHED
+            failed = [name for name, state in self.device_state.items() if state == "failed"]
+            print(f"[GUI] Startup: all devices done {self.startup_times['devices']:.2f} s after launch"
+                  + (f", failed: {', '.join(failed)}" if failed else ""))
+
+    def _init_ready_behaviours(self):
+        """Create the behaviour of every group box whose devices are ready, on the GUI thread."""
+        ready = {name for name, state in self.device_state.items() if state == "ready"}
+        if self.led_control_bhv is None and {"gpio"} <= ready:
+            self.led_control_bhv = LEDControlBhv(self.ui, self.gpio_controller)
+            self.ui.LED_groupBox.setEnabled(True)
+        if self.hv_control_bhv is None and {"gpio", "hv"} <= ready:
+            self.hv_control_bhv = HVControlBhv(self.ui, self.hv_controller, self.gpio_controller, self.ui_bridge,
+                                               self.executor)
+            self.ui.HV_groupBox.setEnabled(True)
+        if self.positioning_control_bhv is None and {"gpio", "grbl"} <= ready:
+            self.positioning_control_bhv = PositioningControlBhv(self.ui, self.positioning_controller,
+                                                                 self.gpio_controller, self.ui_bridge, self.executor)
+            self.ui.positioning_groupBox.setEnabled(True)
+        if self.positioning_control_bhv is not None and self.hv_control_bhv is not None:
+            self.positioning_control_bhv.hv_ramp = self.hv_control_bhv.hv_ramp  # Recipe phases set the HV
+
+    def _on_first_paint(self):
+        self.startup_times["first_paint"] = time.perf_counter() - _LAUNCHED
+        print(f"[GUI] Startup: first paint {self.startup_times['first_paint']:.2f} s after launch")
+
+    def ui_stats_text(self) -> str:
+        return f"{self.ui_bridge} | {self.event_loop_monitor}"
+
+    def init_live_plot(self):
+        """HV voltage / current and stage Z plot in the log box area of the splitter."""
+        config = get_config_parser()
+        if not config.getboolean("GUI", "LivePlot", fallback=True):
+            return
+        self.live_plot = LivePlotPanel(frame_rate=config.getfloat("GUI", "PlotFrameRate", fallback=5.0),
+                                       bins=config.getint("GUI", "PlotBins", fallback=2048))
+        self.ui.log_box_groupBox.setTitle("Live Plot")
+        self.ui.verticalLayout_2.addWidget(self.live_plot.canvas)
+        self.ui.log_box_groupBox.setVisible(True)
+        # Listeners are added in _on_device_started
 
     def connections(self):
         pass
 
     def show(self):
+        self.first_paint_filter = FirstPaintFilter(self._on_first_paint, parent=self.MainWindow)
+        self.MainWindow.installEventFilter(self.first_paint_filter)
         self.MainWindow.showMaximized()
 
         self.retval = self.app.exec()
         print(f"Event loop exited. RetVal: {self.retval}")
+        print(f"[GUI] {self.ui_bridge}, {self.ui_bridge.frames:,} frames, flush {self.ui_bridge.flush_time}")
+        if self.live_plot:
+            print(f"[GUI] Live plot: {self.live_plot.stats()}")
+        print(f"[GUI] {self.event_loop_monitor}, lateness {self.event_loop_monitor.lateness}")
+        print(f"[GUI] {self.executor}")
+        self.executor.shutdown(wait=False)
         sys.exit(self.retval)
 
     def close(self):
@@ -93,8 +224,10 @@ if __name__ == "__main__":
     except Exception as ex:
         logger.error(ex)
     finally:
-        elspin_ui.hv_controller.close()
+        if elspin_ui.hv_controller:
+            elspin_ui.hv_controller.close()
         time.sleep(0.5)
-        elspin_ui.gpio_controller.finalize()
+        if elspin_ui.gpio_controller:
+            elspin_ui.gpio_controller.finalize()
 
     elspin_ui.close()
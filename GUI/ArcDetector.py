@@ -0,0 +1,147 @@
+from dataclasses import dataclass
+import threading
+import time
+
+import numpy as np
+
+from GUI.Instrumentation import LatencyStats
+from GUI.SignalBuffer import SignalBuffer
+
+
+@dataclass(frozen=True)
+class ArcEvent:
+    reason: str  # 'over_current', 'current_jump', 'current_slope', 'voltage_collapse' or 'status'
+    signal: str  # Monitor name that triggered, 'current', 'voltage' or 'status'
+    value: object
+    sample_time: float  # time.monotonic() of the triggering reading
+    detected_at: float  # time.perf_counter() when the rule fired
+    gpio_latency: float  # Seconds from detection until enable_HV(False) returned
+
+    def __str__(self):
+        return f"{self.reason} on {self.signal} ({self.value}), HV enable dropped in {self.gpio_latency * 1000:.3f} ms"
+
+
+class ArcDetector:
+    """
+    Streaming arc / over-current detector on the HV telemetry.
+
+    Attached to an HVController it sees every M0 / M1 / SR reading on the telemetry scheduler thread and drops
+    the HV enable GPIO directly (no GUI thread involved) when one of the rules fires:
+    - over_current: current above max_current (uA)
+    - current_jump: current more than current_sigma standard deviations and at least min_current_jump uA above
+      the rolling mean of the last baseline_samples readings
+    - current_slope: dI/dt above max_current_slope (uA/s)
+    - voltage_collapse: dV/dt below -max_voltage_drop_rate (V/s) while the current is above its baseline,
+      a setpoint ramp down lowers voltage and current together and is not an arc
+    - status: Fault, Over Current or Over Voltage bit in SR
+
+    The detector latches, HV stays disabled until reset().
+    Detection speed is bounded by the M1 / M0 sampling interval of the telemetry scheduler.
+    """
+    def __init__(self, gpio_controller, max_current: float = 50.0, current_sigma: float = 6.0,
+                 min_current_jump: float = 2.0, max_current_slope: float = 200.0,
+                 max_voltage_drop_rate: float = 5000.0, baseline_samples: int = 20, on_trip=None):
+        self.gpio_controller = gpio_controller
+        self.max_current = max_current
+        self.current_sigma = current_sigma
+        self.min_current_jump = min_current_jump
+        self.max_current_slope = max_current_slope
+        self.max_voltage_drop_rate = max_voltage_drop_rate
+        self.baseline_samples = baseline_samples
+        self.on_trip = on_trip  # Called with the ArcEvent on the telemetry thread
+
+        self.hv_controller = None
+        self._current = SignalBuffer(baseline_samples + 1)
+        self._voltage = SignalBuffer(2)
+        self._trip_lock = threading.Lock()
+
+        self.tripped = False
+        self.events = []
+        self.gpio_latency = LatencyStats()
+        self.evaluation_time = LatencyStats()  # Time spent in the rules per reading
+
+    def attach(self, hv_controller):
+        self.hv_controller = hv_controller
+        hv_controller.add_sample_listener(self.on_sample)
+
+    def detach(self):
+        if self.hv_controller is not None:
+            self.hv_controller.remove_sample_listener(self.on_sample)
+            self.hv_controller = None
+
+    def reset(self):
+        """Re-arm after a trip, the baseline starts over. Does not re-enable HV."""
+        with self._trip_lock:
+            self.tripped = False
+            self._current.clear()
+            self._voltage.clear()
+
+    def on_sample(self, name: str, timestamp: float, value):
+        if self.tripped:
+            return
+        started = time.perf_counter()
+        if name == 'current':
+            self._check_current(timestamp, value)
+        elif name == 'voltage':
+            self._check_voltage(timestamp, value)
+        elif name == 'status':
+            self._check_status(timestamp, value)
+        self.evaluation_time.add(time.perf_counter() - started)
+
+    def _check_current(self, timestamp: float, current: float):
+        if current > self.max_current:
+            self.trip('over_current', 'current', current, timestamp)
+            return
+
+        _, baseline = self._current.last()
+        previous = self._current.latest()
+        if previous is not None and timestamp > previous[0]:
+            slope = (current - previous[1]) / (timestamp - previous[0])
+            if slope > self.max_current_slope:
+                self.trip('current_slope', 'current', current, timestamp)
+                return
+        if baseline.size >= self.baseline_samples:
+            mean = float(baseline.mean(dtype=np.float64))
+            std = float(baseline.std(dtype=np.float64))
+            if current - mean > max(self.current_sigma * std, self.min_current_jump):
+                self.trip('current_jump', 'current', current, timestamp)
+                return
+
+        self._current.append(current, timestamp)
+
+    def _current_above_baseline(self) -> bool:
+        _, baseline = self._current.last()
+        if baseline.size < 2:
+            return False
+        return float(baseline[-1]) - float(baseline[:-1].mean(dtype=np.float64)) > self.min_current_jump / 2
+
+    def _check_voltage(self, timestamp: float, voltage: float):
+        previous = self._voltage.latest()
+        self._voltage.append(voltage, timestamp)
+        if previous is None or timestamp <= previous[0]:
+            return
+        rate = (voltage - previous[1]) / (timestamp - previous[0])
+        if rate < -self.max_voltage_drop_rate and self._current_above_baseline():
+            self.trip('voltage_collapse', 'voltage', voltage, timestamp)
+
+    def _check_status(self, timestamp: float, status: dict):
+        for bit in ("Fault", "Over Current", "Over Voltage"):
+            if status.get(bit) == "1":
+                self.trip('status', 'status', bit, timestamp)
+                return
+
+    def trip(self, reason: str, signal: str, value, sample_time: float):
+        """Drop the HV enable GPIO and record the event. Safe to call from any thread."""
+        with self._trip_lock:
+            if self.tripped:
+                return
+            self.tripped = True
+            detected_at = time.perf_counter()
+            self.gpio_controller.enable_HV(False)
+            latency = time.perf_counter() - detected_at
+        self.gpio_latency.add(latency)
+        event = ArcEvent(reason, signal, value, sample_time, detected_at, latency)
+        self.events.append(event)
+        print(f"[HV] Arc detector tripped: {event}")
+        if self.on_trip:
+            self.on_trip(event)
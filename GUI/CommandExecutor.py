@@ -0,0 +1,136 @@
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+import threading
+import time
+
+from GUI.Instrumentation import LatencyStats
+from GUI.UIUpdateBridge import UIUpdateBridge
+
+
+class CommandExecutor:
+    """
+    Runs blocking hardware actions (serial I/O, homing, moves) on a worker pool instead of the GUI thread.
+
+    Actions submitted for the same device run one after the other in submission order, different devices run in
+    parallel. device=None skips the serialisation, for actions that must not wait behind a long running one
+    (e.g. stopping the stage while a move to the start position is still running).
+    run() additionally disables widgets while the action is in flight and restores them and calls on_done on the
+    GUI thread through the UIUpdateBridge when it completes.
+    """
+    def __init__(self, ui_bridge: UIUpdateBridge, max_workers: int = 4):
+        self.ui_bridge = ui_bridge
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hardware")
+        self._lock = threading.Lock()
+        self._lanes = {}  # device -> deque of tasks waiting for the running one
+        self._busy = set()  # Devices with a task running
+
+        # Instrumentation
+        self.queue_latency = LatencyStats()  # submit -> start
+        self.run_time = LatencyStats()
+        self.failed = 0
+
+    def submit(self, device: str | None, func, *args, **kwargs) -> Future:
+        """Thread safe, returns a Future with the result of func(*args, **kwargs)."""
+        future = Future()
+        task = (future, func, args, kwargs, time.perf_counter())
+        if device is not None:
+            with self._lock:
+                if device in self._busy:
+                    self._lanes.setdefault(device, deque()).append(task)
+                    return future
+                self._busy.add(device)
+        self._pool.submit(self._run_lane, device, task)
+        return future
+
+    def run(self, device: str | None, func, *args, widgets=(), on_done=None, on_error=None,
+            description: str = None) -> Future:
+        """
+        submit() from the GUI thread: widgets are disabled until the action finished, then on_done(result) or,
+        after the exception was printed, on_error(exception) is called on the GUI thread.
+        """
+        description = description or getattr(func, '__name__', 'action')
+        enabled = [(widget, widget.isEnabled()) for widget in widgets]
+        for widget, _ in enabled:
+            widget.setEnabled(False)
+        future = self.submit(device, func, *args)
+        future.add_done_callback(
+            lambda f: self.ui_bridge.call(self._finish, f, enabled, on_done, on_error, description))
+        return future
+
+    def cancel_pending(self, device: str) -> int:
+        """Cancel the actions still waiting for device, the running one is not interrupted."""
+        with self._lock:
+            lane = self._lanes.pop(device, deque())
+        for future, *_ in lane:
+            future.cancel()
+        return len(lane)
+
+    def shutdown(self, wait: bool = True):
+        for device in list(self._lanes):
+            self.cancel_pending(device)
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+    def _run_lane(self, device: str | None, task):
+        while task is not None:
+            future, func, args, kwargs, submitted = task
+            if future.set_running_or_notify_cancel():
+                started = time.perf_counter()
+                self.queue_latency.add(started - submitted)
+                try:
+                    result = func(*args, **kwargs)
+                except BaseException as e:
+                    self.failed += 1
+                    future.set_exception(e)
+                else:
+                    future.set_result(result)
+                self.run_time.add(time.perf_counter() - started)
+            if device is None:
+                return
+            with self._lock:
+                lane = self._lanes.get(device)
+                if lane:
+                    task = lane.popleft()
+                else:
+                    self._lanes.pop(device, None)
+                    self._busy.discard(device)
+                    task = None
+
+    def _finish(self, future: Future, enabled, on_done, on_error, description: str):
+        for widget, was_enabled in enabled:
+            widget.setEnabled(was_enabled)
+        if future.cancelled():
+            print(f"[GUI] {description} cancelled")
+            if on_error:
+                on_error(None)
+            return
+        error = future.exception()
+        if error is not None:
+            print(f"[GUI] {description} failed: {error}")
+            if on_error:
+                on_error(error)
+        elif on_done:
+            on_done(future.result())
+
+    def __str__(self):
+        return f"Hardware actions: {self.run_time.summary()['count']}, failed {self.failed}, queued {self.queue_latency}"
+
+
+if __name__ == "__main__":
+    class _DirectBridge:
+        def call(self, func, *args):
+            func(*args)
+
+    executor = CommandExecutor(_DirectBridge(), max_workers=4)
+    order = []
+
+    def action(device, i, duration):
+        time.sleep(duration)
+        order.append((device, i))
+        return i
+
+    started = time.perf_counter()
+    futures = [executor.submit(device, action, device, i, 0.1) for i in range(3) for device in ("grbl", "hv")]
+    print([f.result() for f in futures], f"in {time.perf_counter() - started:.2f} s (3 x 0.1 s per device, in parallel)")
+    print(order)
+    executor.shutdown()
+    print(executor)
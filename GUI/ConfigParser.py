@@ -18,6 +18,11 @@ def get_config_parser():
 
     return config_parser
 
+def get_config_path(section, key, fallback):
+    """Path setting, a relative path is taken relative to the config file's directory, not the working directory."""
+    path = get_config_parser().get(section, key, fallback=fallback)
+    return os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', path))
+
 def edit_config_file(section, key, value):
     ini_file_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', "ConfigFileLocal.ini")
 
@@ -0,0 +1,46 @@
+import time
+
+from PySide6.QtCore import QObject, QTimer, Qt
+
+from GUI.Instrumentation import LatencyStats
+
+
+class EventLoopMonitor:
+    """
+    Measures how long the GUI thread is blocked.
+
+    A precise QTimer fires every interval seconds on the GUI thread, the delay beyond the interval is the time the
+    event loop was busy with something else. Every delay above stall_threshold counts as a stall.
+    """
+    def __init__(self, interval: float = 0.05, stall_threshold: float = 0.1, parent: QObject = None):
+        self.interval = interval  # s
+        self.stall_threshold = stall_threshold  # s
+
+        # Instrumentation
+        self.lateness = LatencyStats()
+        self.stalls = 0
+        self.worst = 0.0
+
+        self._last = time.perf_counter()
+        self._timer = QTimer(parent)
+        self._timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self._timer.timeout.connect(self._tick)
+        self._timer.start(max(1, round(interval * 1000)))
+
+    def _tick(self):
+        now = time.perf_counter()
+        late = max(0.0, now - self._last - self.interval)
+        self._last = now
+        self.lateness.add(late)
+        if late > self.stall_threshold:
+            self.stalls += 1
+            self.worst = max(self.worst, late)
+            print(f"[GUI] Event loop stalled for {late * 1000:.0f} ms")
+
+    def reset(self):
+        self.lateness.reset()
+        self.stalls = 0
+        self.worst = 0.0
+
+    def __str__(self):
+        return f"GUI stalls > {self.stall_threshold * 1000:.0f} ms: {self.stalls} (worst {self.worst * 1000:.0f} ms)"
@@ -0,0 +1,119 @@
+import math
+
+import numpy as np
+
+
+class GCodeEncoder:
+    """
+    Turns absolute trajectory positions into relative (G91) G-code lines, one per segment.
+
+    compact=True writes as few bytes as GRBL needs, each line takes less of the 64 byte RX window:
+    - modal words: G91 and G1 only on the first line after reset(), F only when it changes, no spaces
+    - axes that do not move in a segment are left out
+    - numbers without trailing zeros and without leading zero (X.25, Z-.005)
+    With steps_per_mm ($100-$102) every position is rounded to a whole motor step and written with just enough
+    decimals for GRBL to land on that step. Rounding is done on the absolute position, so the residue of one
+    segment is carried into the next and the pump volumes never drift.
+    compact=False writes the full 'G1 X.. Y.. Z.. F..' lines with decimals decimals (the old format).
+    """
+    def __init__(self, steps_per_mm: dict = None, compact: bool = True, decimals: int = 3, feed_decimals: int = 1):
+        """
+        :param steps_per_mm: {'X': 427, ...}, None keeps positions on the 10^-decimals mm grid
+        :param compact: Modal, shortest lines, otherwise the full fixed point format
+        :param decimals: Decimals of every coordinate without steps_per_mm and of every number with compact=False
+        :param feed_decimals: Decimals of F with compact=True
+        """
+        self.steps_per_mm = {axis.upper(): float(value) for axis, value in (steps_per_mm or {}).items()}
+        self.compact = compact
+        self.decimals = decimals
+        self.feed_decimals = feed_decimals if compact else decimals
+        self.reset()
+
+    def reset(self):
+        """Forget the modal state, the next line carries G91, G1 and F again (after a GRBL reset or a regeneration)."""
+        self._feedrate = None
+
+    def axis_decimals(self, axis: str) -> int:
+        """Fewest decimals that still address every step: 10^-d * steps_per_mm < 1."""
+        steps = self.steps_per_mm.get(axis)
+        if steps is None or not self.compact:
+            return self.decimals
+        return max(0, math.floor(math.log10(steps)) + 1)
+
+    def quantize(self, axis: str, positions: np.ndarray) -> np.ndarray:
+        """Absolute positions (mm) as written, integers in units of 10^-axis_decimals(axis) mm."""
+        scale = 10 ** self.axis_decimals(axis)
+        positions = np.asarray(positions, dtype=float)
+        steps = self.steps_per_mm.get(axis)
+        if steps is not None:
+            positions = np.rint(positions * steps) / steps
+        return np.rint(positions * scale).astype(np.int64)
+
+    def written_position(self, axis: str, position: float) -> float:
+        """Absolute position (mm) GRBL is commanded to for the trajectory position (mm)."""
+        return float(self.quantize(axis, [position])[0]) / 10 ** self.axis_decimals(axis)
+
+    def encode(self, positions: dict, feedrate: float = None, segment_time: float = None) -> list[str]:
+        """
+        G-code lines of the segments between consecutive absolute positions ({axis: array of N + 1 positions (mm)}).
+        Either all segments run at feedrate (mm/min), or every segment takes segment_time (s) and gets the feedrate of
+        its written length, a segment where nothing moves then becomes a dwell.
+        """
+        axes = list(positions)
+        decimals = [self.axis_decimals(axis) for axis in axes]
+        increments = [np.diff(self.quantize(axis, positions[axis])) for axis in axes]
+        if segment_time is not None:
+            lengths = np.sqrt(sum((column / 10 ** d) ** 2 for column, d in zip(increments, decimals)))
+            feedrates = (lengths / (segment_time / 60)).tolist()
+        else:
+            feedrates = [feedrate] * len(increments[0])
+        columns = [column.tolist() for column in increments]
+        line = self._compact_line if self.compact else self._full_line
+        lines = []
+        for values, segment_feedrate in zip(zip(*columns), feedrates):
+            if segment_time is not None and segment_feedrate == 0:
+                lines.append(self.dwell(segment_time))  # Nothing moves, keep the timing
+            else:
+                lines.append(line(axes, decimals, values, segment_feedrate))
+        return lines
+
+    def _full_line(self, axes, decimals, values, feedrate) -> str:
+        words = [f"{axis}{value / 10 ** d:.{d}f}" for axis, d, value in zip(axes, decimals, values)]
+        return f"G1 {' '.join(words)} F{feedrate:.{self.decimals}f}"
+
+    def _compact_line(self, axes, decimals, values, feedrate) -> str:
+        words = ["G91G1"] if self._feedrate is None else []
+        for axis, d, value in zip(axes, decimals, values):
+            if value:
+                words.append(axis + _format_fixed(value, d))
+        if len(words) == (1 if self._feedrate is None else 0):
+            # Nothing moves by a whole step, a zero move keeps one line per segment without a planner block
+            words.append(axes[0] + "0")
+        feedrate = max(round(feedrate, self.feed_decimals), 10 ** -self.feed_decimals)
+        if feedrate != self._feedrate:
+            words.append("F" + _format_fixed(round(feedrate * 10 ** self.feed_decimals), self.feed_decimals))
+            self._feedrate = feedrate
+        return "".join(words)
+
+    def dwell(self, seconds: float) -> str:
+        """G4 line that waits seconds (GRBL first finishes the planned motion)."""
+        if self.compact:
+            return "G4P" + _format_fixed(round(seconds * 1000), 3)
+        return f"G4 P{seconds:.3f}"
+
+
+def _format_fixed(units: int, decimals: int) -> str:
+    """Integer units of 10^-decimals as the shortest decimal: 1500, 3 -> '1.5', -5, 3 -> '-.005'."""
+    whole, fraction = divmod(abs(units), 10 ** decimals)
+    fraction = f"{fraction:0{decimals}d}".rstrip("0") if decimals else ""
+    text = (str(whole) if whole or not fraction else "") + ("." + fraction if fraction else "")
+    return "-" + text if units < 0 else text
+
+
+if __name__ == "__main__":
+    t = np.arange(6) * 0.0123
+    positions = {'X': t * 0.2, 'Y': t * 0.1, 'Z': -t * 10}
+    for compact in (False, True):
+        encoder = GCodeEncoder(steps_per_mm={'X': 427, 'Y': 427, 'Z': 200}, compact=compact)
+        lines = encoder.encode(positions, segment_time=0.0123)
+        print(f"compact={compact}: {sum(len(line) + 1 for line in lines) / len(lines):.1f} B/line", lines)
@@ -1,3 +1,8 @@
+from dataclasses import dataclass, field
+import re
+import threading
+import time
+
 OPERATING_SETTINGS = {
     '0':10,  # (step pulse, usec)
     '1':25,  # (step idle delay, msec)
@@ -7,7 +12,7 @@ OPERATING_SETTINGS = {
     '5':0,  # (limit pins invert, bool)
     '6':0,  # (probe pin invert, bool)
     
-    '10':19,  # status report mask (status, position, hard limits)
+    '10':19,  # status report mask: MPos (1) + buffer state 'Bf:' (2) + limit pins (16)
     '11':0.010,  # (junction deviation, mm)
     '12':0.002,  # (arc tolerance, mm)
     '13':0,  # (report inches, bool)
@@ -53,7 +58,7 @@ HOMING_SETTINGS = {
     '5':0,  # (limit pins invert, bool)
     '6':0,  # (probe pin invert, bool)
     
-    '10':19,  # status report mask (status, position, hard limits)
+    '10':19,  # status report mask: MPos (1) + buffer state 'Bf:' (2) + limit pins (16)
     '11':0.010,  # (junction deviation, mm)
     '12':0.002,  # (arc tolerance, mm)
     '13':0,  # (report inches, bool)
@@ -83,3 +88,169 @@ HOMING_SETTINGS = {
     '131':200,  # (y max travel, mm)
     '132':200,  # (z max travel, mm)
 }
+
+
+# $10 bit that adds 'Bf:' (planner blocks and RX bytes free) to the status reports
+STATUS_REPORT_BUFFER = 2
+
+# Pump volume per mm of X / Y travel with the operating steps/mm, V = Distance / 60
+PUMP_ML_PER_MM = 1 / 60
+
+# GRBL 1.1 '$$' settings and how their values are typed, anything else is kept as float
+BOOL_SETTINGS = frozenset({4, 5, 6, 13, 20, 21, 22, 32})
+INT_SETTINGS = frozenset({0, 1, 2, 3, 10, 23, 26, 30, 31})
+
+_SETTING_RE = re.compile(r"^\$(\d+)=([-+]?[\d.]+)")
+
+
+def setting_value(number: int | str, value) -> int | float | bool:
+    """Type a setting value like GRBL stores it."""
+    number = int(number)
+    if number in BOOL_SETTINGS:
+        return bool(int(float(value)))
+    if number in INT_SETTINGS:
+        return int(float(value))
+    return round(float(value), 3)  # GRBL reports floats with 3 decimals
+
+
+@dataclass(frozen=True)
+class GRBLSettingsSnapshot:
+    """Typed, immutable copy of GRBL's EEPROM settings, keyed by setting number."""
+    values: dict  # int -> int | float | bool
+    timestamp: float = field(default_factory=time.monotonic)  # When it was read (or last updated)
+
+    @classmethod
+    def parse(cls, response: str) -> "GRBLSettingsSnapshot":
+        """Parse a '$$' response, ignores 'ok' and everything else that is not a '$n=value' line."""
+        values = {}
+        for line in response.splitlines():
+            match = _SETTING_RE.match(line.strip())
+            if match:
+                values[int(match.group(1))] = setting_value(match.group(1), match.group(2))
+        if not values:
+            raise ValueError(f"No settings in '$$' response: {response!r}")
+        return cls(values)
+
+    def __getitem__(self, number: int | str):
+        return self.values[int(number)]
+
+    def get(self, number: int | str, default=None):
+        return self.values.get(int(number), default)
+
+    def diff(self, desired: dict) -> dict:
+        """Settings of desired ({number: value}) that differ from the snapshot, as {int number: typed value}."""
+        changes = {}
+        for number, value in desired.items():
+            typed = setting_value(number, value)
+            if self.values.get(int(number)) != typed:
+                changes[int(number)] = typed
+        return changes
+
+    def updated(self, changes: dict) -> "GRBLSettingsSnapshot":
+        return GRBLSettingsSnapshot({**self.values, **{int(k): setting_value(k, v) for k, v in changes.items()}})
+
+    @property
+    def hard_limits(self) -> bool:
+        return bool(self.values.get(21))
+
+    @property
+    def homing_enabled(self) -> bool:
+        return bool(self.values.get(22))
+
+
+def format_setting(number: int, value) -> str:
+    """'$n=value' line for a typed value."""
+    if isinstance(value, bool):
+        value = int(value)
+    if isinstance(value, float):
+        value = f"{value:.3f}".rstrip('0').rstrip('.')
+    return f"${number}={value}"
+
+
+class GRBLSettingsManager:
+    """
+    Keeps GRBL's EEPROM settings in sync with as few writes as possible.
+
+    '$$' is read once and cached as a GRBLSettingsSnapshot, apply() then writes only the settings that differ,
+    pipeline_depth '$n=' lines at a time (ack counting, no sleeps), and verifies them with a second '$$'.
+    Every write through the manager updates the cached snapshot, so later single changes (e.g. hard limits)
+    need no readback. invalidate() forgets the snapshot, e.g. after settings were changed behind its back.
+
+    GRBL disables interrupts while it writes the EEPROM and may lose serial bytes that arrive meanwhile, so a
+    pipeline_depth above 1 is only safe when the verification step is kept, mismatches are rewritten one by one.
+    """
+    def __init__(self, grbl_streamer, pipeline_depth: int = 1, timeout: float = 2.0):
+        self.grbl_streamer = grbl_streamer
+        self.pipeline_depth = pipeline_depth
+        self.timeout = timeout  # Per command (s)
+        self.snapshot: GRBLSettingsSnapshot | None = None
+        self._lock = threading.Lock()  # One upload at a time
+
+        # Instrumentation
+        self.reads = 0
+        self.writes = 0
+        self.skipped = 0  # Settings that already had the desired value
+        self.last_apply_time = None  # s
+
+    def read(self) -> GRBLSettingsSnapshot:
+        """Read '$$' and replace the cached snapshot."""
+        response = self.grbl_streamer.send_command("$$", timeout=self.timeout)
+        self.snapshot = GRBLSettingsSnapshot.parse(response)
+        self.reads += 1
+        return self.snapshot
+
+    def get_snapshot(self) -> GRBLSettingsSnapshot:
+        """Cached snapshot, read from GRBL only the first time."""
+        return self.snapshot if self.snapshot is not None else self.read()
+
+    def invalidate(self) -> None:
+        self.snapshot = None
+
+    def apply(self, desired: dict, verify: bool = True) -> dict:
+        """
+        Bring the settings to desired ({number: value}), returns the settings that were written.
+        Raises RuntimeError if GRBL rejected a setting or the readback still differs.
+        """
+        with self._lock:
+            started = time.perf_counter()
+            snapshot = self.get_snapshot()
+            changes = snapshot.diff(desired)
+            self.skipped += len(desired) - len(changes)
+            if changes:
+                self._write(changes, self.pipeline_depth)
+                if verify:
+                    expected = snapshot.updated(changes)
+                    mismatches = self._mismatches(expected, self.read())
+                    if mismatches and self.pipeline_depth > 1:
+                        print(f"[GRBL] Settings readback differs for {sorted(mismatches)}, rewriting one by one")
+                        self._write(mismatches, 1)
+                        mismatches = self._mismatches(expected, self.read())
+                    if mismatches:
+                        raise RuntimeError(f"GRBL settings differ after upload: {mismatches}")
+                else:
+                    self.snapshot = snapshot.updated(changes)
+            self.last_apply_time = time.perf_counter() - started
+            print(f"[GRBL] Settings: {len(changes)} of {len(desired)} written in {self.last_apply_time:.2f} s"
+                  + (f" {sorted(changes)}" if changes else ""))
+            return changes
+
+    def set(self, number: int | str, value) -> bool:
+        """Write a single setting if it differs from the cached snapshot, returns True if it was written."""
+        return bool(self.apply({number: value}, verify=False))
+
+    def _write(self, changes: dict, depth: int):
+        lines = [format_setting(number, value) for number, value in changes.items()]
+        responses = self.grbl_streamer.send_pipelined(lines, depth=depth, timeout=self.timeout)
+        self.writes += len(lines)
+        rejected = {line: response for line, response in zip(lines, responses) if "ok" not in response.lower()}
+        if rejected:
+            self.invalidate()  # Unknown what made it into the EEPROM
+            raise RuntimeError(f"GRBL rejected settings: {rejected}")
+
+    @staticmethod
+    def _mismatches(expected: GRBLSettingsSnapshot, actual: GRBLSettingsSnapshot) -> dict:
+        """Settings whose readback differs from what was expected (also the ones that were not written)."""
+        return {number: value for number, value in expected.values.items() if actual.get(number) != value}
+
+    def __str__(self):
+        return f"Settings: {self.reads} reads, {self.writes} writes, {self.skipped} skipped"
@@ -0,0 +1,574 @@
+import math
+import os
+import pty
+import re
+import select
+import threading
+import time
+import tty
+from collections import deque
+from dataclasses import dataclass
+
+import numpy as np
+
+from GUI.GRBLSettings import OPERATING_SETTINGS
+
+
+GRBL_BANNER = b"\r\nGrbl 1.1h ['$' for help]\r\n"
+HOMING_LOCK = -1  # Alarm state after power up with homing enabled, reported without an ALARM:N line
+AXES = ('X', 'Y', 'Z')
+
+_WORD_RE = re.compile(r"([A-Z])([-+]?(?:\d+\.?\d*|\.\d+))")
+
+
+@dataclass
+class _Block:
+    """Planner block, a single G1/G0 line, jog or dwell."""
+    delta: np.ndarray  # mm per axis
+    feedrate: float  # mm/min (ignored for dwell)
+    dwell: float = 0.0  # seconds
+    jog: bool = False
+    length: float = 0.0
+    unit: np.ndarray = None
+    max_speed: float = 0.0  # mm/s
+    rate_limit: float = 0.0  # mm/s, from the axis max rates, caps the overridden feed
+    accel: float = 0.0  # mm/s^2
+
+
+class GRBLSimulator:
+    """
+    Virtual GRBL 1.1 device served on a pseudo-terminal, GRBLStreamer(port=simulator.port) opens it like the Arduino.
+
+    Modelled:
+    - 128 byte serial RX buffer (overflowing bytes are dropped and counted) at the configured baud rate
+    - 15 block planner, a line is acknowledged only once its block fits into the planner
+    - G0/G1/G4 in G90/G91, $J= jogs, executed in simulated time with the $110-$112 max rates and
+      $120-$122 accelerations, with junction speeds between consecutive blocks
+    - real-time '?', '!', '~', 0x85 (jog cancel), 0x90-0x94 (feed override) and 0x18 (soft reset -> ALARM:3 when in motion)
+    - $$, $n=value, $H, $X, $I and error:N responses
+    - an Arduino style reset (banner) every time the port is opened
+
+    time_scale > 1 runs the motion faster than real time (serial timing stays real).
+    """
+    def __init__(self, settings: dict = None, time_scale: float = 1.0, rx_buffer_size: int = 128,
+                 planner_size: int = 15, baudrate: int = 115200, homing_time: float = 2.0,
+                 line_processing_time: float = 0.0005, setting_write_time: float = 0.02, tick: float = 0.001):
+        self.settings = {str(k): float(v) for k, v in (settings or OPERATING_SETTINGS).items()}
+        self.time_scale = time_scale
+        self.rx_buffer_size = rx_buffer_size
+        self.planner_size = planner_size
+        self.baudrate = baudrate
+        self.homing_time = homing_time
+        self.line_processing_time = line_processing_time
+        self.setting_write_time = setting_write_time  # EEPROM write per '$n=', no other line is processed meanwhile
+        self.tick = tick
+
+        self.master_fd = None
+        self.port = None
+        self._threads = []
+        self._stop = threading.Event()
+        self._write_lock = threading.Lock()
+        self._lock = threading.Condition()  # Guards everything below
+
+        self._rx = bytearray()
+        self._planner = deque()
+        self._reset_machine()
+
+        # Instrumentation
+        self.rx_overflows = 0  # Bytes dropped because the RX buffer was full
+        self.planner_underruns = []  # Simulated times the machine had to stop because the planner ran dry
+        self.planner_occupancy = np.zeros(planner_size + 1)  # Simulated seconds spent at each planner fill level
+        self.lines_processed = 0
+        self.setting_writes = 0
+        self.reset_count = 0
+        self.standstill_at = None  # time.perf_counter() when motion last came to a stop
+        self.block_times = None  # Set to a list to record time.perf_counter() of every finished block (moves and dwells)
+
+    #
+    # Lifecycle
+    #
+
+    def start(self):
+        self.master_fd, slave_fd = pty.openpty()
+        tty.setraw(slave_fd)
+        self.port = os.ttyname(slave_fd)
+        os.close(slave_fd)  # Keep only the master, so opening and closing the port can be detected
+        self._stop.clear()
+        for target in (self._serial_loop, self._protocol_loop, self._motion_loop):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        print(f"[GRBL SIM] Serving on {self.port}")
+        return self.port
+
+    def close(self):
+        self._stop.set()
+        with self._lock:
+            self._lock.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=1.0)
+        self._threads.clear()
+        if self.master_fd is not None:
+            os.close(self.master_fd)
+            self.master_fd = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        self.close()
+
+    def _reset_machine(self, alarm: int = None):
+        """State after power up or soft reset (caller holds the lock when running)."""
+        self._rx.clear()
+        self._planner.clear()
+        self.state = "Alarm" if alarm else "Idle"
+        self.alarm = alarm
+        self.hold = False
+        self.jog_cancel = False
+        self.velocity = 0.0  # mm/s along the current block
+        self.block_progress = 0.0  # mm travelled in the current block
+        self.absolute_mode = True  # G90
+        self.motion_mode = 1
+        self.feedrate = None
+        self.feed_override = 100  # %, a reset restores 100 like GRBL
+        if not hasattr(self, "position"):
+            self.position = np.zeros(3)
+        self.planned_position = self.position.copy()  # End position of the last planned block
+
+    #
+    # Serial side
+    #
+
+    def _write(self, data: bytes):
+        with self._write_lock:
+            if self.master_fd is not None:
+                try:
+                    os.write(self.master_fd, data)
+                except OSError:
+                    pass
+
+    def _serial_loop(self):
+        """Receives bytes at the link rate, handles real-time bytes and fills the RX buffer."""
+        poller = select.poll()
+        poller.register(self.master_fd, select.POLLIN | select.POLLHUP)
+        byte_time = 10 / self.baudrate  # 8N1
+        port_open = False
+        arrival = time.perf_counter()
+        while not self._stop.is_set():
+            events = poller.poll(20)
+            hangup = any(event & select.POLLHUP for _, event in events)
+            if hangup:
+                if port_open:
+                    port_open = False
+                time.sleep(0.01)
+                continue
+            if not port_open:
+                # Client opened the port: the Arduino resets and prints its banner
+                port_open = True
+                time.sleep(0.1)
+                self.soft_reset(power_up=True)
+            if not events:
+                continue
+            try:
+                data = os.read(self.master_fd, 1024)
+            except OSError:
+                continue
+            # Bytes do not arrive faster than the baud rate allows
+            arrival = max(arrival, time.perf_counter()) + len(data) * byte_time
+            delay = arrival - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            for byte in data:
+                self._receive_byte(byte)
+
+    def _receive_byte(self, byte: int):
+        if byte == ord('?'):
+            self._write(self.status_report().encode() + b"\r\n")
+        elif byte == ord('!'):
+            with self._lock:
+                if self.state in ("Run", "Jog"):
+                    self.hold = True
+                    self.state = "Hold"
+                    self._lock.notify_all()
+        elif byte == ord('~'):
+            with self._lock:
+                if self.state == "Hold":
+                    self.hold = False
+                    self.state = "Run" if self._planner else "Idle"
+                    self._lock.notify_all()
+        elif byte == 0x18:
+            self.soft_reset()
+        elif byte == 0x85:
+            with self._lock:
+                if self.state == "Jog":
+                    self.jog_cancel = True
+                    self._lock.notify_all()
+        elif 0x90 <= byte <= 0x94:
+            with self._lock:
+                if byte == 0x90:
+                    self.feed_override = 100
+                else:
+                    step = {0x91: 10, 0x92: -10, 0x93: 1, 0x94: -1}[byte]
+                    self.feed_override = min(max(self.feed_override + step, 10), 200)
+        elif byte >= 0x80:
+            pass  # Other extended real-time commands are ignored
+        else:
+            with self._lock:
+                if len(self._rx) >= self.rx_buffer_size:
+                    self.rx_overflows += 1
+                    return
+                self._rx.append(byte)
+                if byte == ord('\n'):
+                    self._lock.notify_all()
+
+    def soft_reset(self, power_up: bool = False):
+        with self._lock:
+            in_motion = self.velocity > 0 or (bool(self._planner) and self.state in ("Run", "Jog", "Hold"))
+            if power_up:
+                self.position[:] = 0.0  # The Arduino forgets its position on reboot
+                alarm = HOMING_LOCK if int(self.settings.get("22", 0)) else None
+            else:
+                alarm = 3 if in_motion else self.alarm
+            self._reset_machine(alarm=alarm)
+            if in_motion:
+                self.standstill_at = time.perf_counter()
+            self.reset_count += 1
+            self._lock.notify_all()
+        if alarm and alarm != HOMING_LOCK and not power_up and in_motion:
+            self._write(f"ALARM:{alarm}\r\n".encode())
+        self._write(GRBL_BANNER)
+        if alarm:
+            self._write(b"[MSG:'$H'|'$X' to unlock]\r\n")
+
+    def status_report(self) -> str:
+        with self._lock:
+            state = self.state
+            if state == "Hold":
+                state = "Hold:0" if self.velocity == 0 else "Hold:1"  # 0: complete, 1: decelerating
+            position = ",".join(f"{p:.3f}" for p in self.position)
+            report = f"<{state}|MPos:{position}"
+            if int(self.settings.get("10", 1)) & 2:
+                report += f"|Bf:{self.planner_size - len(self._planner)},{self.rx_buffer_size - len(self._rx)}"
+            feed = self.velocity * 60
+            report += f"|FS:{feed:.0f},0|Ov:{self.feed_override},100,100>"
+        return report
+
+    #
+    # Protocol (line) side
+    #
+
+    def _protocol_loop(self):
+        while not self._stop.is_set():
+            with self._lock:
+                while b"\n" not in self._rx and not self._stop.is_set():
+                    self._lock.wait(0.1)
+                if self._stop.is_set():
+                    break
+                index = self._rx.index(b"\n")
+                line = self._rx[:index].decode(errors="replace")
+                del self._rx[:index + 1]
+                reset_count = self.reset_count
+            if self.line_processing_time:
+                time.sleep(self.line_processing_time)
+            response = self._execute_line(line.replace(" ", "").replace("\r", "").upper(), reset_count)
+            if response is not None:
+                self._write(response.encode() + b"\r\n")
+                self.lines_processed += 1
+
+    def _execute_line(self, line: str, reset_count: int) -> str | None:
+        if self.reset_count != reset_count:
+            return None  # The line was being read when GRBL reset
+        if not line:
+            return "ok"
+        if line.startswith("$"):
+            return self._execute_system_command(line, reset_count)
+        with self._lock:
+            if self.state == "Alarm":
+                return "error:9"
+        return self._execute_gcode(line, reset_count)
+
+    def _execute_system_command(self, line: str, reset_count: int) -> str | None:
+        if line == "$$":
+            lines = [f"${k}={_format_setting(v)}" for k, v in sorted(self.settings.items(), key=lambda kv: int(kv[0]))]
+            self._write(("\r\n".join(lines) + "\r\n").encode())
+            return "ok"
+        if line == "$X":
+            with self._lock:
+                if self.state == "Alarm":
+                    self.state = "Idle"
+                    self.alarm = None
+                    self._write(b"[MSG:Caution: Unlocked]\r\n")
+            return "ok"
+        if line == "$I":
+            self._write(b"[VER:1.1h.20190825:]\r\n[OPT:V,15,128]\r\n")
+            return "ok"
+        if line == "$H":
+            return self._home(reset_count)
+        if line.startswith("$J="):
+            return self._execute_gcode(line[3:], reset_count, jog=True)
+        match = re.fullmatch(r"\$(\d+)=([-+]?[\d.]+)", line)
+        if match:
+            with self._lock:
+                if self.state not in ("Idle", "Alarm"):
+                    return "error:8"
+            time.sleep(self.setting_write_time)
+            self.settings[match.group(1)] = float(match.group(2))
+            self.setting_writes += 1
+            return "ok"
+        return "error:3"
+
+    def _home(self, reset_count: int) -> str | None:
+        if not int(self.settings.get("22", 0)):
+            return "error:5"
+        with self._lock:
+            if self.state not in ("Idle", "Alarm"):
+                return "error:8"
+            self.state = "Home"
+        deadline = time.perf_counter() + self.homing_time / self.time_scale
+        while time.perf_counter() < deadline:
+            if self._stop.wait(0.01) or self.reset_count != reset_count:
+                return None  # Reset during homing, GRBL never acknowledges the $H
+        with self._lock:
+            self.position[:] = 0.0
+            self.state = "Idle"
+            self.alarm = None
+        return "ok"
+
+    def _execute_gcode(self, line: str, reset_count: int, jog: bool = False) -> str | None:
+        words = _WORD_RE.findall(line)
+        if "".join(letter + value for letter, value in words) != line:
+            return "error:2"  # Bad number format or unknown characters
+        absolute_mode = self.absolute_mode
+        motion_mode = self.motion_mode
+        feedrate = None
+        dwell = None
+        target = {}
+        for letter, value in words:
+            number = float(value)
+            if letter == "G":
+                code = int(number)
+                if code in (0, 1):
+                    motion_mode = code
+                elif code == 90:
+                    absolute_mode = True
+                elif code == 91:
+                    absolute_mode = False
+                elif code == 4:
+                    dwell = 0.0
+                elif code in (17, 21, 54, 94):
+                    pass
+                else:
+                    return "error:20"
+            elif letter == "F":
+                feedrate = number
+            elif letter in AXES:
+                target[letter] = number
+            elif letter == "P" and dwell is not None:
+                dwell = number
+            elif letter == "M" and int(number) in (0, 2, 30):
+                pass
+            else:
+                return "error:20"
+
+        if jog:
+            if feedrate is None or not target:
+                return "error:16"
+            with self._lock:
+                if self.state not in ("Idle", "Jog"):
+                    return "error:16"
+        else:
+            self.absolute_mode = absolute_mode
+            self.motion_mode = motion_mode
+            if feedrate is not None:
+                self.feedrate = feedrate
+            feedrate = self.feedrate
+
+        if dwell is not None:
+            return self._plan(_Block(delta=np.zeros(3), feedrate=0.0, dwell=dwell), reset_count)
+        if not target:
+            return "ok"
+        if motion_mode == 1 and not jog and not feedrate:
+            return "error:22"
+
+        with self._lock:
+            planned_position = self.planned_position.copy()
+        delta = np.zeros(3)
+        for i, axis in enumerate(AXES):
+            if axis in target:
+                delta[i] = target[axis] - planned_position[i] if absolute_mode else target[axis]
+        if motion_mode == 0 and not jog:
+            feedrate = math.inf
+        return self._plan(_Block(delta=delta, feedrate=feedrate, jog=jog), reset_count)
+
+    def _plan(self, block: _Block, reset_count: int) -> str | None:
+        """Put a block into the planner, waiting for a free slot like GRBL does before it sends 'ok'."""
+        if not block.dwell:
+            block.length = float(np.linalg.norm(block.delta))
+            if block.length == 0:
+                return "ok"
+            block.unit = block.delta / block.length
+            rate_limit = math.inf
+            accel = math.inf
+            for i in range(3):
+                component = abs(block.unit[i])
+                if component > 0:
+                    rate_limit = min(rate_limit, self.settings[f"11{i}"] / 60 / component)
+                    accel = min(accel, self.settings[f"12{i}"] / component)
+            block.max_speed = min(block.feedrate / 60, rate_limit)
+            block.rate_limit = rate_limit
+            block.accel = accel
+        with self._lock:
+            while len(self._planner) >= self.planner_size and not self._stop.is_set():
+                self._lock.wait(0.1)
+                if self.reset_count != reset_count:
+                    return None  # The line was lost in the reset
+            if self.reset_count != reset_count:
+                return None
+            self._planner.append(block)
+            self.planned_position += block.delta
+            if self.state == "Idle":
+                self.state = "Jog" if block.jog else "Run"
+            self._lock.notify_all()
+        return "ok"
+
+    #
+    # Motion
+    #
+
+    def _junction_speed(self, block: _Block, next_block: _Block) -> float:
+        if next_block is None or next_block.dwell or block.dwell:
+            return 0.0
+        cos_angle = float(np.dot(block.unit, next_block.unit))
+        return min(self._cruise_speed(block), self._cruise_speed(next_block)) * max(0.0, cos_angle)
+
+    def _cruise_speed(self, block: _Block) -> float:
+        """Programmed speed with the feed override applied, jogs are not overridden (caller holds the lock)."""
+        if block.jog or self.feed_override == 100:
+            return block.max_speed
+        return min(block.feedrate / 60 * self.feed_override / 100, block.rate_limit)
+
+    def _motion_loop(self):
+        last = time.perf_counter()
+        while not self._stop.is_set():
+            time.sleep(self.tick)
+            now = time.perf_counter()
+            dt = (now - last) * self.time_scale
+            last = now
+            with self._lock:
+                self.planner_occupancy[min(len(self._planner), self.planner_size)] += dt
+                # Time left over when a block ends within the tick is spent on the next block
+                while dt > 0 and self._planner:
+                    dt = self._advance(dt, now)
+
+    def _advance(self, dt: float, now: float) -> float:
+        """Execute the current block for up to dt seconds, returns the unused time (caller holds the lock)."""
+        block = self._planner[0]
+        if block.dwell:
+            if self.hold:
+                return 0.0
+            used = min(dt, block.dwell)
+            block.dwell -= used
+            if block.dwell <= 0:
+                self._finish_block()
+            return dt - used
+
+        next_block = self._planner[1] if len(self._planner) > 1 else None
+        exit_speed = self._junction_speed(block, next_block)
+        remaining = block.length - self.block_progress
+        cruise = self._cruise_speed(block)
+        if self.hold or self.jog_cancel:
+            speed = max(0.0, self.velocity - block.accel * dt)
+        else:
+            if self.velocity > cruise:
+                speed = max(cruise, self.velocity - block.accel * dt)  # Feed override lowered
+            else:
+                speed = min(cruise, self.velocity + block.accel * dt)
+            speed = min(speed, math.sqrt(exit_speed ** 2 + 2 * block.accel * max(remaining, 0.0)))
+        mean_speed = (self.velocity + speed) / 2
+        step = mean_speed * dt
+        used = dt
+        if step >= remaining:
+            step = remaining
+            used = remaining / mean_speed if mean_speed > 0 else dt
+        self.velocity = speed
+        self.block_progress += step
+        self.position += block.unit * step
+
+        if self.velocity == 0 and (self.hold or self.jog_cancel):
+            self.standstill_at = now
+            if self.jog_cancel:
+                self._planner.clear()
+                self.planned_position = self.position.copy()
+                self.block_progress = 0.0
+                self.jog_cancel = False
+                self.state = "Idle"
+                self._lock.notify_all()
+            return 0.0
+        if block.length - self.block_progress <= 1e-9:
+            self._finish_block()
+            return dt - used
+        return 0.0
+
+    def _finish_block(self):
+        """Drop the finished block (caller holds the lock)."""
+        self._planner.popleft()
+        self.block_progress = 0.0
+        if self.block_times is not None:
+            self.block_times.append(time.perf_counter())
+        if not self._planner:
+            if self.state == "Run":
+                # The planner ran dry, the next line starts from standstill
+                self.planner_underruns.append(time.perf_counter())
+            self.velocity = 0.0
+            self.jog_cancel = False
+            self.standstill_at = time.perf_counter()
+            if self.state in ("Run", "Jog"):
+                self.state = "Idle"
+        self._lock.notify_all()
+
+    #
+    # Instrumentation
+    #
+
+    def reset_stats(self):
+        with self._lock:
+            self.rx_overflows = 0
+            self.planner_underruns = []
+            self.planner_occupancy[:] = 0
+            self.lines_processed = 0
+            self.setting_writes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.planner_occupancy.sum()
+            occupancy = self.planner_occupancy / total if total else self.planner_occupancy
+            return {
+                'lines_processed': self.lines_processed,
+                'setting_writes': self.setting_writes,
+                'rx_overflows': self.rx_overflows,
+                'planner_underruns': len(self.planner_underruns),
+                'planner_occupancy': occupancy.tolist(),  # Fraction of time at 0..planner_size blocks
+                'mean_planner_blocks': float(np.dot(occupancy, np.arange(self.planner_size + 1))) if total else 0.0,
+                'position': self.position.tolist(),
+                'state': self.state,
+            }
+
+
+def _format_setting(value: float) -> str:
+    return str(int(value)) if value == int(value) else f"{value:.3f}"
+
+
+if __name__ == "__main__":
+    # Serve a virtual GRBL, e.g. point [Positioning] COMPort of ConfigFileLocal.ini to the printed port
+    simulator = GRBLSimulator()
+    simulator.start()
+    try:
+        while True:
+            time.sleep(5)
+            print(f"[GRBL SIM] {simulator.status_report()} {simulator.stats()['planner_underruns']} underruns")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        simulator.close()
@@ -0,0 +1,112 @@
+from dataclasses import dataclass
+import re
+import time
+
+
+@dataclass
+class Position:
+    x: float
+    y: float
+    z: float
+
+    def __str__(self):
+        return f"X: {self.x:.3f}, Y: {self.y:.3f}, Z: {self.z:.3f}"
+
+
+# Compiled once, used for every report.
+# Supports both GRBL 1.1 (<Idle|MPos:0.000,0.000,0.000|Bf:15,128|FS:0,0|Pn:XZ>)
+# and GRBL 0.9 (<Idle,MPos:0.000,0.000,0.000,WPos:0.000,0.000,0.000,Buf:0,RX:0,Lim:000>) reports
+_STATE_RE = re.compile(r"^<([A-Za-z]+)(?::(\d+))?")
+_FIELD_RE = re.compile(r"([A-Za-z]+):([-\d.]+(?:,[-\d.]+)*|[A-Z]*)")
+
+AXES = ('X', 'Y', 'Z')
+
+
+@dataclass(frozen=True)
+class GRBLStatus:
+    """Parsed GRBL real-time status report. Immutable, so it can be shared between threads without locking."""
+    timestamp: float  # time.monotonic() when the report was received
+    state: str  # Idle, Run, Hold, Jog, Alarm, Door, Check, Home, Sleep
+    position: Position | None  # Machine position (MPos)
+    work_position: Position | None = None  # Work position (WPos, or MPos - WCO if reported)
+    planner_blocks_available: int | None = None  # 'Bf:' first value, only reported by GRBL 1.1
+    rx_bytes_available: int | None = None  # 'Bf:' second value, only reported by GRBL 1.1
+    limit_pins: frozenset = frozenset()  # Axes with triggered limit switch ('Pn:' or 'Lim:')
+    feedrate: float | None = None
+    overrides: tuple | None = None  # 'Ov:' feed, rapid, spindle override (%), GRBL 1.1 reports it only now and then
+    substate: int | None = None  # e.g. Hold:0 / Hold:1
+    raw: str = ""
+
+    @property
+    def is_idle(self) -> bool:
+        return self.state == "Idle"
+
+    @property
+    def is_hold_complete(self) -> bool:
+        """Feed hold finished decelerating (GRBL 1.1 'Hold:0', GRBL 0.9 only reports 'Hold')."""
+        return self.state == "Hold" and self.substate in (0, None)
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.timestamp
+
+    @classmethod
+    def parse(cls, line: str, timestamp: float = None) -> "GRBLStatus":
+        """Parse a single '<...>' status report line. Raises ValueError for anything else."""
+        match = _STATE_RE.match(line)
+        if not match or not line.endswith(">"):
+            raise ValueError(f"Not a GRBL status report: {line}")
+        state = match.group(1)
+        substate = int(match.group(2)) if match.group(2) is not None else None
+
+        fields = dict(_FIELD_RE.findall(line, match.end()))
+
+        position = _parse_position(fields.get("MPos"))
+        work_position = _parse_position(fields.get("WPos"))
+        wco = _parse_position(fields.get("WCO"))
+        if work_position is None and position is not None and wco is not None:
+            work_position = Position(position.x - wco.x, position.y - wco.y, position.z - wco.z)
+
+        planner_blocks_available = rx_bytes_available = None
+        if "Bf" in fields:
+            planner_blocks_available, rx_bytes_available = (int(v) for v in fields["Bf"].split(","))
+
+        limit_pins = frozenset()
+        if "Pn" in fields:
+            limit_pins = frozenset(pin for pin in fields["Pn"] if pin in AXES)
+        elif "Lim" in fields:
+            limit_pins = frozenset(axis for axis, bit in zip(AXES, fields["Lim"]) if bit == "1")
+
+        feedrate = None
+        if "FS" in fields:
+            feedrate = float(fields["FS"].split(",")[0])
+        elif "F" in fields:
+            feedrate = float(fields["F"])
+
+        overrides = None
+        if "Ov" in fields:
+            overrides = tuple(int(v) for v in fields["Ov"].split(","))
+
+        return cls(
+            timestamp=time.monotonic() if timestamp is None else timestamp,
+            state=state,
+            position=position,
+            work_position=work_position,
+            planner_blocks_available=planner_blocks_available,
+            rx_bytes_available=rx_bytes_available,
+            limit_pins=limit_pins,
+            feedrate=feedrate,
+            overrides=overrides,
+            substate=substate,
+            raw=line,
+        )
+
+    def __str__(self):
+        return self.raw
+
+
+def _parse_position(value: str | None) -> Position | None:
+    if not value:
+        return None
+    x, y, z = map(float, value.split(",")[:3])
+    return Position(x, y, z)
@@ -1,11 +1,48 @@
+import queue
 import serial
 import time
 import threading
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from GUI.Instrumentation import LatencyStats, RateMeter
+from GUI.SignalBuffer import SignalBuffer
 
 
 class HVControllerError(Exception):
     pass
 
+
+STX = b"\x02"
+LF = b"\n"
+
+# The checksum only depends on the byte sum modulo 128: (0x200 - sum) & 0xFF, bit7 cleared, bit6 set, as two uppercase hex chars
+_CHECKSUM_HEX = tuple(f"{((0x200 - total) & 0x7F) | 0x40:02X}".encode('ascii') for total in range(128))
+
+# Queries without data, their frames are built once per controller
+QUERY_COMMANDS = (b"M0", b"M1", b"SR", b"V1", b"I1", b"EN")
+
+
+def frame_checksum(body) -> bytes:
+    """Checksum of ADDR..DATA (bytes, bytearray or memoryview) as two ASCII hex chars."""
+    return _CHECKSUM_HEX[sum(body) & 0x7F]
+
+
+@dataclass
+class QueuedCommand:
+    """Command sent from another thread while the telemetry scheduler owns the port."""
+    cmd: bytes
+    operator: bytes
+    data: bytes
+    expect_response: bool
+    queued_at: float
+    done: threading.Event = field(default_factory=threading.Event)
+    response: bytes | None = None
+    error: Exception | None = None
+    cancelled: bool = False
+
+
 class HVController:
     def __init__(self, port: str = None, baudrate: int = 9600, addr: str = "01", devtype: str = "09", timeout: float = 1.0):
         """
@@ -25,13 +62,40 @@ class HVController:
 
         self.ser = None
 
+        # Precomputed frames, see _frame()
+        self._header = (addr + devtype).encode('ascii')
+        self._query_frames = {cmd + b"?": self._build_command(cmd.decode('ascii'), "?") for cmd in QUERY_COMMANDS}
+        self._response_prefixes = {cmd: STX + self._header + cmd for cmd in QUERY_COMMANDS}
+        self._frame_start = STX + self._header
+        self._header_sum = sum(self._header)  # Checksum partial sum of ADDR + DEVTYPE
+
         if self.port is None:
             self.port = self._detect_port()
             print(f"Auto-detected port: {self.port}")
 
         # General monitoring infrastructure
-        self.monitors = {}  # Dictionary to store monitor data: {name: {'thread': Thread, 'stop_event': Event, 'value': value, 'callback': func}}
+        # {name: {'read_func': func, 'callback': func, 'interval': s, 'value': value, 'next_due': t, ...}}
+        self.monitors = {}
+        self.monitors_lock = threading.Lock()
         self.communication_lock = threading.Lock()
+
+        # Telemetry scheduler, a single thread owns the port and interleaves all monitors.
+        # Commands from other threads are queued and served before the next telemetry read.
+        self.scheduler_thread = None
+        self.scheduler_stop = threading.Event()
+        self.command_queue = queue.Queue()
+        self.command_latency = LatencyStats()  # Queueing + round-trip time of commands sent through the scheduler
+        self.sample_listeners = []  # listener(name, timestamp, value) for every successful monitor reading
+
+        # Adaptive polling, monitors started with min_interval < max_interval poll fast while the setpoint changes
+        # or the signal gets noisy and back off to max_interval when it is stable or the output is disabled
+        self.link_budget = 0.6  # Maximum share of the port time used by telemetry
+        self.activity_hold = 2.0  # Seconds of fast polling after a V1= / EN= command
+        self.activity_ratio = 6.0  # Step between readings, relative to the median step, that counts as activity
+        self.output_enabled = None  # From EN= / EN? / SR?, None if unknown
+        self.last_setpoint_change = None  # time.perf_counter() of the last V1= / EN=
+        self.telemetry_busy = RateMeter(window=5.0)  # Port seconds per second spent on telemetry
+        self.command_busy = RateMeter(window=5.0)  # Port seconds per second spent on other commands
         
         # Legacy attributes for backward compatibility
         self.voltage_monitor = None
@@ -48,8 +112,9 @@ class HVController:
             raise HVControllerError(f"Failed to open serial port {self.port}: {e}")
 
     def close(self):
-        # Stop all monitor threads if running
+        # Stop all monitors and the scheduler if running
         self._stop_all_monitors()
+        self._stop_scheduler()
         
         if self.ser and self.ser.is_open:
             self.ser.close()
@@ -70,93 +135,103 @@ class HVController:
         Compute checksum as specified: sum ASCII values of ADDR, DEVTYPE, CMD, OPERATOR, DATA,
         subtract from 0x200, take lower 8 bits, mask bit7 off, set bit6 on. Return two‐char uppercase hex.
         """
-        msg = addr + devtype + cmd + operator + data
-        total = sum(ord(c) for c in msg)
-        checksum = 0x200 - total
-        checksum &= 0xFF  # take lower 8 bits
-        # clear most significant bit (bit 7)
-        checksum &= 0x7F
-        # set bit 6
-        checksum |= 0x40
-        # convert to two‐char uppercase hex, pad with zero if needed
-        return f"{checksum:02X}"
+        return frame_checksum((addr + devtype + cmd + operator + data).encode('ascii')).decode('ascii')
 
     def _build_command(self, cmd: str, operator: str, data: str = "") -> bytes:
         """
         Build the raw bytes to send: <STX><ADDR><DEVTYPE><CMD><OPERATOR><DATA><CSUM><LF>
         """
-        STX = chr(0x02)
-        LF = chr(0x0A)
-        csum = self._checksum(self.addr, self.devtype, cmd, operator, data)
-        s = STX + self.addr + self.devtype + cmd + operator + data + csum + LF
-        return s.encode('ascii')
+        body = self._header + (cmd + operator + data).encode('ascii')
+        return STX + body + frame_checksum(body) + LF
+
+    def _frame(self, cmd: bytes, operator: bytes, data: bytes) -> bytes:
+        """
+        Frame for a request, queries come from the cache. Anything else is joined from bytes, the checksum only
+        sums CMD + OPERATOR + DATA on top of the precomputed ADDR + DEVTYPE sum.
+        """
+        if not data:
+            frame = self._query_frames.get(cmd + operator)
+            if frame is not None:
+                return frame
+        body = cmd + operator + data
+        return b"".join((self._frame_start, body, _CHECKSUM_HEX[(self._header_sum + sum(body)) & 0x7F], LF))
 
     def _send_command(self, cmd: str, operator: str, data: str = "", expect_response: bool = True) -> str:
         """
         Send command, read response. Returns the ASCII response (without STX and LF).
         Raises error on timeout or invalid response/CSUM.
+        While the telemetry scheduler runs, commands from other threads are handed to it and jump ahead of telemetry.
         """
+        return self._request(cmd.encode('ascii'), operator.encode('ascii'), data.encode('ascii'), expect_response).decode('ascii')
+
+    def _request(self, cmd: bytes, operator: bytes, data: bytes = b"", expect_response: bool = True) -> bytes:
+        """Bytes version of _send_command, returns operator + data of the response, e.g. b"=02500.0"."""
         if self.ser is None or not self.ser.is_open:
             raise HVControllerError("Serial port not connected")
-        
-        raw = self._build_command(cmd, operator, data)
-        
+
+        if self._scheduler_running() and threading.current_thread() is not self.scheduler_thread:
+            return self._queue_command(cmd, operator, data, expect_response)
+        return self._transact(cmd, operator, data, expect_response)
+
+    def _queue_command(self, cmd: bytes, operator: bytes, data: bytes, expect_response: bool) -> bytes:
+        request = QueuedCommand(cmd, operator, data, expect_response, time.perf_counter())
+        self.command_queue.put(request)
+        # At most one telemetry transaction is in flight in front of the command
+        if not request.done.wait(timeout=2 * self.timeout + 1.0):
+            request.cancelled = True
+            raise HVControllerError(f"Command {(cmd + operator + data).decode('ascii')} timed out waiting for the telemetry scheduler")
+        self.command_latency.add(time.perf_counter() - request.queued_at)
+        if request.error is not None:
+            raise request.error
+        return request.response
+
+    def _transact(self, cmd: bytes, operator: bytes, data: bytes = b"", expect_response: bool = True) -> bytes:
+        """Single request/response exchange on the port."""
+        if operator == b"=" and cmd in (b"V1", b"EN"):
+            self._on_setpoint_change()
         with self.communication_lock:
             # clear input buffer before sending
             self.ser.reset_input_buffer()
             # send
-            self.ser.write(raw)
+            self.ser.write(self._frame(cmd, operator, data))
             # Depending on the command, device responds. For broadcast (ADDR="00") usually no reply except ID?
             if not expect_response:
-                return ""
+                return b""
             # read until LF
             resp = self.ser.read_until(b'\n')
-            
-            # Process response while still holding the lock to prevent race conditions
-            if not resp:
-                raise HVControllerError("No response from device")
-            
-            # resp is bytes, decode
-            try:
-                resp_ascii = resp.decode('ascii')
-            except UnicodeDecodeError:
-                raise HVControllerError(f"Non‐ASCII response: {resp!r}")
-
-            # Response should begin with STX
-            if not resp_ascii.startswith(chr(0x02)):
-                raise HVControllerError(f"Invalid start of response: {resp_ascii!r}")
-
-            # Strip STX and LF
-            body = resp_ascii[1:].rstrip('\n').rstrip('\r')
-            # Now you have something like ADDR DEVTYPE CMD = DATA CSUM etc.
-            # Optionally verify checksum of response
-            # We can parse out the pieces
-            # Format: <ADDR><DEVTYPE><CMD><OPERATOR><DATA><CSUM>
-            # We'll extract ADDR, DEVTYPE, CMD (2 chars each), operator (1 char), then data (variable), then csum (last 2 chars)
-            if len(body) < (2 + 2 + 2 + 1 + 2):  # minimal length
-                raise HVControllerError(f"Response too short: {body!r}")
-
-            addr_r = body[0:2]
-            devtype_r = body[2:4]
-            cmd_r = body[4:6]
-            operator_r = body[6:7]
-            # everything up to last two chars minus data
-            # data is from position 7 up to len(body)-2
-            data_r = body[7:-2]
-            csum_r = body[-2:]
-
-            # Optionally verify addr/devtype match
-            if addr_r != self.addr or devtype_r != self.devtype or cmd_r != cmd:
-                # maybe the device is different? We can warn or error
-                raise HVControllerError(f"Unexpected response header: addr/devtype/cmd mismatch: got {addr_r},{devtype_r},{cmd_r}")
-
-            # Compute expected checksum for the response
-            expected = self._checksum(addr_r, devtype_r, cmd_r, operator_r, data_r)
-            if expected.upper() != csum_r.upper():
-                raise HVControllerError(f"Checksum mismatch: expected {expected}, got {csum_r}")
-
-            # Data operator is '=' for responses with data, '*' for invalid command, etc.
-            return operator_r + data_r  # e.g. "=02500.0"
+
+        return self._parse_response(resp, cmd)
+
+    def _parse_response(self, resp: bytes, cmd: bytes) -> bytes:
+        """
+        Validate a response frame <STX><ADDR><DEVTYPE><CMD><OPERATOR><DATA><CSUM><LF> without decoding it.
+        Returns operator + data, e.g. b"=02500.0" ('=' for responses with data, '*' for an invalid command).
+        """
+        if not resp:
+            raise HVControllerError("No response from device")
+        if not resp.isascii():
+            raise HVControllerError(f"Non‐ASCII response: {resp!r}")
+        # Response should begin with STX
+        if resp[0] != 0x02:
+            raise HVControllerError(f"Invalid start of response: {resp!r}")
+
+        # Strip LF/CR
+        end = len(resp)
+        while end > 1 and resp[end - 1] in (0x0A, 0x0D):
+            end -= 1
+        if end - 1 < (2 + 2 + 2 + 1 + 2):  # minimal length
+            raise HVControllerError(f"Response too short: {resp!r}")
+
+        prefix = self._response_prefixes.get(cmd) or STX + self._header + cmd
+        if not resp.startswith(prefix):
+            raise HVControllerError(f"Unexpected response header: addr/devtype/cmd mismatch: got {resp[1:7].decode('ascii')}")
+
+        expected = _CHECKSUM_HEX[sum(resp[1:end - 2]) & 0x7F]
+        csum_r = resp[end - 2:end]
+        if csum_r != expected and csum_r.upper() != expected:
+            raise HVControllerError(f"Checksum mismatch: expected {expected.decode('ascii')}, got {csum_r.decode('ascii')}")
+
+        return resp[7:end - 2]
 
     #
     # Public commands
@@ -167,15 +242,15 @@ class HVController:
         Read present value of target output voltage (V1?)
         Returns voltage in volts (float)
         """
-        resp = self._send_command(cmd="V1", operator="?", data="")
+        resp = self._request(b"V1", b"?")
         # resp should start with '=', then data
-        if not resp.startswith('='):
-            raise HVControllerError(f"Unexpected response {resp}")
+        if not resp.startswith(b'='):
+            raise HVControllerError(f"Unexpected response {resp.decode('ascii')}")
         val_str = resp[1:]
         try:
             return float(val_str)
         except ValueError:
-            raise HVControllerError(f"Cannot parse voltage value: {val_str}")
+            raise HVControllerError(f"Cannot parse voltage value: {val_str.decode('ascii')}")
 
     def set_voltage(self, volts: float) -> None:
         """
@@ -185,13 +260,13 @@ class HVController:
         # According to examples, format is zero padded to appropriate width. The example: "02500.0" for 2.5kV
         # They use xxxxx.x so one decimal place, total width seems to be 7 chars including decimal point
         # Let’s format: total width 7, with one decimal, pad with leading zeros
-        data = f"{volts:07.1f}"
+        data = f"{volts:07.1f}".encode('ascii')
         # e.g. volts=2500.0 -> "02500.0"
-        resp = self._send_command(cmd="V1", operator="=", data=data)
+        resp = self._request(b"V1", b"=", data)
         # Optionally check that the echo or response matches
         # The protocol says the unit should respond with same command to confirm
-        if not resp.startswith('='):
-            raise HVControllerError(f"Unexpected response to set_voltage: {resp}")
+        if not resp.startswith(b'='):
+            raise HVControllerError(f"Unexpected response to set_voltage: {resp.decode('ascii')}")
         # we could return the set value
         # Optionally parse the returned value if needed
 
@@ -200,57 +275,58 @@ class HVController:
         Read present value of current limit (I1?)
         Returns current in microamps or amps depending on device spec. The protocol shows I1=xxxxx.x
         """
-        resp = self._send_command(cmd="I1", operator="?", data="")
-        if not resp.startswith('='):
-            raise HVControllerError(f"Unexpected response {resp}")
+        resp = self._request(b"I1", b"?")
+        if not resp.startswith(b'='):
+            raise HVControllerError(f"Unexpected response {resp.decode('ascii')}")
         val_str = resp[1:]
         try:
             return float(val_str)
         except ValueError:
-            raise HVControllerError(f"Cannot parse current limit: {val_str}")
+            raise HVControllerError(f"Cannot parse current limit: {val_str.decode('ascii')}")
 
     def set_current_limit(self, current: float) -> None:
         """
         Set current limit (I1=)
         """
-        data = f"{current:07.1f}"  # example formatting
-        resp = self._send_command(cmd="I1", operator="=", data=data)
-        if not resp.startswith('='):
-            raise HVControllerError(f"Unexpected response to set_current_limit: {resp}")
+        data = f"{current:07.1f}".encode('ascii')  # example formatting
+        resp = self._request(b"I1", b"=", data)
+        if not resp.startswith(b'='):
+            raise HVControllerError(f"Unexpected response to set_current_limit: {resp.decode('ascii')}")
 
     def read_enable_state(self) -> bool:
         """
         Read enable state: EN?
         Returns True if enabled (EN=1), False if disabled (EN=0)
         """
-        resp = self._send_command(cmd="EN", operator="?", data="")
-        if not resp.startswith('='):
-            raise HVControllerError(f"Unexpected response {resp}")
+        resp = self._request(b"EN", b"?")
+        if not resp.startswith(b'='):
+            raise HVControllerError(f"Unexpected response {resp.decode('ascii')}")
         val = resp[1:]
-        if val == '1':
+        if val == b'1':
             return True
-        elif val == '0':
+        elif val == b'0':
             return False
         else:
-            raise HVControllerError(f"Unexpected EN value: {val}")
+            raise HVControllerError(f"Unexpected EN value: {val.decode('ascii')}")
 
     def set_enable_state(self, enable: bool) -> None:
         """
         Enable or disable the output
         """
-        val = '1' if enable else '0'
-        resp = self._send_command(cmd="EN", operator="=", data=val)
-        if not resp.startswith('='):
-            raise HVControllerError(f"Unexpected response to set_enable_state: {resp}")
+        val = b'1' if enable else b'0'
+        resp = self._request(b"EN", b"=", val)
+        if not resp.startswith(b'='):
+            raise HVControllerError(f"Unexpected response to set_enable_state: {resp.decode('ascii')}")
+        self.output_enabled = enable
 
     def get_status(self) -> int:
         """
         Read status register (SR?)
         Returns as integer (hex interpreted)
         """
-        resp = self._send_command(cmd="SR", operator="?", data="")
-        if not resp.startswith('='):
-            raise HVControllerError(f"Unexpected response {resp}")
+        resp = self._request(b"SR", b"?")
+        if not resp.startswith(b'='):
+            raise HVControllerError(f"Unexpected response {resp.decode('ascii')}")
         # data part is after '='
         val_str = resp[1:]
         try:
@@ -267,75 +343,226 @@ class HVController:
             }
             return status
         except ValueError:
-            raise HVControllerError(f"Cannot parse status register: {val_str}")
+            raise HVControllerError(f"Cannot parse status register: {val_str.decode('ascii')}")
 
-    def _start_monitor(self, name: str, read_func, callback=None, interval: float = 1.0) -> None:
+    #
+    # Telemetry scheduler
+    #
+
+    def _scheduler_running(self) -> bool:
+        return self.scheduler_thread is not None and self.scheduler_thread.is_alive()
+
+    def _start_scheduler(self) -> None:
+        if self._scheduler_running():
+            return
+        self.scheduler_stop.clear()
+        self.scheduler_thread = threading.Thread(target=self._scheduler_loop, daemon=True)
+        self.scheduler_thread.start()
+
+    def _stop_scheduler(self) -> None:
+        if not self._scheduler_running():
+            return
+        self.scheduler_stop.set()
+        self.command_queue.put(None)  # Wake up
+        self.scheduler_thread.join(timeout=2 * self.timeout + 1.0)
+        if self.scheduler_thread.is_alive():
+            print("Warning: HV telemetry scheduler did not stop gracefully")
+        # Fail whatever is still queued instead of letting the callers time out
+        while True:
+            try:
+                request = self.command_queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is not None:
+                request.error = HVControllerError("Telemetry scheduler stopped")
+                request.done.set()
+
+    def _scheduler_loop(self) -> None:
+        while not self.scheduler_stop.is_set():
+            name, entry = self._next_due_monitor()
+            timeout = 0.1 if entry is None else entry['next_due'] - time.perf_counter()
+            try:
+                if timeout > 0:
+                    request = self.command_queue.get(timeout=timeout)
+                else:
+                    request = self.command_queue.get_nowait()
+            except queue.Empty:
+                request = None
+
+            if request is not None:
+                self._serve_command(request)
+            elif entry is not None and entry['next_due'] <= time.perf_counter():
+                self._sample_monitor(name, entry)
+
+    def _next_due_monitor(self):
+        """Monitor with the earliest deadline, (None, None) if there are none."""
+        with self.monitors_lock:
+            if not self.monitors:
+                return None, None
+            return min(self.monitors.items(), key=lambda item: item[1]['next_due'])
+
+    def _serve_command(self, request: QueuedCommand) -> None:
+        if request.cancelled:
+            return
+        started = time.perf_counter()
+        try:
+            request.response = self._transact(request.cmd, request.operator, request.data, request.expect_response)
+        except Exception as e:
+            request.error = e
+        self.command_busy.tick(time.perf_counter() - started)
+        request.done.set()
+
+    def _sample_monitor(self, name: str, entry: dict) -> None:
+        started = time.perf_counter()
+        entry['jitter'].add(started - entry['next_due'])
+        try:
+            value = entry['read_func']()
+        except Exception as e:
+            # Also serial errors (e.g. USB unplugged), the scheduler thread has to keep serving the other monitors
+            print(f"Error reading {name}: {e}")
+            value = None
+            entry['errors'] += 1
+        else:
+            entry['rate'].tick(now=started)
+        finished = time.perf_counter()
+        entry['round_trip'] = finished - started if entry['round_trip'] is None else 0.8 * entry['round_trip'] + 0.2 * (finished - started)
+        self.telemetry_busy.tick(finished - started, now=finished)
+
+        entry['value'] = value
+        if value is not None:
+            timestamp = time.monotonic()
+            if isinstance(value, (int, float)):
+                entry['history'].append(value, timestamp)
+            if name == 'status':
+                self.output_enabled = value.get("Enabled") == "1"
+            self._adapt_interval(entry)
+
+        # Fixed rate grid, a late sample does not cause a burst of catch-up reads
+        scale = self._budget_scale() if entry['budgeted'] else 1.0
+        entry['next_due'] = max(entry['next_due'] + entry['interval'] * scale, finished)
+        if value is None:
+            return
+        # Listeners (e.g. the arc detector) run on the scheduler thread before any GUI callback
+        # One failing consumer must not stop the telemetry of the others
+        for listener in self.sample_listeners:
+            try:
+                listener(name, timestamp, value)
+            except Exception as e:
+                print(f"[HV] Sample listener failed on {name}: {e}")
+                entry['callback_errors'] += 1
+        if entry['callback']:
+            try:
+                entry['callback'](value)
+            except Exception as e:
+                print(f"[HV] {name.capitalize()} callback failed: {e}")
+                entry['callback_errors'] += 1
+
+    def _on_setpoint_change(self) -> None:
+        """V1= / EN= sent: poll the adaptive monitors at their fastest rate from now on."""
+        now = time.perf_counter()
+        self.last_setpoint_change = now
+        with self.monitors_lock:
+            for entry in self.monitors.values():
+                if entry['min_interval'] < entry['max_interval']:
+                    entry['interval'] = entry['min_interval']
+                    entry['next_due'] = min(entry['next_due'], now + entry['min_interval'])
+
+    def _signal_active(self, entry: dict) -> bool:
+        """
+        Newest step of a numeric monitor more than activity_ratio times its median step over the preceding readings.
+        Steps instead of deviations from the mean, so a finished ramp does not hide noise that follows it.
+        """
+        _, values = entry['history'].last(33)
+        if values.size < 9:
+            return False
+        steps = np.abs(np.diff(values.astype(np.float64)))
+        floor = 1e-3 * abs(float(values[-1])) + 1e-6
+        return steps[-1] > max(self.activity_ratio * float(np.median(steps[:-1])), floor)
+
+    def _adapt_interval(self, entry: dict) -> None:
+        if entry['min_interval'] >= entry['max_interval']:
+            return
+        if self.last_setpoint_change is not None and time.perf_counter() - self.last_setpoint_change < self.activity_hold:
+            entry['interval'] = entry['min_interval']
+        elif self._signal_active(entry):
+            entry['interval'] = entry['min_interval']
+        elif self.output_enabled is False:
+            entry['interval'] = entry['max_interval']
+        else:
+            # Stable, back off gradually
+            entry['interval'] = min(entry['max_interval'], entry['interval'] * 1.25)
+
+    def _budget_scale(self) -> float:
         """
-        Start a background thread to monitor a parameter.
-        
+        Factor to stretch the intervals of the budgeted monitors by so the telemetry stays within link_budget of the
+        port time. Exempt monitors (the current feeding the arc detector) keep their rate and use up budget first,
+        the budgeted ones keep at least a tenth of it.
+        """
+        demand = exempt = 0.0
+        with self.monitors_lock:
+            for entry in self.monitors.values():
+                if entry['round_trip']:
+                    if entry['budgeted']:
+                        demand += entry['round_trip'] / entry['interval']
+                    else:
+                        exempt += entry['round_trip'] / entry['interval']
+        return max(1.0, demand / max(self.link_budget - exempt, 0.1 * self.link_budget))
+
+    def _start_monitor(self, name: str, read_func, callback=None, interval: float = 1.0, history_size: int = 4096,
+                       min_interval: float = None, max_interval: float = None, budgeted: bool = True) -> None:
+        """
+        Register a parameter with the telemetry scheduler.
+
         :param name: Unique name for this monitor (e.g., 'voltage', 'current')
         :param read_func: Function to call to read the parameter value
         :param callback: Optional callback function to call with the new value
-        :param interval: Time in seconds between readings (default 1.0)
+        :param interval: Time in seconds between readings (default 1.0), the starting interval for adaptive monitors
+        :param history_size: Number of numeric readings kept, see get_monitor_history()
+        :param min_interval: Fastest interval while the signal is active, adaptive polling if below max_interval
+        :param max_interval: Slowest interval while the signal is stable or the output is disabled
+        :param budgeted: Stretched by the link budget, False for safety monitors that must keep their rate
         """
         if self.ser is None or not self.ser.is_open:
             raise HVControllerError("Serial port not connected; cannot start monitor")
-        
-        if name in self.monitors and self.monitors[name]['thread'].is_alive():
-            print(f"{name.capitalize()} monitor already running")
-            return
 
-        # Create stop event for this monitor
-        stop_event = threading.Event()
-
-        def monitor():
-            while not stop_event.is_set():
-                try:
-                    value = read_func()
-                    self.monitors[name]['value'] = value
-                    if callback:
-                        callback(value)
-                except HVControllerError as e:
-                    print(f"Error reading {name}: {e}")
-                    self.monitors[name]['value'] = None
-                
-                # Use wait instead of sleep to allow for immediate shutdown
-                if stop_event.wait(timeout=interval):
-                    break
-
-        thread = threading.Thread(target=monitor, daemon=True)
-        
-        # Store monitor data
-        self.monitors[name] = {
-            'thread': thread,
-            'stop_event': stop_event,
-            'value': None,
-            'callback': callback
-        }
-        
-        thread.start()
+        with self.monitors_lock:
+            if name in self.monitors:
+                print(f"{name.capitalize()} monitor already running")
+                return
+            self.monitors[name] = {
+                'read_func': read_func,
+                'callback': callback,
+                'interval': interval,
+                'min_interval': min_interval if min_interval is not None else interval,
+                'max_interval': max_interval if max_interval is not None else interval,
+                'round_trip': None,  # Smoothed duration of a read, for the link budget
+                'budgeted': budgeted,
+                'value': None,
+                'next_due': time.perf_counter(),
+                'rate': RateMeter(window=max(1.0, 5 * (max_interval or interval))),
+                'jitter': LatencyStats(maxlen=1000),  # Sample start - scheduled time
+                'errors': 0,
+                'callback_errors': 0,  # Exceptions raised by the sample listeners or the callback
+                'history': SignalBuffer(history_size),
+            }
+
+        self._start_scheduler()
 
     def _stop_monitor(self, name: str) -> None:
         """
-        Stop a specific monitoring thread gracefully.
-        
+        Remove a parameter from the telemetry scheduler.
+
         :param name: Name of the monitor to stop
         """
-        if name in self.monitors and self.monitors[name]['thread'].is_alive():
-            self.monitors[name]['stop_event'].set()
-            self.monitors[name]['thread'].join(timeout=2.0)
-            if self.monitors[name]['thread'].is_alive():
-                print(f"Warning: {name.capitalize()} monitor thread did not stop gracefully")
-            # Remove from monitors dictionary
-            del self.monitors[name]
+        with self.monitors_lock:
+            self.monitors.pop(name, None)
 
     def _stop_all_monitors(self) -> None:
         """
-        Stop all monitoring threads gracefully.
+        Remove all parameters from the telemetry scheduler.
         """
-        monitor_names = list(self.monitors.keys())
-        for name in monitor_names:
-            self._stop_monitor(name)
+        with self.monitors_lock:
+            self.monitors.clear()
 
     def get_monitor_value(self, name: str):
         """
@@ -348,13 +575,83 @@ class HVController:
             return self.monitors[name]['value']
         return None
 
-    def start_voltage_monitor(self, callback=None, interval: float = 1.0) -> None:
+    def get_monitor_history(self, name: str) -> SignalBuffer | None:
         """
-        Start a background thread to monitor voltage.
+        Timestamped history of a numeric monitor (time.monotonic() clock), e.g.
+        get_monitor_history('current').stats(seconds=5.0) or get_monitor_history('voltage').last(100).
+        Reading it does not block the telemetry scheduler.
+
+        :param name: Name of the monitor (e.g., 'voltage', 'current')
+        :return: SignalBuffer or None if the monitor is not running
+        """
+        entry = self.monitors.get(name)
+        return entry['history'] if entry is not None else None
+
+    def add_sample_listener(self, listener) -> None:
+        """
+        Call listener(name, timestamp, value) for every successful monitor reading.
+        Listeners run on the telemetry scheduler thread, they have to be quick and must not touch the GUI.
+        """
+        if listener not in self.sample_listeners:
+            self.sample_listeners = self.sample_listeners + [listener]
+
+    def remove_sample_listener(self, listener) -> None:
+        self.sample_listeners = [l for l in self.sample_listeners if l is not listener]
+
+    def get_telemetry_stats(self) -> dict:
+        """
+        Per monitor: present target rate and bounds, achieved rate, scheduling jitter, read and callback errors.
+        'commands': queued command latency, 'link': share of the port time used by telemetry and commands.
+        """
+        with self.monitors_lock:
+            monitors = list(self.monitors.items())
+        budget_scale = self._budget_scale()
+        stats = {}
+        for name, entry in monitors:
+            stats[name] = {
+                'target_rate': 1.0 / (entry['interval'] * (budget_scale if entry['budgeted'] else 1.0)),
+                'min_rate': 1.0 / entry['max_interval'],
+                'max_rate': 1.0 / entry['min_interval'],
+                'achieved_rate': entry['rate'].average_rate(),
+                'current_rate': entry['rate'].rate,
+                'samples': entry['rate'].total,
+                'jitter': entry['jitter'].summary(),
+                'errors': entry['errors'],
+                'callback_errors': entry['callback_errors'],
+            }
+        stats['commands'] = self.command_latency.summary()
+        stats['link'] = {
+            'telemetry_share': self.telemetry_busy.rate,
+            'command_share': self.command_busy.rate,
+            'budget': self.link_budget,
+            'budget_scale': budget_scale,
+        }
+        return stats
+
+    def print_telemetry_stats(self) -> None:
+        stats = self.get_telemetry_stats()
+        stats.pop('commands')
+        link = stats.pop('link')
+        for name, s in stats.items():
+            jitter = s['jitter']
+            jitter_text = f"p50={jitter['p50_ms']:.1f} ms, p99={jitter['p99_ms']:.1f} ms" if jitter['p50_ms'] is not None else "n/a"
+            print(f"[HV] {name}: {s['achieved_rate']:.2f}/{s['target_rate']:.2f} Hz "
+                  f"({s['min_rate']:.2f}-{s['max_rate']:.2f}), jitter {jitter_text}, errors {s['errors']}"
+                  + (f", callback errors {s['callback_errors']}" if s['callback_errors'] else ""))
+        print(f"[HV] Commands: {self.command_latency}")
+        print(f"[HV] Link: telemetry {link['telemetry_share']:.0%} (budget {link['budget']:.0%}, x{link['budget_scale']:.2f}), "
+              f"commands {link['command_share']:.0%}")
+
+    def start_voltage_monitor(self, callback=None, interval: float = 1.0, min_interval: float = None,
+                              max_interval: float = None) -> None:
+        """
+        Monitor the output voltage on the telemetry scheduler.
         The latest voltage is stored and accessible via get_monitor_value('voltage').
         
         :param callback: Optional callback function to call with voltage updates
         :param interval: Time in seconds between readings (default 1.0)
+        :param min_interval: Adaptive polling bounds, see _start_monitor()
+        :param max_interval: Adaptive polling bounds, see _start_monitor()
         """
         # Use provided callback or fall back to legacy self.on_voltage_update
         cb = callback if callback is not None else self.on_voltage_update
@@ -365,47 +662,65 @@ class HVController:
             if cb:
                 cb(value)
         
-        self._start_monitor('voltage', self.get_output_voltage, voltage_callback, interval)
+        self._start_monitor('voltage', self.get_output_voltage, voltage_callback, interval,
+                            min_interval=min_interval, max_interval=max_interval)
 
     def stop_voltage_monitor(self) -> None:
         """
-        Stop the voltage monitoring thread gracefully.
+        Stop monitoring the output voltage.
         """
         self._stop_monitor('voltage')
         self.voltage_monitor = None
 
-    def start_current_monitor(self, callback=None, interval: float = 1.0) -> None:
+    def start_current_monitor(self, callback=None, interval: float = 1.0, min_interval: float = None,
+                              max_interval: float = None, budgeted: bool = False) -> None:
         """
-        Start a background thread to monitor current.
+        Monitor the output current on the telemetry scheduler.
         The latest current is accessible via get_monitor_value('current').
         
         :param callback: Optional callback function to call with current updates
         :param interval: Time in seconds between readings (default 1.0)
+        :param min_interval: Adaptive polling bounds, see _start_monitor()
+        :param max_interval: Adaptive polling bounds, see _start_monitor()
+        :param budgeted: The current feeds the arc detector, by default it is exempt from the link budget
         """
-        self._start_monitor('current', self.get_output_current, callback, interval)
+        self._start_monitor('current', self.get_output_current, callback, interval,
+                            min_interval=min_interval, max_interval=max_interval, budgeted=budgeted)
 
     def stop_current_monitor(self) -> None:
         """
-        Stop the current monitoring thread gracefully.
+        Stop monitoring the output current.
         """
         self._stop_monitor('current')
+
+    def start_status_monitor(self, callback=None, interval: float = 1.0) -> None:
+        """
+        Monitor the status register, the latest status dict is accessible via get_monitor_value('status').
+
+        :param callback: Optional callback function to call with status updates
+        :param interval: Time in seconds between readings (default 1.0)
+        """
+        self._start_monitor('status', self.get_status, callback, interval)
+
+    def stop_status_monitor(self) -> None:
+        self._stop_monitor('status')
     
     def get_output_voltage(self) -> float:
         """
         Read the actual output voltage (M0?)
         """
-        resp = self._send_command(cmd="M0", operator="?", data="")
-        if not resp.startswith('='):
-            raise HVControllerError(f"Unexpected response {resp}")
+        resp = self._request(b"M0", b"?")
+        if not resp.startswith(b'='):
+            raise HVControllerError(f"Unexpected response {resp.decode('ascii')}")
         return float(resp[1:])
 
     def get_output_current(self) -> float:
         """
         Read the actual output current (M1?)
         """
-        resp = self._send_command(cmd="M1", operator="?", data="")
-        if not resp.startswith('='):
-            raise HVControllerError(f"Unexpected response {resp}")
+        resp = self._request(b"M1", b"?")
+        if not resp.startswith(b'='):
+            raise HVControllerError(f"Unexpected response {resp.decode('ascii')}")
         return float(resp[1:])
 
 
@@ -1,28 +1,63 @@
 from GUI.mainwindow import Ui_MainWindow
 from GUI.HVControl import HVController
+from GUI.ArcDetector import ArcDetector, ArcEvent
+from GUI.HVRamp import HVRamp
 from GUI.GPIOControl import GPIOController
+from GUI.UIUpdateBridge import UIUpdateBridge
+from GUI.CommandExecutor import CommandExecutor
 
 from GUI.ConfigParser import get_config_parser
 
 
 class HVControlBhv:
-    def __init__(self, ui: Ui_MainWindow, hv_controller: HVController, gpio_controller: GPIOController):
+    def __init__(self, ui: Ui_MainWindow, hv_controller: HVController, gpio_controller: GPIOController,
+                 ui_bridge: UIUpdateBridge, executor: CommandExecutor):
         self.ui = ui
         self.hv_controller = hv_controller
         self.gpio_controller = gpio_controller
+        self.ui_bridge = ui_bridge
+        self.executor = executor  # All HV serial I/O runs on the 'hv' lane, never on the GUI thread
+        self.arc_detector: ArcDetector = None
+        self.hv_ramp: HVRamp = None
 
         self.init()
         self.connections()
     
     def init(self):
-        pass
+        # Telemetry, ramp and arc detector callbacks run on worker threads, widgets are only touched on the GUI thread
+        self.ui_bridge.register("hv_voltage", self._show_voltage)
+        self.ui_bridge.register("hv_current", self._show_current)
+        self.ui_bridge.register("hv_ramp", self._show_ramp_progress)
+        self.ui_bridge.register("hv_trip", self._show_arc_trip)
+
+        config = get_config_parser()
+        self.hv_ramp = HVRamp(
+            self.hv_controller,
+            slew_rate=config.getfloat("HVControl", "RampSlewRate", fallback=1000.0),
+            max_lag=config.getfloat("HVControl", "RampMaxLag", fallback=500.0),
+            hold_warning=config.getfloat("HVControl", "RampHoldWarning", fallback=10.0),
+            on_progress=self.on_ramp_progress,
+        )
+        if config.getboolean("ArcDetector", "Enabled", fallback=True):
+            self.arc_detector = ArcDetector(
+                self.gpio_controller,
+                max_current=config.getfloat("ArcDetector", "MaxCurrent", fallback=50.0),
+                current_sigma=config.getfloat("ArcDetector", "CurrentSigma", fallback=6.0),
+                min_current_jump=config.getfloat("ArcDetector", "MinCurrentJump", fallback=2.0),
+                max_current_slope=config.getfloat("ArcDetector", "MaxCurrentSlope", fallback=200.0),
+                max_voltage_drop_rate=config.getfloat("ArcDetector", "MaxVoltageDropRate", fallback=5000.0),
+                baseline_samples=config.getint("ArcDetector", "BaselineSamples", fallback=20),
+                on_trip=self.on_arc_trip,
+            )
 
     def connections(self):
         self.ui.HV_power_checkBox.stateChanged.connect(self.toggle_HV_power)
         self.ui.HV_connect_pushButton.clicked.connect(self.connect)
 
         self.ui.HV_set_target_voltage_pushButton.clicked.connect(
-            lambda: self.hv_controller.set_voltage(self.ui.HV_target_voltage_spinBox.value())
+            lambda: self.executor.run("hv", self.hv_ramp.start, self.ui.HV_target_voltage_spinBox.value(),
+                                      widgets=(self.ui.HV_set_target_voltage_pushButton,),
+                                      description="Start HV ramp")
         )
         self.ui.HV_enable_pushButton.clicked.connect(self.toggle_HV_enable)
     
@@ -36,51 +71,114 @@ class HVControlBhv:
         self.ui.HV_connect_pushButton.setEnabled(hv_power_on)
     
     def connect(self):
-        try:
-            self.hv_controller.connect()
-            self.hv_controller.close()  # Close immediately to reset any previous state
-            self.hv_controller.connect()
-            self.ui.HV_connect_pushButton.setText("Disconnect")
-            self.ui.HV_connect_pushButton.clicked.disconnect()
-            self.ui.HV_connect_pushButton.clicked.connect(self.disconnect)
-            self.ui.HV_connected_groupBox.setEnabled(True)
-            self.hv_controller.set_enable_state(False)
-            self.hv_controller.set_voltage(0.0)
-            
-            # Start monitoring with callback
-            self.hv_controller.start_voltage_monitor(callback=self.on_voltage_update)
-            self.hv_controller.start_current_monitor(callback=self.on_current_update)
-        except Exception as e:
-            print(f"Failed to connect to HV power supply: {e}")
-        
+        self.executor.run("hv", self._connect_device,
+                          widgets=(self.ui.HV_connect_pushButton,),
+                          on_done=self._on_connected,
+                          description="Connect to HV power supply")
+
+    def _connect_device(self):
+        """Runs on the 'hv' lane."""
+        self.hv_controller.connect()
+        self.hv_controller.close()  # Close immediately to reset any previous state
+        self.hv_controller.connect()
+        self.hv_controller.set_enable_state(False)
+        self.hv_controller.set_voltage(0.0)
+
+        # Start monitoring with callback, all monitors share the controller's telemetry scheduler
+        config = get_config_parser()
+        self.hv_controller.link_budget = config.getfloat("HVControl", "TelemetryLinkBudget", fallback=0.6)
+        self.hv_controller.activity_hold = config.getfloat("HVControl", "ActivityHold", fallback=2.0)
+        min_interval = config.getfloat("HVControl", "MonitorMinInterval", fallback=0.05)
+        max_interval = config.getfloat("HVControl", "MonitorMaxInterval", fallback=1.0)
+        self.hv_controller.start_voltage_monitor(callback=self.on_voltage_update,
+                                                 interval=config.getfloat("HVControl", "VoltageMonitorInterval", fallback=0.25),
+                                                 min_interval=min_interval, max_interval=max_interval)
+        self.hv_controller.start_current_monitor(callback=self.on_current_update,
+                                                 interval=config.getfloat("HVControl", "CurrentMonitorInterval", fallback=0.25),
+                                                 min_interval=min_interval, max_interval=max_interval)
+        self.hv_controller.start_status_monitor(interval=config.getfloat("HVControl", "StatusMonitorInterval", fallback=1.0))
+        if self.arc_detector:
+            self.arc_detector.reset()
+            self.arc_detector.attach(self.hv_controller)
+
+    def _on_connected(self, _):
+        self.ui.HV_connect_pushButton.setText("Disconnect")
+        self.ui.HV_connect_pushButton.clicked.disconnect()
+        self.ui.HV_connect_pushButton.clicked.connect(self.disconnect)
+        self.ui.HV_connected_groupBox.setEnabled(True)
+
     def disconnect(self):
+        self.ui.HV_connected_groupBox.setEnabled(False)
+        self.executor.run("hv", self._disconnect_device,
+                          widgets=(self.ui.HV_connect_pushButton,),
+                          on_done=self._on_disconnected,
+                          on_error=lambda e: self.ui.HV_connected_groupBox.setEnabled(True),
+                          description="Disconnect HV power supply")
+
+    def _disconnect_device(self):
+        """Runs on the 'hv' lane."""
+        self.hv_ramp.cancel()
+        if self.arc_detector:
+            self.arc_detector.detach()
         self.hv_controller.set_voltage(0.0)
         self.hv_controller.set_enable_state(False)
+        self.hv_controller.print_telemetry_stats()
         self.hv_controller.close()
+
+    def _on_disconnected(self, _):
         self.ui.HV_connect_pushButton.setText("Connect")
         self.ui.HV_connect_pushButton.clicked.disconnect()
         self.ui.HV_connect_pushButton.clicked.connect(self.connect)
-        self.ui.HV_connected_groupBox.setEnabled(False)
-        self.ui.HV_live_voltage_label.setText("Voltage: NaN V")
-        self.ui.HV_live_current_label.setText("Current: NaN μA")
+        # Through the bridge, so a reading still pending from the monitors cannot overwrite it
+        self.ui_bridge.post("hv_voltage", None)
+        self.ui_bridge.post("hv_current", None)
 
     def toggle_HV_enable(self):
         hv_enable_on = self.ui.HV_enable_pushButton.isChecked()
+        if hv_enable_on and self.arc_detector:
+            self.arc_detector.reset()  # Enabling again acknowledges the last trip
         self.gpio_controller.enable_HV(hv_enable_on)
         self.ui.HV_enable_pushButton.setText(f'{"Disable" if hv_enable_on else "Enable"}')
         self.ui.HV_state_label.setText(f'{"ON" if hv_enable_on else "OFF"}')
     
+    def on_arc_trip(self, event: ArcEvent):
+        """Called by the arc detector on the telemetry thread after it already dropped the HV enable GPIO."""
+        self.hv_ramp.abort(f"arc detector: {event.reason}")
+        self.ui_bridge.post("hv_trip", event.reason)
+
+    def on_ramp_progress(self, ramp: HVRamp):
+        """Called on the ramp thread after every step."""
+        if ramp.state in ("ramping", "holding"):
+            text = f"Ramp %p% ({ramp.setpoint:,.0f} V, ETA {ramp.eta:.1f} s)"
+        else:
+            text = f"Ramp {ramp.state} ({ramp.setpoint:,.0f} V)"
+        self.ui_bridge.post("hv_ramp", int(ramp.progress * 100), text)
+
     def on_voltage_update(self, voltage):
         """Callback for voltage monitor updates."""
+        self.ui_bridge.post("hv_voltage", voltage)
+
+    def on_current_update(self, current):
+        """Callback for current monitor updates."""
+        self.ui_bridge.post("hv_current", current)
+
+    def _show_arc_trip(self, reason: str):
+        self.ui.HV_enable_pushButton.setChecked(False)
+        self.ui.HV_enable_pushButton.setText("Enable")
+        self.ui.HV_state_label.setText(f"TRIP ({reason})")
+
+    def _show_ramp_progress(self, percent: int, text: str):
+        self.ui.HV_ramp_progressBar.setValue(percent)
+        self.ui.HV_ramp_progressBar.setFormat(text)
+
+    def _show_voltage(self, voltage):
         if voltage is not None:
             self.ui.HV_live_voltage_label.setText(f"Voltage: {int(voltage):,} V")
         else:
             self.ui.HV_live_voltage_label.setText("Voltage: NaN V")
-    
-    def on_current_update(self, current):
-        """Callback for current monitor updates (optional, for future use)."""
+
+    def _show_current(self, current):
         if current is not None:
             self.ui.HV_live_current_label.setText(f"Current: {current:.2f} μA")
         else:
             self.ui.HV_live_current_label.setText("Current: NaN μA")
-            pass
\ No newline at end of file
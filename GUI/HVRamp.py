@@ -0,0 +1,228 @@
+from bisect import bisect_right
+import threading
+import time
+
+from GUI.HVControl import HVController, HVControllerError
+from GUI.Instrumentation import LatencyStats
+
+
+class HVRamp:
+    """
+    Walks the V1 setpoint of an HVController towards a target at slew_rate V/s.
+
+    The setpoint follows the clock (start + slew_rate * elapsed), so the ramp takes distance / slew_rate no matter
+    how long a single V1= round-trip takes, every step just sends the setpoint that is due at that moment,
+    as fast as the link allows. When the M0 readback lags the setpoint that was commanded at the time of the
+    reading by more than max_lag, the clock is held until the output catches up. Not while the output is known to be
+    disabled (M0 reads about 0 V then), the setpoint follows the clock. A hold longer than hold_warning seconds is
+    logged, an open HV loop would otherwise stall the ramp without a word.
+    SR Fault / Over Current / Over Voltage aborts the ramp and leaves the setpoint where it is.
+
+    M0 and SR are taken from the controller's 'voltage' and 'status' monitors when they are running,
+    otherwise they are queried directly every readback_interval seconds.
+    """
+    def __init__(self, hv_controller: HVController, slew_rate: float = 1000.0, max_lag: float = 500.0,
+                 readback_interval: float = 0.25, hold_warning: float = 10.0, on_progress=None, on_finished=None):
+        self.hv_controller = hv_controller
+        self.slew_rate = slew_rate  # V/s
+        self.max_lag = max_lag  # V
+        self.readback_interval = readback_interval  # s
+        self.hold_warning = hold_warning  # s
+        self.on_progress = on_progress  # on_progress(ramp), called on the ramp thread after every step
+        self.on_finished = on_finished  # on_finished(ramp), called on the ramp thread
+
+        self.state = "idle"  # idle, ramping, holding, done, aborted, cancelled
+        self.reason = None  # Why the ramp was aborted
+        self.start_voltage = 0.0
+        self.target = 0.0
+        self.setpoint = 0.0
+        self.started_at = None
+        self.finished_at = None
+
+        self._thread = None
+        self._cancel = threading.Event()
+        self._abort_reason = None
+        self._commanded = []  # (time.monotonic(), setpoint) of every step, to compare against M0 readings
+        self._last_status_read = 0.0
+        self._last_voltage_read = 0.0
+        self._readback = None  # (time.monotonic(), M0)
+
+        # Instrumentation
+        self.steps = 0
+        self.step_time = LatencyStats()  # V1= round-trip per step
+        self.hold_time = 0.0
+        self.long_holds = 0  # Holds logged for lasting longer than hold_warning
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def progress(self) -> float:
+        """0.0 .. 1.0"""
+        distance = abs(self.target - self.start_voltage)
+        if distance == 0:
+            return 1.0 if self.state == "done" else 0.0
+        return min(1.0, abs(self.setpoint - self.start_voltage) / distance)
+
+    @property
+    def eta(self) -> float:
+        """Remaining time in seconds at the configured slew rate."""
+        return abs(self.target - self.setpoint) / self.slew_rate
+
+    @property
+    def duration(self) -> float | None:
+        if self.started_at is None:
+            return None
+        return (self.finished_at or time.perf_counter()) - self.started_at
+
+    def start(self, target: float, start_voltage: float = None) -> None:
+        """Ramp from start_voltage (default: the present V1 setpoint) to target. A running ramp is cancelled first."""
+        self.cancel()
+        if start_voltage is None:
+            start_voltage = self.hv_controller.get_voltage()
+        self.start_voltage = self.setpoint = start_voltage
+        self.target = target
+        self.state = "ramping"
+        self.reason = None
+        self.started_at = time.perf_counter()
+        self.finished_at = None
+        self.steps = 0
+        self.step_time.reset()
+        self.hold_time = 0.0
+        self.long_holds = 0
+        self._abort_reason = None
+        self._commanded = [(time.monotonic(), start_voltage)]
+        self._readback = None
+        self._last_status_read = self._last_voltage_read = 0.0
+        self._cancel.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def cancel(self) -> None:
+        """Stop the ramp at the present setpoint and wait for the ramp thread."""
+        if self.running:
+            self._cancel.set()
+            self._thread.join(timeout=2 * self.hv_controller.timeout + 2.0)
+
+    def abort(self, reason: str) -> None:
+        """Stop the ramp without waiting, safe to call from the telemetry thread (e.g. arc detector callbacks)."""
+        self._abort_reason = reason
+        self._cancel.set()
+
+    def wait(self, timeout: float = None) -> bool:
+        """Wait until the ramp is finished, returns False on timeout."""
+        if self._thread is None:
+            return True
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def _run(self):
+        direction = 1.0 if self.target >= self.start_voltage else -1.0
+        distance = abs(self.target - self.start_voltage)
+        clock_start = time.perf_counter()
+        last = clock_start
+        # A step is sent one round-trip ahead, so the setpoint is at the device when it is due and the last
+        # step does not add a round-trip to the ramp duration
+        lead = 0.0
+        hold_started = None
+        try:
+            while True:
+                if self._cancel.is_set():
+                    if self._abort_reason is not None:
+                        self._finish("aborted", self._abort_reason)
+                    else:
+                        self._finish("cancelled")
+                    return
+                fault = self._read_fault()
+                if fault:
+                    self._finish("aborted", f"SR {fault}")
+                    return
+
+                now = time.perf_counter()
+                if self._lagging(direction):
+                    self.hold_time += now - last
+                    self.state = "holding"
+                    if hold_started is None:
+                        hold_started = now
+                    elif hold_started is not False and now - hold_started > self.hold_warning:
+                        hold_started = False  # Logged once per hold
+                        self.long_holds += 1
+                        _, voltage = self._readback
+                        print(f"[HV] Ramp holding for more than {self.hold_warning:.0f} s at {self.setpoint:.1f} V: "
+                              f"M0 reads {voltage:.1f} V (max lag {self.max_lag:.0f} V), is the output following?")
+                else:
+                    self.state = "ramping"
+                    hold_started = None
+                last = now
+
+                travelled = min(distance, self.slew_rate * (now + lead - clock_start - self.hold_time))
+                setpoint = round(self.start_voltage + direction * travelled, 1)  # V1 resolution
+                if travelled >= distance:
+                    setpoint = self.target
+                if setpoint != self.setpoint:
+                    step_started = time.perf_counter()
+                    self.hv_controller.set_voltage(setpoint)
+                    round_trip = time.perf_counter() - step_started
+                    self.step_time.add(round_trip)
+                    lead = round_trip if lead == 0.0 else 0.8 * lead + 0.2 * round_trip
+                    self.steps += 1
+                    self.setpoint = setpoint
+                    self._commanded.append((time.monotonic(), setpoint))
+                    if self.on_progress:
+                        self.on_progress(self)
+                elif travelled < distance:
+                    self._cancel.wait(0.01)  # Next 0.1 V step not due yet
+                if travelled >= distance and self.setpoint == self.target:
+                    self._finish("done")
+                    return
+        except HVControllerError as e:
+            self._finish("aborted", str(e))
+
+    def _finish(self, state: str, reason: str = None):
+        self.state = state
+        self.reason = reason
+        self.finished_at = time.perf_counter()
+        if reason:
+            print(f"[HV] Ramp {state} at {self.setpoint:.1f} V: {reason}")
+        if self.on_progress:
+            self.on_progress(self)
+        if self.on_finished:
+            self.on_finished(self)
+
+    def _monitored(self, name: str) -> bool:
+        return name in self.hv_controller.monitors
+
+    def _read_fault(self) -> str | None:
+        if self._monitored('status'):
+            status = self.hv_controller.get_monitor_value('status')
+        elif time.perf_counter() - self._last_status_read >= self.readback_interval:
+            self._last_status_read = time.perf_counter()
+            status = self.hv_controller.get_status()
+        else:
+            return None
+        if status:
+            for bit in ("Fault", "Over Current", "Over Voltage"):
+                if status.get(bit) == "1":
+                    return bit
+        return None
+
+    def _lagging(self, direction: float) -> bool:
+        if self.hv_controller.output_enabled is False:
+            return False  # Disabled output reads about 0 V, follow the clock
+        if self._monitored('voltage'):
+            history = self.hv_controller.get_monitor_history('voltage')
+            readback = history.latest() if history is not None else None
+        elif time.perf_counter() - self._last_voltage_read >= self.readback_interval:
+            self._last_voltage_read = time.perf_counter()
+            readback = (time.monotonic(), self.hv_controller.get_output_voltage())
+        else:
+            readback = self._readback
+        if readback is None:
+            return False
+        self._readback = readback
+        sample_time, voltage = readback
+        # Setpoint that was in force when M0 was read, a stale reading must not look like lag
+        index = bisect_right(self._commanded, (sample_time, float('inf'))) - 1
+        commanded = self._commanded[max(index, 0)][1]
+        return direction * (commanded - voltage) > self.max_lag
@@ -0,0 +1,328 @@
+import os
+import pty
+import random
+import select
+import threading
+import time
+import tty
+
+
+STX = 0x02
+LF = 0x0A
+
+# Status register bits (see HVController.get_status)
+SR_ENABLED = 0x01
+SR_FAULT = 0x02
+SR_OVER_VOLTAGE = 0x04
+SR_OVER_CURRENT = 0x08
+SR_OVER_TEMPERATURE = 0x10
+SR_SUPPLY_RAIL = 0x20
+SR_HARDWARE_ENABLE = 0x40
+SR_SOFTWARE_ENABLE = 0x80
+
+
+def checksum(body: bytes) -> bytes:
+    """MPD checksum of ADDR..DATA: 0x200 - sum, lower 8 bits, bit7 cleared, bit6 set, two uppercase hex chars."""
+    value = ((0x200 - sum(body)) & 0x7F) | 0x40
+    return f"{value:02X}".encode('ascii')
+
+
+class HVSimulator:
+    """
+    Simulated MPD high voltage supply served on a pseudo-terminal, HVController(port=simulator.port) talks to it.
+
+    Speaks the <STX><ADDR><DEVTYPE><CMD><OPERATOR><DATA><CSUM><LF> framing for V1, I1, EN, SR, M0 and M1.
+    The output voltage follows the V1 setpoint with a first order lag while enabled, the current is
+    voltage / load_resistance and is limited by I1.
+
+    Failure injection:
+    - reply_delay (+ reply_jitter) seconds before every reply
+    - voltage_noise / current_noise: standard deviation added to M0 / M1 readings
+    - fault_rate: probability that SR reports a random fault bit, inject_fault() forces bits
+    - corrupt_rate: probability of a reply with a wrong checksum
+    - drop_rate: probability that a request gets no reply at all
+    - inject_arc(): current spike with voltage sag, hardware_enable models the HV enable GPIO input
+    """
+    def __init__(self, addr: str = "01", devtype: str = "09", baudrate: int = 9600,
+                 reply_delay: float = 0.002, reply_jitter: float = 0.0, voltage_noise: float = 0.0,
+                 current_noise: float = 0.0, fault_rate: float = 0.0, corrupt_rate: float = 0.0,
+                 drop_rate: float = 0.0, time_constant: float = 0.2, load_resistance: float = 1e9,
+                 max_voltage: float = 30000.0, seed: int = None):
+        self.addr = addr.encode('ascii')
+        self.devtype = devtype.encode('ascii')
+        self.baudrate = baudrate
+        self.reply_delay = reply_delay
+        self.reply_jitter = reply_jitter
+        self.voltage_noise = voltage_noise
+        self.current_noise = current_noise
+        self.fault_rate = fault_rate
+        self.corrupt_rate = corrupt_rate
+        self.drop_rate = drop_rate
+        self.time_constant = time_constant  # s
+        self.load_resistance = load_resistance  # Ohm
+        self.max_voltage = max_voltage
+        self._random = random.Random(seed)
+
+        self.master_fd = None
+        self.port = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+        # Device state
+        self.voltage_setpoint = 0.0  # V
+        self.current_limit = 100.0  # uA
+        self.software_enable = False
+        self.hardware_enable = True
+        self._output_voltage = 0.0
+        self._last_update = time.perf_counter()
+        self._forced_faults = 0
+        self._forced_faults_until = None
+        self._arc_current = 0.0
+        self._arc_voltage_drop = 0.0
+        self._arc_until = None
+
+        # Instrumentation
+        self.requests = 0
+        self.replies = 0
+        self.dropped = 0
+        self.corrupted = 0
+        self.bad_requests = 0
+
+    def start(self):
+        self.master_fd, slave_fd = pty.openpty()
+        tty.setraw(slave_fd)
+        self.port = os.ttyname(slave_fd)
+        os.close(slave_fd)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._serial_loop, daemon=True)
+        self._thread.start()
+        print(f"[HV SIM] Serving on {self.port}")
+        return self.port
+
+    def close(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=1.0)
+        if self.master_fd is not None:
+            os.close(self.master_fd)
+            self.master_fd = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        self.close()
+
+    #
+    # Failure injection
+    #
+
+    def inject_fault(self, bits: int = SR_FAULT | SR_OVER_CURRENT, duration: float = None):
+        """Force status register bits for duration seconds (None = until clear_faults())."""
+        with self._lock:
+            self._forced_faults = bits
+            self._forced_faults_until = time.perf_counter() + duration if duration is not None else None
+
+    def clear_faults(self):
+        with self._lock:
+            self._forced_faults = 0
+            self._forced_faults_until = None
+
+    def inject_arc(self, current: float = 20.0, duration: float = 0.1, voltage_drop: float = 0.3):
+        """Arc / cone collapse: for duration seconds the output current rises by current uA and the voltage sags by voltage_drop (fraction)."""
+        with self._lock:
+            self._arc_current = current
+            self._arc_voltage_drop = voltage_drop
+            self._arc_until = time.perf_counter() + duration
+
+    def set_hardware_enable(self, enable: bool):
+        """HV enable input (GPIO), disabling it also quenches an arc."""
+        with self._lock:
+            self._update_output()
+            self.hardware_enable = enable
+            if not enable:
+                self._arc_until = None
+
+    #
+    # Device model
+    #
+
+    def _update_output(self):
+        """Advance the output voltage towards the setpoint (caller holds the lock)."""
+        now = time.perf_counter()
+        dt = now - self._last_update
+        self._last_update = now
+        target = self.voltage_setpoint if self.software_enable and self.hardware_enable else 0.0
+        if self.time_constant > 0:
+            alpha = min(1.0, dt / self.time_constant)
+            self._output_voltage += (target - self._output_voltage) * alpha
+        else:
+            self._output_voltage = target
+
+    def _arc_active(self) -> bool:
+        return self._arc_until is not None and time.perf_counter() < self._arc_until
+
+    def output_voltage(self) -> float:
+        with self._lock:
+            self._update_output()
+            if self._arc_active():
+                return self._output_voltage * (1.0 - self._arc_voltage_drop)
+            return self._output_voltage
+
+    def _load_current(self) -> float:
+        """Unlimited output current in uA (caller holds the lock)."""
+        current = self._output_voltage / self.load_resistance * 1e6
+        if self._arc_active():
+            current += self._arc_current
+        return current
+
+    def output_current(self) -> float:
+        """Output current in uA, limited by I1."""
+        with self._lock:
+            self._update_output()
+            return min(self._load_current(), self.current_limit)
+
+    def status_register(self) -> int:
+        with self._lock:
+            status = SR_HARDWARE_ENABLE if self.hardware_enable else 0
+            if self.software_enable:
+                status |= SR_SOFTWARE_ENABLE
+            if self.software_enable and self.hardware_enable:
+                status |= SR_ENABLED
+            self._update_output()
+            if self._load_current() >= self.current_limit:
+                status |= SR_OVER_CURRENT
+            if self._forced_faults_until is not None and time.perf_counter() > self._forced_faults_until:
+                self._forced_faults = 0
+                self._forced_faults_until = None
+            status |= self._forced_faults
+        if self.fault_rate and self._random.random() < self.fault_rate:
+            status |= SR_FAULT | self._random.choice((SR_OVER_VOLTAGE, SR_OVER_CURRENT, SR_OVER_TEMPERATURE, SR_SUPPLY_RAIL))
+        return status
+
+    def _handle(self, cmd: bytes, operator: bytes, data: bytes) -> tuple[bytes, bytes]:
+        """Execute a request, returns reply operator and data."""
+        if operator == b"?":
+            if cmd == b"V1":
+                return b"=", f"{self.voltage_setpoint:07.1f}".encode()
+            if cmd == b"I1":
+                return b"=", f"{self.current_limit:07.1f}".encode()
+            if cmd == b"EN":
+                return b"=", b"1" if self.software_enable else b"0"
+            if cmd == b"SR":
+                return b"=", f"{self.status_register():02X}".encode()
+            if cmd == b"M0":
+                value = self.output_voltage() + (self._random.gauss(0, self.voltage_noise) if self.voltage_noise else 0.0)
+                return b"=", f"{max(value, 0.0):07.1f}".encode()
+            if cmd == b"M1":
+                value = self.output_current() + (self._random.gauss(0, self.current_noise) if self.current_noise else 0.0)
+                return b"=", f"{max(value, 0.0):07.3f}".encode()
+        elif operator == b"=":
+            try:
+                if cmd == b"V1":
+                    with self._lock:
+                        self._update_output()
+                        self.voltage_setpoint = min(max(float(data), 0.0), self.max_voltage)
+                    return b"=", data
+                if cmd == b"I1":
+                    self.current_limit = max(float(data), 0.0)
+                    return b"=", data
+                if cmd == b"EN" and data in (b"0", b"1"):
+                    with self._lock:
+                        self._update_output()
+                        self.software_enable = data == b"1"
+                    return b"=", data
+            except ValueError:
+                pass
+        self.bad_requests += 1
+        return b"*", b""
+
+    #
+    # Serial side
+    #
+
+    def _serial_loop(self):
+        poller = select.poll()
+        poller.register(self.master_fd, select.POLLIN | select.POLLHUP)
+        byte_time = 10 / self.baudrate  # 8N1
+        frame = bytearray()
+        while not self._stop.is_set():
+            events = poller.poll(20)
+            if any(event & select.POLLHUP for _, event in events):
+                frame.clear()
+                time.sleep(0.01)
+                continue
+            if not events:
+                continue
+            try:
+                data = os.read(self.master_fd, 256)
+            except OSError:
+                continue
+            time.sleep(len(data) * byte_time)  # Request bytes arrive at the link rate
+            for byte in data:
+                if byte == STX:
+                    frame = bytearray()
+                    continue
+                if byte != LF:
+                    frame.append(byte)
+                    continue
+                reply = self._process_frame(bytes(frame))
+                frame.clear()
+                if reply:
+                    delay = self.reply_delay + (self._random.uniform(0, self.reply_jitter) if self.reply_jitter else 0.0)
+                    time.sleep(delay + len(reply) * byte_time)
+                    try:
+                        os.write(self.master_fd, reply)
+                    except OSError:
+                        pass
+
+    def _process_frame(self, frame: bytes) -> bytes | None:
+        """Validate a request frame (without STX and LF) and build the reply frame."""
+        self.requests += 1
+        frame = frame.rstrip(b"\r")
+        if len(frame) < 9:
+            self.bad_requests += 1
+            return None
+        body, csum = frame[:-2], frame[-2:]
+        if checksum(body) != csum.upper():
+            self.bad_requests += 1
+            return None  # The unit ignores frames with a wrong checksum
+        addr, devtype, cmd, operator, data = body[0:2], body[2:4], body[4:6], body[6:7], body[7:]
+        if addr != self.addr or devtype != self.devtype:
+            return None
+        reply_operator, reply_data = self._handle(cmd, operator, data)
+        if self.drop_rate and self._random.random() < self.drop_rate:
+            self.dropped += 1
+            return None
+        reply_body = self.addr + self.devtype + cmd + reply_operator + reply_data
+        reply_csum = checksum(reply_body)
+        if self.corrupt_rate and self._random.random() < self.corrupt_rate:
+            self.corrupted += 1
+            reply_csum = b"00" if reply_csum != b"00" else b"01"
+        self.replies += 1
+        return bytes([STX]) + reply_body + reply_csum + bytes([LF])
+
+    def stats(self) -> dict:
+        return {
+            'requests': self.requests,
+            'replies': self.replies,
+            'dropped': self.dropped,
+            'corrupted': self.corrupted,
+            'bad_requests': self.bad_requests,
+        }
+
+
+if __name__ == "__main__":
+    # Serve a simulated supply, e.g. point [HVControl] COMPort of ConfigFileLocal.ini to the printed port
+    simulator = HVSimulator(voltage_noise=5.0, current_noise=0.05)
+    simulator.start()
+    try:
+        while True:
+            time.sleep(5)
+            print(f"[HV SIM] {simulator.output_voltage():.1f} V, {simulator.output_current():.3f} uA, {simulator.stats()}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        simulator.close()
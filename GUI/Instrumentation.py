@@ -0,0 +1,112 @@
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+
+class LatencyStats:
+    """
+    Bounded store of latency samples (seconds) with a percentile summary.
+    Thread safe, adding a sample is O(1).
+    """
+    def __init__(self, maxlen: int = 10000):
+        self._samples = deque(maxlen=maxlen)
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+            self._count += 1
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._count = 0
+
+    def summary(self) -> dict:
+        """Return count, mean, p50, p99 and max of the kept samples in milliseconds."""
+        with self._lock:
+            samples = np.fromiter(self._samples, dtype=float, count=len(self._samples))
+            count = self._count
+        if samples.size == 0:
+            return {'count': count, 'mean_ms': None, 'p50_ms': None, 'p99_ms': None, 'max_ms': None}
+        samples *= 1000.0
+        return {
+            'count': count,
+            'mean_ms': float(samples.mean()),
+            'p50_ms': float(np.percentile(samples, 50)),
+            'p99_ms': float(np.percentile(samples, 99)),
+            'max_ms': float(samples.max()),
+        }
+
+    def __str__(self):
+        s = self.summary()
+        if s['mean_ms'] is None:
+            return f"n={s['count']}"
+        return f"n={s['count']}, mean={s['mean_ms']:.2f} ms, p50={s['p50_ms']:.2f} ms, p99={s['p99_ms']:.2f} ms, max={s['max_ms']:.2f} ms"
+
+
+class RateMeter:
+    """
+    Counts events and tracks the event rate over a sliding window.
+    peak_rate is the highest rate that was sustained over a whole window, and never below the average rate (a
+    stream shorter than the window, or one that slowed down before its first full window, still has a peak).
+    """
+    def __init__(self, window: float = 1.0):
+        self.window = window
+        self._events = deque()
+        self._window_count = 0
+        self._total = 0
+        self._started = None
+        self._last = None
+        self._peak_rate = 0.0  # Over full windows
+        self._lock = threading.Lock()
+
+    def tick(self, n: int = 1, now: float = None):
+        now = time.perf_counter() if now is None else now
+        with self._lock:
+            if self._started is None:
+                self._started = now
+            self._last = now
+            self._events.append((now, n))
+            self._window_count += n
+            self._total += n
+            while self._events and now - self._events[0][0] > self.window:
+                self._window_count -= self._events.popleft()[1]
+            # Only count full windows, otherwise the first few events give a bogus peak
+            if now - self._started >= self.window:
+                self._peak_rate = max(self._peak_rate, self._window_count / self.window)
+
+    def reset(self):
+        with self._lock:
+            self._events.clear()
+            self._window_count = 0
+            self._total = 0
+            self._started = None
+            self._last = None
+            self._peak_rate = 0.0
+
+    @property
+    def peak_rate(self) -> float:
+        """Highest rate sustained over a whole window, at least the average rate."""
+        return max(self._peak_rate, self.average_rate())
+
+    @property
+    def rate(self) -> float:
+        """Rate over the last window (events per second)."""
+        now = time.perf_counter()
+        with self._lock:
+            return sum(count for t, count in self._events if now - t <= self.window) / self.window
+
+    @property
+    def total(self) -> int:
+        return self._total
+
+    def average_rate(self) -> float:
+        """Average rate between the first and the last event."""
+        with self._lock:
+            if self._started is None or self._last <= self._started:
+                return 0.0
+            return (self._total - 1) / (self._last - self._started)
@@ -0,0 +1,328 @@
+from dataclasses import asdict, dataclass, field
+import json
+import os
+import threading
+import time
+import uuid
+
+from GUI.GRBLSettings import PUMP_ML_PER_MM
+from GUI.Recipe import Recipe
+
+RESUME_POLICIES = ('resume', 'restart', 'skip')
+
+
+@dataclass
+class Checkpoint:
+    """Progress of a job as executed by GRBL, counted over all attempts (a restart keeps only the volumes)."""
+    phase: int = 0  # Index of the recipe phase GRBL was executing
+    phase_elapsed: float = 0.0  # s into that phase (nominal time of the executed lines)
+    elapsed: float = 0.0  # s of the recipe executed
+    pump_1_volume: float = 0.0  # ml dispensed
+    pump_2_volume: float = 0.0  # ml dispensed
+    stroke: int = 0  # Stroke of the phase
+    stroke_phase: int = 0  # Segment within that stroke
+    line: int = 0  # Streamed lines executed in the current attempt
+    saved_at: float = 0.0  # time.time()
+
+    def __str__(self):
+        return (f"phase {self.phase + 1} +{self.phase_elapsed:.0f} s, {self.elapsed:.0f} s total, "
+                f"{self.pump_1_volume:.3f} / {self.pump_2_volume:.3f} ml, stroke {self.stroke}.{self.stroke_phase}")
+
+
+@dataclass
+class Job:
+    """One recipe run of the queue."""
+    recipe: str  # Path of the recipe file
+    id: str = field(default_factory=lambda: uuid.uuid4().hex[:8])
+    state: str = 'pending'  # pending, running, done, failed, skipped, stopped
+    attempts: int = 0
+    checkpoint: Checkpoint | None = None
+    error: str | None = None
+    added_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+
+    @property
+    def name(self) -> str:
+        return os.path.splitext(os.path.basename(self.recipe))[0]
+
+    def __str__(self):
+        progress = f", {self.checkpoint}" if self.checkpoint else ""
+        return f"{self.id} {self.name} [{self.state}]{progress}"
+
+
+class JobQueue:
+    """
+    Experiments executed back to back, persisted in a JSON file so the queue and the progress of the running job
+    survive a crash of the application. Every change is written at once, through a temporary file and os.replace(),
+    so the file is either the old or the new version, never half written.
+    A job still 'running' in the file when it is loaded was interrupted, see JobQueueRunner.recover().
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.jobs: list[Job] = []
+        self._lock = threading.RLock()
+        self.load()
+
+    def load(self):
+        with self._lock:
+            if not os.path.exists(self.path):
+                self.jobs = []
+                return
+            with open(self.path, encoding="utf-8") as file:
+                data = json.load(file)
+            self.jobs = []
+            for entry in data.get('jobs', []):
+                checkpoint = entry.pop('checkpoint', None)
+                self.jobs.append(Job(**entry, checkpoint=Checkpoint(**checkpoint) if checkpoint else None))
+
+    def save(self):
+        with self._lock:
+            data = {'jobs': [asdict(job) for job in self.jobs]}
+            temporary = self.path + ".tmp"
+            with open(temporary, "w", encoding="utf-8") as file:
+                json.dump(data, file, indent=1)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temporary, self.path)
+
+    def add(self, recipe_path: str) -> Job:
+        """Append a job, the recipe is loaded once to validate it (raises like Recipe.load)."""
+        Recipe.load(recipe_path)
+        job = Job(recipe=os.path.abspath(recipe_path))
+        with self._lock:
+            self.jobs.append(job)
+            self.save()
+        print(f"[GUI] Job queue: added {job}")
+        return job
+
+    def remove(self, job_id: str):
+        with self._lock:
+            self.jobs = [job for job in self.jobs if job.id != job_id or job.state == 'running']
+            self.save()
+
+    def clear_finished(self):
+        """Drop the jobs that will not run again (done, failed, skipped, stopped)."""
+        with self._lock:
+            self.jobs = [job for job in self.jobs if job.state in ('pending', 'running')]
+            self.save()
+
+    def next_pending(self) -> Job | None:
+        with self._lock:
+            return next((job for job in self.jobs if job.state == 'pending'), None)
+
+    def interrupted(self) -> list[Job]:
+        """Jobs a previous process left 'running'."""
+        with self._lock:
+            return [job for job in self.jobs if job.state == 'running']
+
+    def update(self, job: Job, **changes):
+        """Change fields of a job and write the queue."""
+        with self._lock:
+            for name, value in changes.items():
+                setattr(job, name, value)
+            self.save()
+
+    def counts(self) -> dict:
+        with self._lock:
+            counts = {}
+            for job in self.jobs:
+                counts[job.state] = counts.get(job.state, 0) + 1
+            return counts
+
+    def __str__(self):
+        counts = self.counts()
+        return "Queue: " + (", ".join(f"{n} {state}" for state, n in counts.items()) if counts else "empty")
+
+
+class JobQueueRunner:
+    """
+    Runs the pending jobs of a JobQueue one after the other on its own thread, each as a recipe through
+    PositioningController.start_recipe().
+
+    While a job runs its Checkpoint is written every checkpoint_interval seconds from the lines GRBL executed.
+    recover() handles the jobs a crashed process left 'running': first make_safe() brings the hardware to a safe
+    state (HV off), then resume_policy decides: 'resume' continues the recipe at the checkpoint (a moving phase
+    restarts its strokes at the start point, the HV setpoint of that phase is set again), 'restart' runs the recipe
+    from the beginning, 'skip' leaves the job. A job that was already started max_attempts times fails instead,
+    so a job that crashes the application cannot loop forever.
+    An ALARM ends the job as 'failed' and the queue goes on with the next one, stop() ends it as 'stopped'.
+    Callbacks run on the job thread or the reader thread.
+    """
+    def __init__(self, job_queue: JobQueue, positioning_controller, resume_policy: str = 'resume',
+                 max_attempts: int = 2, checkpoint_interval: float = 5.0, home_first: bool = False,
+                 make_safe=None, on_phase=None, on_job=None, on_idle=None):
+        """
+        :param home_first: Run the homing cycle before the first job (the machine position is unknown after a crash)
+        :param make_safe: make_safe() is called before interrupted jobs are resumed, restarted or skipped
+        :param on_phase: on_phase(job, recipe, index, phase) when GRBL starts a recipe phase
+        :param on_job: on_job(job, recipe) when a job starts (recipe is its remaining part) and ends (recipe None)
+        :param on_idle: on_idle() when no job is left or the runner was stopped
+        """
+        if resume_policy not in RESUME_POLICIES:
+            raise ValueError(f"Unknown resume policy '{resume_policy}'. Available: {', '.join(RESUME_POLICIES)}")
+        self.job_queue = job_queue
+        self.positioning_controller = positioning_controller
+        self.resume_policy = resume_policy
+        self.max_attempts = max_attempts
+        self.checkpoint_interval = checkpoint_interval  # s
+        self.home_first = home_first
+        self.make_safe = make_safe
+        self.on_phase = on_phase
+        self.on_job = on_job
+        self.on_idle = on_idle
+        self.job: Job | None = None  # Running job
+        self._thread = None
+        self._stop = threading.Event()
+        self._stream_lock = threading.Lock()  # Only one of the job thread and stop() stops the stream
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            raise RuntimeError("The job queue is already running.")
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Stop the running job (it becomes 'stopped') and the queue, blocks until the job thread is gone."""
+        self._stop.set()
+        self._stop_stream()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def recover(self) -> list[Job]:
+        """Apply the safe state and the resume policy to the jobs a previous process left 'running'."""
+        interrupted = self.job_queue.interrupted()
+        if not interrupted:
+            return []
+        print(f"[GUI] Job queue: {len(interrupted)} interrupted job(s), bringing the hardware to a safe state")
+        if self.make_safe:
+            self.make_safe()
+        for job in interrupted:
+            if self.resume_policy == 'skip':
+                self.job_queue.update(job, state='skipped', finished_at=time.time(), error="interrupted")
+            elif job.attempts >= self.max_attempts:
+                self.job_queue.update(job, state='failed', finished_at=time.time(),
+                                      error=f"interrupted in {job.attempts} attempts")
+            elif self.resume_policy == 'restart':
+                # From the beginning, the volume the interrupted attempt dispensed is still counted
+                old = job.checkpoint
+                checkpoint = Checkpoint(pump_1_volume=old.pump_1_volume, pump_2_volume=old.pump_2_volume) if old else None
+                self.job_queue.update(job, state='pending', checkpoint=checkpoint)
+            else:
+                self.job_queue.update(job, state='pending')
+            print(f"[GUI] Job queue: interrupted {job} -> {self.resume_policy}, now {job.state}")
+        return interrupted
+
+    def _run(self):
+        try:
+            self.recover()
+            if self.home_first and not self._stop.is_set() and self.job_queue.next_pending() is not None:
+                self.positioning_controller.home()
+            while not self._stop.is_set():
+                job = self.job_queue.next_pending()
+                if job is None:
+                    break
+                self._run_job(job)
+        except Exception as e:
+            print(f"[GUI] Job queue stopped: {e}")
+        finally:
+            self.job = None
+            print(f"[GUI] Job queue idle. {self.job_queue}")
+            if self.on_idle:
+                self.on_idle()
+
+    def _run_job(self, job: Job):
+        try:
+            recipe = Recipe.load(job.recipe)
+        except (OSError, ValueError, ImportError) as e:
+            self.job_queue.update(job, state='failed', finished_at=time.time(), error=str(e))
+            print(f"[GUI] Job {job.id}: {e}")
+            return
+        base = job.checkpoint
+        phase_offset = 0
+        if base is not None:
+            recipe = recipe.remaining(base.phase, base.phase_elapsed)
+            if recipe is None:
+                self.job_queue.update(job, state='done', finished_at=time.time())
+                return
+            phase_offset = recipe.first_phase  # base.phase + 1 if the rest of that phase was too short to run
+        self.job = job
+        self.job_queue.update(job, state='running', attempts=job.attempts + 1, error=None,
+                              started_at=job.started_at or time.time())
+        print(f"[GUI] Job {job}: attempt {job.attempts}, {len(recipe.phases)} phases, {recipe.duration:.0f} s")
+        if self.on_job:
+            self.on_job(job, recipe)
+
+        def on_phase(index, phase):
+            if self.on_phase:
+                self.on_phase(job, recipe, index, phase)
+
+        streamer = self.positioning_controller.grbl_streamer
+        state, error = 'failed', None
+        try:
+            runner = self.positioning_controller.start_recipe(recipe, on_phase=on_phase)
+            while not runner.done.wait(self.checkpoint_interval):
+                self._save_checkpoint(job, runner, base, phase_offset)
+                if self._stop.is_set() or streamer.stop_flag.is_set():
+                    break  # stop() or ALARM
+            self._save_checkpoint(job, runner, base, phase_offset)
+            if runner.finished:
+                state = 'done'
+            elif self._stop.is_set():
+                state = 'stopped'
+            else:
+                error = "stream stopped (ALARM)"
+        except Exception as e:
+            error = str(e)
+            if self._stop.is_set():
+                state = 'stopped'
+        finally:
+            self._stop_stream()
+        self.job_queue.update(job, state=state, error=error, finished_at=time.time())
+        print(f"[GUI] Job {job}" + (f": {error}" if error else ""))
+        self.job = None
+        if self.on_job:
+            self.on_job(job, None)
+
+    def _save_checkpoint(self, job: Job, runner, base: Checkpoint | None, phase_offset: int):
+        progress = runner.trajectory.progress(runner.executed_lines)
+        base = base or Checkpoint()
+        checkpoint = Checkpoint(
+            phase=phase_offset + progress['phase'],
+            # The first phase of a resumed recipe is the rest of the phase the checkpoint was in, unless that was dropped
+            phase_elapsed=progress['phase_elapsed'] + (base.phase_elapsed if progress['phase'] == 0
+                                                       and phase_offset == base.phase else 0.0),
+            elapsed=base.elapsed + progress['elapsed'],
+            pump_1_volume=base.pump_1_volume + progress['pump_1'] * PUMP_ML_PER_MM,
+            pump_2_volume=base.pump_2_volume + progress['pump_2'] * PUMP_ML_PER_MM,
+            stroke=progress['stroke'],
+            stroke_phase=progress['stroke_phase'],
+            line=runner.executed_lines,
+            saved_at=time.time(),
+        )
+        self.job_queue.update(job, checkpoint=checkpoint)
+
+    def _stop_stream(self):
+        with self._stream_lock:
+            controller = self.positioning_controller
+            if controller.recipe_runner is None and not controller.grbl_streamer.streaming:
+                return
+            controller.stop_recipe()
+            controller.grbl_streamer.stop()
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    path = os.path.join(tempfile.mkdtemp(), "jobs.json")
+    job_queue = JobQueue(path)
+    recipe_path = os.path.join(os.path.dirname(__file__), "..", "Recipes", "example.json")
+    job = job_queue.add(recipe_path)
+    job_queue.update(job, state='running', attempts=1, checkpoint=Checkpoint(phase=2, phase_elapsed=120.0, elapsed=170.0))
+    print(JobQueue(path).interrupted()[0])
+    print(Recipe.load(recipe_path).remaining(2, 120.0).phases[0])
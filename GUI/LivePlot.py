@@ -0,0 +1,150 @@
+import time
+
+import numpy as np
+from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg
+from matplotlib.figure import Figure
+from PySide6.QtCore import QTimer
+
+from GUI.GRBLStatus import GRBLStatus
+from GUI.Instrumentation import LatencyStats
+from GUI.MinMaxHistory import MinMaxHistory
+
+
+class LivePlotPanel:
+    """
+    Live plot of HV voltage, HV current and stage Z over the whole run.
+
+    Samples arrive on the HV telemetry and GRBL reader threads and only go into MinMaxHistory envelopes.
+    A QTimer on the GUI thread redraws at frame_rate: the static parts (axes, ticks, labels) are rendered once into
+    a cached background and every frame only restores it and blits the three lines, at most 2 * bins points each.
+    The axes are only redrawn completely when a line leaves them, the limits then grow with headroom,
+    so that happens a few times per run.
+    """
+    TRACES = (
+        ('voltage', "Voltage (V)"),
+        ('current', "Current (μA)"),
+        ('stage_z', "Stage Z (mm)"),
+    )
+
+    def __init__(self, frame_rate: float = 5.0, bins: int = 2048, parent=None):
+        self.figure = Figure(figsize=(6, 4), layout='constrained')
+        self.canvas = FigureCanvasQTAgg(self.figure)
+        if parent is not None:
+            self.canvas.setParent(parent)
+
+        axes = self.figure.subplots(len(self.TRACES), 1, sharex=True)
+        self.histories = {}
+        self.lines = {}
+        self.axes = {}
+        for ax, (name, label) in zip(axes, self.TRACES):
+            ax.set_ylabel(label)
+            ax.grid(True, alpha=0.3)
+            ax.set_xlim(0, 1)
+            ax.set_ylim(0, 1)
+            line, = ax.plot([], [], linewidth=0.8, animated=True)
+            self.histories[name] = MinMaxHistory(bins=bins)
+            self.lines[name] = line
+            self.axes[name] = ax
+        axes[-1].set_xlabel("Time (min)")
+
+        self._background = None
+        self._drawn_versions = {}
+        self.start = time.monotonic()  # t = 0, the application start until reset()
+        for history in self.histories.values():
+            history.clear(self.start)
+
+        # Instrumentation
+        self.frame_time = LatencyStats()  # GUI thread time per blitted frame
+        self.full_redraws = 0
+
+        self.canvas.mpl_connect('draw_event', self._on_draw)
+        self._timer = QTimer(self.canvas)
+        self._timer.timeout.connect(self.update)
+        self._timer.start(max(1, round(1000 / frame_rate)))
+
+    def reset(self):
+        """Start a new run at t = 0."""
+        self.start = time.monotonic()
+        for history in self.histories.values():
+            history.clear(self.start)
+        self._drawn_versions = {}
+        for name, ax in self.axes.items():
+            ax.set_xlim(0, 1)
+            ax.set_ylim(0, 1)
+        self._redraw()
+
+    # Called on worker threads
+
+    def on_hv_sample(self, name: str, timestamp: float, value):
+        """HVController sample listener."""
+        if name in ('voltage', 'current'):
+            self.histories[name].append(value, timestamp)
+
+    def on_grbl_status(self, status: GRBLStatus):
+        """GRBLStreamer status listener."""
+        if status.position is not None:
+            self.histories['stage_z'].append(status.position.z, status.timestamp)
+
+    # GUI thread
+
+    def update(self):
+        """Draw a frame, skipped when nothing new came in or the panel is hidden."""
+        if not self.canvas.isVisible():
+            return
+        versions = {name: history.version for name, history in self.histories.items()}
+        if versions == self._drawn_versions:
+            return
+        started = time.perf_counter()
+
+        rescale = False
+        for name, history in self.histories.items():
+            t, y = history.envelope()
+            self.lines[name].set_data(t / 60.0, y)
+            rescale |= self._grow_limits(name, history, t)
+        self._drawn_versions = versions
+
+        if rescale or self._background is None:
+            self._redraw()
+            return
+        self.canvas.restore_region(self._background)
+        for name, ax in self.axes.items():
+            ax.draw_artist(self.lines[name])
+        self.canvas.blit(self.figure.bbox)
+        self.frame_time.add(time.perf_counter() - started)
+
+    def _grow_limits(self, name: str, history: MinMaxHistory, t: np.ndarray) -> bool:
+        ax = self.axes[name]
+        grown = False
+        if t.size:
+            # Shared x axis: the bin after the last one has to be inside, grow by 50 % so it rarely happens
+            end = (t[-1] + history.bin_width) / 60.0
+            x_max = ax.get_xlim()[1]
+            if end > x_max:
+                ax.set_xlim(0, end * 1.5)
+                grown = True
+        value_range = history.value_range()
+        if value_range is not None:
+            low, high = value_range
+            y_min, y_max = ax.get_ylim()
+            if low < y_min or high > y_max:
+                margin = 0.1 * max(high - low, abs(high), 1e-3)
+                ax.set_ylim(min(low - margin, y_min), max(high + margin, y_max))
+                grown = True
+        return grown
+
+    def _redraw(self):
+        """Full draw of the static parts, _on_draw caches them as the blit background."""
+        self.full_redraws += 1
+        self.canvas.draw()
+
+    def _on_draw(self, event):
+        self._background = self.canvas.copy_from_bbox(self.figure.bbox)
+        for name, ax in self.axes.items():
+            ax.draw_artist(self.lines[name])
+        self.canvas.blit(self.figure.bbox)
+
+    def stats(self) -> str:
+        samples = sum(history.total for history in self.histories.values())
+        memory = sum(history.nbytes for history in self.histories.values())
+        return (f"{samples:,} samples in {memory / 1024:.0f} KiB, {self.full_redraws} full redraws, "
+                f"frame {self.frame_time}")
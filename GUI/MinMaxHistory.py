@@ -0,0 +1,96 @@
+import threading
+
+import numpy as np
+
+
+class MinMaxHistory:
+    """
+    Constant memory min / max envelope of a signal over a whole run, for plotting.
+
+    Samples fall into time bins of bin_width seconds. When the run outgrows the bins, neighbouring bins are
+    merged pairwise and bin_width doubles, so memory and the number of points to draw stay at 2 * bins no matter
+    how many samples came in, and a spike never gets lost between plotted points.
+    Bins without samples stay NaN (gap in the plot). Thread safe.
+    """
+    def __init__(self, bins: int = 2048, bin_width: float = 0.05):
+        if bins < 2 or bins % 2:
+            raise ValueError("bins must be an even number >= 2")
+        self.bins = bins
+        self.initial_bin_width = bin_width  # s
+        self._lock = threading.Lock()
+        self._min = np.empty(bins, dtype=np.float32)
+        self._max = np.empty(bins, dtype=np.float32)
+        self.clear()
+
+    def clear(self, start: float = None):
+        """Forget all samples, start: time of the first bin (default: first sample)."""
+        with self._lock:
+            self._min.fill(np.nan)
+            self._max.fill(np.nan)
+            self.start = start
+            self.bin_width = self.initial_bin_width
+            self._used = 0  # Bins up to and including the last one that got a sample
+            self.total = 0
+            self.version = 0  # Bumped on every change, lets a plot skip frames without new data
+
+    def append(self, value: float, timestamp: float):
+        with self._lock:
+            if self.start is None:
+                self.start = timestamp
+            index = int((timestamp - self.start) / self.bin_width)
+            if index < 0:
+                return  # Before the start of the plot
+            while index >= self.bins:
+                self._merge()
+                index = int((timestamp - self.start) / self.bin_width)
+            # NaN compares False, an empty bin takes the first sample
+            if not self._min[index] <= value:
+                self._min[index] = value
+            if not self._max[index] >= value:
+                self._max[index] = value
+            self._used = max(self._used, index + 1)
+            self.total += 1
+            self.version += 1
+
+    def _merge(self):
+        half = self.bins // 2
+        self._min[:half] = np.fmin(self._min[0::2], self._min[1::2])
+        self._max[:half] = np.fmax(self._max[0::2], self._max[1::2])
+        self._min[half:] = np.nan
+        self._max[half:] = np.nan
+        self._used = (self._used + 1) // 2
+        self.bin_width *= 2
+
+    def envelope(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Copies (t, y) with two points per bin, (bin start, min) and (bin start, max), ready for Line2D.set_data.
+        t is in seconds since start.
+        """
+        with self._lock:
+            used = self._used
+            t = np.arange(used, dtype=np.float64) * self.bin_width
+            y = np.empty(2 * used, dtype=np.float32)
+            y[0::2] = self._min[:used]
+            y[1::2] = self._max[:used]
+        return np.repeat(t, 2), y
+
+    def value_range(self) -> tuple[float, float] | None:
+        with self._lock:
+            if self.total == 0:
+                return None
+            return float(np.nanmin(self._min[:self._used])), float(np.nanmax(self._max[:self._used]))
+
+    def __len__(self):
+        return self._used
+
+    @property
+    def nbytes(self) -> int:
+        return self._min.nbytes + self._max.nbytes
+
+
+if __name__ == "__main__":
+    history = MinMaxHistory(bins=8, bin_width=1.0)
+    for second in range(20):
+        history.append(float(second % 7), float(second))
+    print(f"{history.total} samples in {len(history)} bins of {history.bin_width} s, range {history.value_range()}")
+    print(history.envelope())
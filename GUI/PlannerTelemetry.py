@@ -0,0 +1,180 @@
+from collections import Counter
+from dataclasses import dataclass
+import threading
+
+import numpy as np
+
+from GUI.GRBLStatus import GRBLStatus
+from GUI.SignalBuffer import SignalBuffer
+
+
+@dataclass
+class PlannerUnderrun:
+    """GRBL's planner ran dry while streaming: the machine stopped and the next line starts from standstill."""
+    timestamp: float  # time.monotonic() of the first report with an empty planner
+    line: int | None  # Streamed lines GRBL had executed, i.e. index of the trajectory segment it starved on
+    stroke: int | None  # Stroke of that segment
+    duration: float | None = None  # Until the first report with a block in the planner again (s), None while running
+
+    def __str__(self):
+        duration = f"{self.duration * 1000:.0f} ms" if self.duration is not None else "ongoing"
+        return f"stroke {self.stroke}, line {self.line}, {duration}"
+
+
+@dataclass
+class PlannerLowWater(PlannerUnderrun):
+    """The planner held at most low_water blocks while streaming: GRBL decelerates for a stop, the motion slows."""
+    min_blocks: int = 0  # Fewest blocks used during the episode
+
+    def __str__(self):
+        return f"{super().__str__()}, min {self.min_blocks} blocks"
+
+
+class PlannerTelemetry:
+    """
+    Planner and RX buffer occupancy of GRBL from the 'Bf:' field of the status reports ($10 bit 1).
+
+    Every report goes into a time series of planner blocks used and RX bytes free. While streaming, the blocks used
+    are also counted in a histogram, and a report with an empty planner is recorded as a PlannerUnderrun with its
+    timestamp, line and stroke. Reports with at most low_water blocks count as low: GRBL plans every block it has
+    to end at standstill, so a low planner already slows the motion down before it stops. Each run of low reports
+    is recorded the same way as a PlannerLowWater episode, an underrun is always inside one.
+    The planner is empty at the start of a stream too, so the statistics only start once it held a block.
+    Resolution is the status poll interval, a shorter underrun between two reports is missed.
+    Fed by GRBLStreamer on the reader thread, read from any thread.
+    """
+    def __init__(self, history_size: int = 36000, low_water: int = 2):
+        self.planner_used = SignalBuffer(history_size)  # Blocks in the planner, 1 h at 10 Hz
+        self.rx_free = SignalBuffer(history_size)  # Bytes free in the RX buffer
+        self.planner_size = None  # Highest 'Bf:' planner value seen = free blocks of an empty planner
+        self.low_water = low_water  # Blocks
+        self.stroke_of = None  # stroke_of(line) -> stroke index, set by the owner of the trajectory
+        self._lock = threading.Lock()
+        self.start()
+
+    def start(self):
+        """Start the statistics of a new stream, the time series keep running."""
+        with self._lock:
+            self.histogram = Counter()  # Planner blocks used -> reports, only while streaming
+            self.underruns: list[PlannerUnderrun] = []
+            self.low_episodes: list[PlannerLowWater] = []
+            self.missing_reports = 0  # Reports without 'Bf:' while streaming
+            self._armed = False
+            self._underrun = None
+            self._low = None
+
+    def add(self, status: GRBLStatus, streaming: bool, line: int | None = None):
+        """Record a status report, streaming: the send loop is feeding GRBL (not paused or stopping)."""
+        if status.planner_blocks_available is None:
+            if streaming:
+                self.missing_reports += 1
+            return
+        self.planner_size = max(self.planner_size or 0, status.planner_blocks_available)
+        used = self.planner_size - status.planner_blocks_available
+        self.planner_used.append(used, status.timestamp)
+        self.rx_free.append(status.rx_bytes_available, status.timestamp)
+        with self._lock:
+            if not streaming:
+                self._end_underrun(status.timestamp)
+                self._end_low(status.timestamp)
+                return
+            if used > 0:
+                self._armed = True
+                self._end_underrun(status.timestamp)
+            if used > self.low_water:
+                self._end_low(status.timestamp)
+            if not self._armed:
+                return  # Before the first line reached the planner
+            self.histogram[used] += 1
+            if used > self.low_water:
+                return
+            if self._low is None:
+                self._low = PlannerLowWater(status.timestamp, line, self._stroke(line), min_blocks=used)
+                self.low_episodes.append(self._low)
+            self._low.min_blocks = min(self._low.min_blocks, used)
+            if used == 0 and self._underrun is None:
+                self._underrun = PlannerUnderrun(status.timestamp, line, self._stroke(line))
+                self.underruns.append(self._underrun)
+                print(f"[GRBL] Planner underrun at stroke {self._underrun.stroke}, line {line}")
+
+    def _stroke(self, line: int | None) -> int | None:
+        return self.stroke_of(line) if self.stroke_of is not None and line is not None else None
+
+    def _end_underrun(self, timestamp: float):
+        if self._underrun is not None:
+            self._underrun.duration = timestamp - self._underrun.timestamp
+            self._underrun = None
+
+    def _end_low(self, timestamp: float):
+        if self._low is not None:
+            self._low.duration = timestamp - self._low.timestamp
+            self._low = None
+
+    @property
+    def latest(self) -> tuple[int, int] | None:
+        """(planner blocks used, planner size) of the newest report, None without 'Bf:' reports."""
+        latest = self.planner_used.latest()
+        return None if latest is None else (int(latest[1]), self.planner_size)
+
+    def summary(self) -> dict:
+        with self._lock:
+            histogram = dict(self.histogram)
+            underruns = list(self.underruns)
+            low_episodes = list(self.low_episodes)
+        size = self.planner_size or 0
+        counts = np.array([histogram.get(used, 0) for used in range(size + 1)], dtype=float)
+        total = counts.sum()
+        _, rx_free = self.rx_free.last()
+        return {
+            'reports': int(total),
+            'planner_size': size,
+            'histogram': (counts / total).tolist() if total else counts.tolist(),  # Share of reports at 0..size blocks
+            'mean_blocks': float(np.dot(counts, np.arange(size + 1)) / total) if total else None,
+            'empty': float(counts[0] / total) if total else None,  # Share of reports
+            'low': float(counts[:self.low_water + 1].sum() / total) if total else None,
+            'underruns': len(underruns),
+            'underrun_time': sum(u.duration or 0.0 for u in underruns),  # s
+            'underrun_strokes': sorted({u.stroke for u in underruns if u.stroke is not None}),
+            'low_episodes': len(low_episodes),
+            'low_time': sum(e.duration or 0.0 for e in low_episodes),  # s
+            'low_strokes': sorted({e.stroke for e in low_episodes if e.stroke is not None}),
+            'min_rx_free': int(rx_free.min()) if rx_free.size else None,
+            'missing_reports': self.missing_reports,
+        }
+
+    def histogram_text(self, width: int = 40) -> str:
+        """Planner blocks used while streaming as a text histogram, one row per block count that occurred."""
+        summary = self.summary()
+        if not summary['reports']:
+            return "[GRBL] No planner reports while streaming"
+        rows = [f"[GRBL] Planner blocks used ({summary['reports']} reports):"]
+        histogram = summary['histogram']
+        peak = max(histogram)
+        occurred = [used for used, share in enumerate(histogram) if share]
+        for used in range(occurred[0], occurred[-1] + 1):
+            share = histogram[used]
+            rows.append(f"  {used:>3} | {'#' * round(share / peak * width):<{width}} {share:6.1%}")
+        return "\n".join(rows)
+
+    def __str__(self):
+        s = self.summary()
+        if not s['reports']:
+            return "Planner: no 'Bf:' reports while streaming"
+        return (f"Planner: mean {s['mean_blocks']:.1f} of {s['planner_size']} blocks, <= {self.low_water} in {s['low']:.1%} "
+                f"and empty in {s['empty']:.1%} of reports, "
+                f"{s['low_episodes']} low-water episodes ({s['low_time'] * 1000:.0f} ms), "
+                f"{s['underruns']} underruns ({s['underrun_time'] * 1000:.0f} ms), min RX free {s['min_rx_free']} B")
+
+
+if __name__ == "__main__":
+    import time
+
+    telemetry = PlannerTelemetry()
+    telemetry.stroke_of = lambda line: line // 10
+    now = time.monotonic()
+    for i, (blocks_free, line) in enumerate([(15, 0), (3, 2), (1, 8), (6, 20), (15, 31), (15, 31), (12, 33), (2, 40)]):
+        status = GRBLStatus.parse(f"<Run|MPos:0.000,0.000,0.000|Bf:{blocks_free},{100 + i}|FS:100,0>", now + i * 0.1)
+        telemetry.add(status, streaming=True, line=line)
+    print(telemetry.histogram_text(20))
+    print(telemetry, [str(u) for u in telemetry.underruns])
+    print("Low water:", [str(e) for e in telemetry.low_episodes])
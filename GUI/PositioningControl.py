@@ -1,66 +1,118 @@
-from dataclasses import dataclass
+from collections import deque
+from dataclasses import dataclass, field
 import serial
 import serial.tools.list_ports
 import threading
 import time
 import queue
+import re
 import math
 import numpy as np
-import re
 
 from GUI.ConfigParser import get_config_parser, edit_config_file
-from GUI.GRBLSettings import OPERATING_SETTINGS
-
+from GUI.GCodeEncoder import GCodeEncoder
+from GUI.GRBLSettings import OPERATING_SETTINGS, STATUS_REPORT_BUFFER, GRBLSettingsManager
+from GUI.GRBLStatus import AXES, GRBLStatus, Position
+from GUI.Instrumentation import LatencyStats, RateMeter
+from GUI.PlannerTelemetry import PlannerTelemetry
+from GUI.Recipe import Recipe, RecipeRunner, RecipeTrajectory, StillTrajectory
+from GUI.Trajectory import OscillationTrajectory, ShapedOscillationTrajectory, STAGE_PROFILES
 
-@dataclass
-class Position:
-    x: float
-    y: float
-    z: float
-
-    def __str__(self):
-        return f"X: {self.x:.3f}, Y: {self.y:.3f}, Z: {self.z:.3f}"
+_GCODE_WORD_RE = re.compile(r"([A-Z])([-+]?(?:\d+\.?\d*|\.\d+))")
 
 
 class PositioningController:
-    def __init__(self):
+    def __init__(self, port: str = None, connect: bool = True):
+        """
+        :param port: GRBL serial port, if None, [Positioning] COMPort from the config file is used
+        :param connect: Open the port and upload the settings right away, otherwise call connect() later
+        """
         self.operating_settings = OPERATING_SETTINGS
 
-        self.grbl_streamer = GRBLStreamer(port=get_config_parser().get('Positioning', 'COMPort'))
-        self.grbl_streamer.connect()
+        self.grbl_streamer = GRBLStreamer(port=port or get_config_parser().get('Positioning', 'COMPort'),
+                                          status_poll_rate=get_config_parser().getfloat('Positioning', 'StatusPollRate', fallback=10.0))
         self.grbl_streamer.loop_method = self.loop_method  # Loop method for generating the next G-code command during experiment
-        self.set_settings(self.operating_settings)
+        self.grbl_streamer.planner_telemetry.stroke_of = self.stroke_of_line
+        self.settings = GRBLSettingsManager(self.grbl_streamer,
+                                            pipeline_depth=get_config_parser().getint('Positioning', 'SettingsPipelineDepth', fallback=1))
 
         self.default_simple_move_feedrate = get_config_parser().getfloat('Positioning', 'DefaultSimpleMoveFeedrate', fallback=1000.0)
+        self.jog_feedrate = get_config_parser().getfloat('Positioning', 'JogFeedrate', fallback=self.default_simple_move_feedrate)
+        self.jog_slow_feedrate = get_config_parser().getfloat('Positioning', 'JogSlowFeedrate', fallback=100.0)
+        self.grbl_streamer.jog_segment_time = get_config_parser().getfloat('Positioning', 'JogSegmentTime', fallback=0.05)
+        self.grbl_streamer.jog_lookahead = get_config_parser().getfloat('Positioning', 'JogLookahead', fallback=0.2)
+        self.grbl_streamer.planner_telemetry.low_water = get_config_parser().getint('Positioning', 'PlannerLowWater', fallback=2)
+        self.grbl_streamer.low_water_poll_rate = get_config_parser().getfloat('Positioning', 'LowWaterPollRate', fallback=50.0)
         self.stage_center = get_config_parser().getfloat('Positioning', 'StageCenter')
+        self.stroke_sub_segments = get_config_parser().getint('Positioning', 'StrokeSubSegments', fallback=1)
+        self.compact_gcode = get_config_parser().getboolean('Positioning', 'CompactGCode', fallback=True)
+        self.stage_profile = get_config_parser().get('StageProfile', 'Profile', fallback='linear')
 
+        self.homing_timeout = 120.0  # seconds
+        self.position_tolerance = 0.01  # mm, for wait_for_position
         self.experiment_initial_command: str = None
+        self.trajectory: OscillationTrajectory | RecipeTrajectory = None
+        self.recipe_runner: RecipeRunner = None  # Follows the phases of a running recipe
+        self.rate_change_latency = LatencyStats()  # set_flow_rates() call -> GRBL executes the first new segment
+        self._rate_change_listener = None
+
+        if connect:
+            self.connect()
+
+    def connect(self):
+        """Open the port, wait for the GRBL banner and upload the operating settings (blocks for seconds)."""
+        self.grbl_streamer.connect()
+        self.settings.invalidate()  # Read '$$' again, the EEPROM may have been changed by another tool
+        self.set_settings(self.operating_settings)
+        self.enable_buffer_report()
+
+    def enable_buffer_report(self):
+        """Make GRBL report 'Bf:' (planner blocks and RX bytes free), the planner telemetry and waits rely on it."""
+        mask = self.settings.get_snapshot().get(10, 0)
+        if not mask & STATUS_REPORT_BUFFER:
+            self.settings.set(10, mask | STATUS_REPORT_BUFFER)
     
-    def home(self):
+    def home(self, on_progress=None):
+        """
+        Run the homing cycle and move the pumps off their endstops, returns once the machine is idle again.
+        on_progress(phase, status) is called on the reader thread with every status report,
+        phase is 'homing' or 'pull-off'.
+        """
         print("Starting homing cycle...")
-        self.grbl_streamer.clear_stream()
-        response = self.grbl_streamer.send_command('$H')
-        while "ok" not in response.lower():
-            time.sleep(0.1)
-            response = self.grbl_streamer.ser.read_all().decode().strip()
-        # Move pumps away from endstops
-        self.simple_move('X', 5, 1000)
-        self.simple_move('Y', 5, 1000)
+        progress = {'phase': 'homing'}
+
+        def listener(status: GRBLStatus):
+            on_progress(progress['phase'], status)
+
+        if on_progress:
+            self.grbl_streamer.add_status_listener(listener)
+        try:
+            # GRBL acknowledges $H only after the homing cycle has finished
+            response = self.grbl_streamer.send_command('$H', timeout=self.homing_timeout)
+            if "ok" not in response.lower():
+                raise RuntimeError(f"Homing cycle failed: {response}")
+            # Move pumps away from endstops
+            progress['phase'] = 'pull-off'
+            self.simple_move('X', 5, 1000)
+            self.simple_move('Y', 5, 1000)
+            self.grbl_streamer.wait_for_idle(timeout=self.homing_timeout)
+        finally:
+            self.grbl_streamer.remove_status_listener(listener)
         print("Homing cycle completed.")
         return response
     
     def simple_move(self, axis: str, distance: float, feedrate: float = None):
+        """Relative move as a '$J=' jog, it leaves the G90/G91 mode alone and jog_cancel() can stop it."""
         if axis not in ['X', 'Y', 'Z']:
             raise ValueError("Axis must be 'X', 'Y', or 'Z'")
         if feedrate is None:
             feedrate = self.default_simple_move_feedrate
-        print(f'Status before move: {self.grbl_streamer.get_status()}')
-        self.set_relative_positioning()
+        print(f'Status before move: {self.grbl_streamer.get_status_snapshot()}')
         if axis != 'Z':
             # For pumps (X and Y), steps per mm is set such that 1 mm/h is in fact 1 ml/h
             # For simple move the distance must be multiplied to mach the desired distance in reality
             distance = distance * 3200 / 427  # Using operating settings steps/mm ratio
-        move_cmd = f"G1 {axis}{distance:.3f} F{feedrate:.3f}"
+        move_cmd = f"$J=G91 {axis}{distance:.3f} F{feedrate:.3f}"
         print(f"Sending move command: {move_cmd}")
         response = self.grbl_streamer.send_command(move_cmd)
         print("Move command response:", response)
@@ -71,7 +123,7 @@ class PositioningController:
             raise ValueError("Axis must be 'X', 'Y', or 'Z'")
         if feedrate is None:
             feedrate = self.default_simple_move_feedrate
-        print(f'Status before move: {self.grbl_streamer.get_status()}')
+        print(f'Status before move: {self.grbl_streamer.get_status_snapshot()}')
         self.set_absolute_positioning()
         move_cmd = f"G1 {axis}{position:.3f} F{feedrate:.3f}"
         print(f"Sending move command: {move_cmd}")
@@ -92,7 +144,7 @@ class PositioningController:
             print(f'Could not save StageCenter to config file. Local config file does not exist.')
         self.center_stage()
 
-    def start_experiment(self, pump_1_flowrate, pump_2_flowrate, stage_feedrate, stage_amplitude):
+    def start_experiment(self, pump_1_flowrate, pump_2_flowrate, stage_feedrate, stage_amplitude, stage_profile: str = None):
         """Start experiment and schedule automatic stop.
 
         Parameters:
@@ -100,29 +152,34 @@ class PositioningController:
         pump_2_flowrate : float
         stage_feedrate  : float
         stage_amplitude : float
+        stage_profile   : str -> key of STAGE_PROFILES, None uses the configured profile
         duration        : float -> seconds to run before stopping automatically
         """
+        if stage_profile is not None:
+            self.stage_profile = stage_profile
         self.move_stage_to_start_position(stage_amplitude, stage_feedrate)
         self.generate_experiment_initial_command(pump_1_flowrate, pump_2_flowrate, stage_feedrate, stage_amplitude)
 
         # Start streaming motion
+        self.grbl_streamer.required_rate = self.trajectory.segment_rate
         self.grbl_streamer.start()
 
     def move_stage_to_start_position(self, amplitude, feedrate):
+        """Move Z to the start point and return the moment the stage stands there."""
         start_z = self.stage_center + amplitude  # Starting on the rightmost position
-        self.absolute_move('Z', start_z, feedrate=feedrate)
         pos = self.get_absolute_positions()
+        self.absolute_move('Z', start_z, feedrate=feedrate)
+        # Only a bound for a stuck machine, the wait itself ends on the first status report at the start point
         move_time = abs(pos.z - start_z) / feedrate * 60  # Convert to seconds
-        time.sleep(move_time + 0.5)  # Extra buffer time
+        self.grbl_streamer.wait_for_position('Z', start_z, tolerance=self.position_tolerance,
+                                             timeout=2 * move_time + 10.0)
 
-    def get_absolute_positions(self):
-        status = self.grbl_streamer.get_status()
-        # response pattern: <Idle,MPos:0.000,0.000,0.000,WPos:0.000,0.000,0.000,Lim:000>
-        match = re.search(r"MPos:([\d\.\-]+),([\d\.\-]+),([\d\.\-]+)", status)
-        if match:
-            x_pos, y_pos, z_pos = map(float, match.groups())
-            return Position(x_pos, y_pos, z_pos)
-        raise ValueError("Could not parse position from GRBL status: " + status)
+    def get_absolute_positions(self, max_age: float = None):
+        """Machine position from the shared status snapshot (no serial I/O unless there is no snapshot yet)."""
+        status = self.grbl_streamer.get_status_snapshot(max_age=max_age)
+        if status is None or status.position is None:
+            raise ValueError(f"Could not get position from GRBL status: {status}")
+        return status.position
 
     def set_relative_positioning(self):
         response = self.grbl_streamer.send_command("G91")  # Relative positioning
@@ -135,33 +192,185 @@ class PositioningController:
         return response
 
     def set_settings(self, settings: dict):
-        for address, value in settings.items():
-            cmd = f"${address}={value}"
-            response = self.grbl_streamer.send_command(cmd)
-            if "ok" not in response.lower():
-                print(f"Error setting {address} to {value}: {response}")
-            else:
-                print(f"Set {address} to {value}: {response}")
+        """Write the settings that differ from GRBL's EEPROM and verify them."""
+        return self.settings.apply(settings)
+
+    def send_command(self, cmd: str):
+        """Send a raw line, a '$n=' line makes the cached settings snapshot stale."""
+        if cmd.startswith('$') and '=' in cmd and not cmd.startswith('$J='):
+            self.settings.invalidate()
+        return self.grbl_streamer.send_command(cmd)
 
     def generate_experiment_initial_command(self, pump_1_flowrate, pump_2_flowrate, stage_feedrate, stage_amplitude):
+        self.trajectory = self.build_trajectory(pump_1_flowrate, pump_2_flowrate, stage_feedrate, stage_amplitude)
+        # Every trajectory is produced sequentially, the first line is taken and generation starts over
+        self.experiment_initial_command = self.trajectory.next_command()
+        self.trajectory.reset()
+
+    def build_trajectory(self, pump_1_flowrate, pump_2_flowrate, stage_feedrate, stage_amplitude) -> OscillationTrajectory:
+        """Experiment trajectory for the rates, shaped unless the stage profile is linear or the stage stands."""
+        if stage_amplitude > 0 and self.stage_profile != 'linear':
+            return self.generate_shaped_trajectory(pump_1_flowrate, pump_2_flowrate, stage_feedrate, stage_amplitude)
+        x_dist, y_dist, common_feedrate = self.linear_stroke(pump_1_flowrate, pump_2_flowrate, stage_feedrate, stage_amplitude)
+        # Compile the motion once, the send loop then only pops ready G-code lines
+        return OscillationTrajectory(
+            x_stroke=float(x_dist),
+            y_stroke=float(y_dist),
+            z_stroke=-2 * stage_amplitude,  # Starting on the rightmost position
+            feedrate=common_feedrate,
+            sub_segments=self.stroke_sub_segments,
+            encoder=self.gcode_encoder(),
+        )
+
+    def generate_recipe_trajectory(self, recipe: Recipe) -> RecipeTrajectory:
+        """
+        Build the trajectories of all recipe phases and chain them into one RecipeTrajectory (self.trajectory).
+        A phase with a stage feedrate oscillates with the recipe's amplitude and profile, a phase without one keeps
+        the stage at the start point and only runs the pumps (StillTrajectory).
+        """
+        if recipe.stage_profile is not None:
+            self.stage_profile = recipe.stage_profile
+        if self.stage_profile != 'linear':
+            config = get_config_parser()
+            if config.getfloat('StageProfile', 'EndPointJitter', fallback=0.0) or \
+                    config.getfloat('StageProfile', 'RasterStep', fallback=0.0):
+                raise ValueError("Recipes need every stroke to end on the start point, "
+                                 "set [StageProfile] EndPointJitter and RasterStep to 0.")
+        phases = []
+        for phase in recipe.phases:
+            if phase.stage_feedrate > 0:
+                if recipe.stage_amplitude <= 0:
+                    raise ValueError(f"Phase '{phase.name}' moves the stage, the recipe needs a stage_amplitude.")
+                trajectory = self.build_trajectory(phase.pump_1, phase.pump_2, phase.stage_feedrate, recipe.stage_amplitude)
+            else:
+                trajectory = StillTrajectory(phase.pump_1, phase.pump_2, phase.duration, encoder=self.gcode_encoder())
+            phases.append((phase, trajectory))
+
+        def on_phase_generated(index: int):
+            self.grbl_streamer.required_rate = self.trajectory.phase_rate(index)
+
+        self.trajectory = RecipeTrajectory(phases, on_phase_generated=on_phase_generated)
+        return self.trajectory
+
+    def start_recipe(self, recipe: Recipe, on_phase=None, on_finished=None) -> RecipeRunner:
+        """
+        Move the stage to the start point and stream all phases of the recipe without a stop in between.
+        on_phase(index, phase) is called when GRBL starts a phase, on_finished() after the last one (see RecipeRunner).
+        """
+        trajectory = self.generate_recipe_trajectory(recipe)
+        feedrates = [phase.stage_feedrate for phase in recipe.phases if phase.stage_feedrate > 0]
+        self.move_stage_to_start_position(recipe.stage_amplitude, max(feedrates, default=self.default_simple_move_feedrate))
+        print(f"[GRBL] Recipe '{recipe.name}': {len(recipe.phases)} phases, {recipe.duration:.0f} s")
+        self.recipe_runner = RecipeRunner(self.grbl_streamer, trajectory, on_phase=on_phase, on_finished=on_finished)
+        self.grbl_streamer.required_rate = trajectory.phase_rate(0)
+        self.recipe_runner.start()
+        self.grbl_streamer.start()
+        return self.recipe_runner
+
+    def stop_recipe(self):
+        """Stop following the recipe phases, the stream itself is stopped with grbl_streamer.stop()."""
+        if self.recipe_runner is not None:
+            self.recipe_runner.stop()
+            self.recipe_runner = None
+
+    def gcode_encoder(self) -> GCodeEncoder:
+        """Encoder for a new trajectory, compact lines are rounded to the steps/mm of the operating settings."""
+        if not self.compact_gcode:
+            return GCodeEncoder(compact=False)
+        steps_per_mm = {axis: self.operating_settings[str(100 + i)] for i, axis in enumerate(AXES)}
+        return GCodeEncoder(steps_per_mm=steps_per_mm)
+
+    def linear_stroke(self, pump_1_flowrate, pump_2_flowrate, stage_feedrate, stage_amplitude):
+        """X, Y distance per stroke and common feedrate of the linear trajectory."""
         if stage_amplitude > 0:
-            x_dist, y_dist, common_feedrate = self.match_axes_by_feedrate(
+            return self.match_axes_by_feedrate(
                 z_dist=2 * stage_amplitude,
                 fz=stage_feedrate,
                 fx=pump_1_flowrate,
                 fy=pump_2_flowrate
             )
+        x_dist = 1 if pump_1_flowrate > 0 else 0
+        if pump_2_flowrate > 0:
+            if pump_1_flowrate > 0:
+                y_dist = (pump_2_flowrate / pump_1_flowrate)
+            else:
+                y_dist = 1
         else:
-            x_dist = 1 if pump_1_flowrate > 0 else 0
-            if pump_2_flowrate > 0:
-                if pump_1_flowrate > 0:
-                    y_dist = (pump_2_flowrate / pump_1_flowrate)
-                else:
-                    y_dist = 1
+            y_dist = 0
+        common_feedrate = math.sqrt(pump_1_flowrate**2 + pump_2_flowrate**2)
+        return x_dist, y_dist, common_feedrate
+
+    def set_flow_rates(self, pump_1_flowrate, pump_2_flowrate, stage_feedrate):
+        """
+        Change pump flows and stage speed of the running experiment without restarting the stream.
+        The lines not sent yet are regenerated, the change reaches the motion once the lines already in GRBL's
+        RX buffer and planner are executed. That latency is measured from the status reports and printed.
+        Returns the index of the first segment with the new rates.
+        """
+        trajectory = self.trajectory
+        if trajectory is None:
+            raise RuntimeError("No experiment trajectory. Call start_experiment first.")
+        if isinstance(trajectory, RecipeTrajectory):
+            raise RuntimeError("The flow rates of a recipe are set by its phases.")
+        requested = time.monotonic()
+        # The send loop pulls lines under this lock, so no line is generated half way through the change
+        with self.grbl_streamer.buffer_data_lock:
+            if isinstance(trajectory, ShapedOscillationTrajectory):
+                if stage_feedrate <= 0:
+                    raise ValueError("A shaped stage profile needs a positive stage speed.")
+                trajectory.set_flow_rates(pump_1_flowrate, pump_2_flowrate, stage_feedrate)
             else:
-                y_dist = 0
-            common_feedrate = math.sqrt(pump_1_flowrate**2 + pump_2_flowrate**2)
-        self.experiment_initial_command = f"G1 X{x_dist} Y{y_dist} Z{-2*stage_amplitude} F{common_feedrate}"
+                x_dist, y_dist, common_feedrate = self.linear_stroke(pump_1_flowrate, pump_2_flowrate, stage_feedrate,
+                                                                     abs(trajectory.z_stroke) / 2)
+                if common_feedrate <= 0:
+                    raise ValueError("Nothing would move, at least one flow rate or the stage speed must be positive.")
+                trajectory.set_rates(float(x_dist), float(y_dist), common_feedrate)
+            first_segment = trajectory.segment_index
+        self.grbl_streamer.required_rate = trajectory.segment_rate
+        self._time_rate_change(first_segment, requested)
+        return first_segment
+
+    def _time_rate_change(self, first_segment: int, requested: float):
+        """Record when GRBL starts executing first_segment, i.e. the motion follows the new rates."""
+        streamer = self.grbl_streamer
+
+        def listener(status: GRBLStatus):
+            executed = streamer.executed_stream_lines(status)
+            if streamer.stop_flag.is_set() or executed is None:
+                streamer.remove_status_listener(listener)
+            elif executed >= first_segment:
+                streamer.remove_status_listener(listener)
+                latency = status.timestamp - requested
+                self.rate_change_latency.add(latency)
+                print(f"[GRBL] New flow rates reached the motion after {latency * 1000:.0f} ms")
+
+        streamer.remove_status_listener(self._rate_change_listener)
+        self._rate_change_listener = listener
+        streamer.add_status_listener(listener)
+
+    def generate_shaped_trajectory(self, pump_1_flowrate, pump_2_flowrate, stage_feedrate, stage_amplitude):
+        """Build a ShapedOscillationTrajectory for self.stage_profile using the [StageProfile] config section."""
+        if self.stage_profile not in STAGE_PROFILES:
+            raise ValueError(f"Unknown stage profile '{self.stage_profile}'. Available: {', '.join(STAGE_PROFILES)}")
+        config = get_config_parser()
+        profile = STAGE_PROFILES[self.stage_profile]()
+        if self.stage_profile == 'dwell':
+            profile.dwell_time = config.getfloat('StageProfile', 'DwellTime', fallback=profile.dwell_time)
+        seed = config.get('StageProfile', 'Seed', fallback='')
+        return ShapedOscillationTrajectory(
+            pump_1_flowrate=pump_1_flowrate,
+            pump_2_flowrate=pump_2_flowrate,
+            stage_feedrate=stage_feedrate,
+            stage_amplitude=stage_amplitude,
+            profile=profile,
+            segments_per_stroke=config.getint('StageProfile', 'SegmentsPerStroke', fallback=200),
+            end_point_jitter=config.getfloat('StageProfile', 'EndPointJitter', fallback=0.0),
+            raster_step=config.getfloat('StageProfile', 'RasterStep', fallback=0.0),
+            raster_passes=config.getint('StageProfile', 'RasterPasses', fallback=1),
+            strokes_per_pass=config.getint('StageProfile', 'StrokesPerPass', fallback=10),
+            seed=int(seed) if seed else None,
+            encoder=self.gcode_encoder(),
+        )
 
     @staticmethod
     def match_axes_by_feedrate(z_dist, fz, fx, fy):
@@ -193,29 +402,43 @@ class PositioningController:
         return x_dist, y_dist, common_feedrate
 
     def set_hard_limits(self, enabled: bool):
-        self.grbl_streamer.send_command(f"$21={'1' if enabled else '0'}")
+        self.settings.set(21, enabled)
     
     def loop_method(self, previous_command: str):
-        """Example loop method to be assigned to GRBLStreamer.loop_method"""
+        """Loop method assigned to GRBLStreamer.loop_method, returns the next segment of the experiment trajectory"""
+        if self.trajectory is None:
+            raise RuntimeError("No experiment trajectory. Call generate_experiment_initial_command first.")
         if not previous_command:
-            return self.experiment_initial_command 
-        previous_coords = self.parse_move_command(previous_command)
-        return f'G1 X{previous_coords.get("X", 0)} Y{previous_coords.get("Y", 0)} Z{-previous_coords.get("Z", 0)} F{previous_coords.get("F", 0)}'
+            self.trajectory.reset()
+        return self.trajectory.next_command()
+
+    def stroke_of_line(self, line: int) -> int | None:
+        """Stroke of the experiment trajectory that streamed line (segment index since start) belongs to."""
+        trajectory = self.trajectory
+        return trajectory.stroke_of(line) if trajectory is not None else None
     
     def parse_move_command(self, command: str):
-        """Parse a G-code move command into its components."""
-        if not command.startswith('G1'):
-            raise ValueError("Only G1 commands are supported.")
-        parts = command.split(' ')
+        """Parse a G-code move command (full or compact, modal G1) into its components."""
         coords = {}
-        for part in parts[1:]:
-            axis = part[0]
-            value = float(part[1:])
-            coords[axis] = value
+        for letter, value in _GCODE_WORD_RE.findall(command.upper()):
+            if letter == 'G':
+                if float(value) not in (1, 90, 91):
+                    raise ValueError("Only G1 commands are supported.")
+            else:
+                coords[letter] = float(value)
         return coords
 
+@dataclass
+class SentCommand:
+    """A line sent to GRBL that waits for its 'ok'/'error'."""
+    length: int  # Bytes occupied in GRBL's RX buffer (including newline)
+    sent_at: float  # time.perf_counter() of the write
+    lines: list = field(default_factory=list)  # Response lines collected for send_command
+    done: threading.Event | None = None  # Set on ack, only for commands someone waits for
+
+
 class GRBLStreamer:
-    def __init__(self, port=None, baudrate=115200, buffer_size=64):
+    def __init__(self, port=None, baudrate=115200, buffer_size=64, read_timeout=0.05, status_poll_rate=10.0):
         self.port = port
         if not self.port:
             self.port = self.find_arduino_port()
@@ -223,126 +446,521 @@ class GRBLStreamer:
                 raise ValueError("No Arduino found. Please specify a valid port.")
         self.baudrate = baudrate
         self.buffer_size = buffer_size
+        self.read_timeout = read_timeout  # Max time the reader blocks waiting for the first byte (only bounds stop latency)
+        self.status_poll_rate = status_poll_rate  # Real-time '?' requests per second, 0 disables the poller
         self.ser = None
         self.send_thread = None
         self.read_thread = None
-        self.stop_flag = threading.Event()
+        self.status_thread = None
+        self.stop_flag = threading.Event()  # Stops streaming
+        self.resume_flag = threading.Event()  # Cleared while paused, the send loop parks on it
+        self.resume_flag.set()
+        self.io_stop_flag = threading.Event()  # Stops the reader and status poller (set on close)
         self.cmd_queue = queue.Queue()
         self.used_buffer = 0
         self.buffer_data_lock = threading.Lock()
-        self.sent_cmd_lengths = queue.Queue()  # Track lengths of sent commands
+        self.buffer_space_available = threading.Condition(self.buffer_data_lock)  # Notified by the reader on every ack
+        self.sent_commands: deque[SentCommand] = deque()  # Commands waiting for an ack, oldest first
         self.loop_method = None
         self.last_command = None
         self.ser_communication_lock = threading.Lock()
+
+        # Shared status snapshot, replaced (never mutated) by the reader on every status report
+        self.status: GRBLStatus | None = None
+        self.status_updated = threading.Condition()
+        self.status_listeners = []  # listener(status) for every parsed status report, called on the reader thread
+        self.planner_blocks_free = None  # Highest 'Bf:' planner value seen = free blocks of an empty planner
+
+        # Streaming instrumentation
+        self.ack_latency = LatencyStats()
+        self.ack_rate = RateMeter(window=1.0)
+        self.acked_bytes = 0
+        self.required_rate = None  # Lines per second the current trajectory needs, set by the caller of start()
+        self.stream_lines_acked = 0  # Acks of lines written by the send loop since start()
+
+        # Feed override (real-time bytes, GRBL 1.1)
+        self.feed_override = 100  # % last requested, GRBL resets it to 100 on reset
+        self.feed_override_latency = LatencyStats()  # set_feed_override() call -> status report with the new 'Ov:'
+        self._feed_override_listener = None
+
+        # Continuous jogging
+        self.jog_segment_time = 0.05  # Motion time per $J= segment (s)
+        self.jog_lookahead = 0.2  # Motion queued ahead of the clock (s), bounds the run-on if the host stops sending
+        self.jog_thread = None
+        self.jog_stop_flag = threading.Event()
+        self._jog_lock = threading.Lock()
+        self._jog_in_flight = deque()  # $J= segments sent but not acknowledged yet
+        self.jog_cancel_latency = LatencyStats()  # jog_cancel() call -> 0x85 written
+
+        # Feed hold
+        self.pause_latency = LatencyStats()  # pause() call -> hold complete reported
+        self.resume_latency = LatencyStats()  # resume() call -> motion reported
+
+        # Planner / RX buffer occupancy and underruns from the 'Bf:' reports, at or below its low_water blocks
+        # the status is polled at low_water_poll_rate
+        self.planner_telemetry = PlannerTelemetry()
+        self.low_water_poll_rate = 50.0  # Hz, short underruns fall between two polls at status_poll_rate
+        self._planner_low = threading.Event()
+        self._poll_wakeup = threading.Event()  # Cuts the poller's wait short when the planner runs low
     
     def is_connected(self):
         return self.ser is not None and self.ser.is_open
 
     def connect(self):
-        self.ser = serial.Serial(self.port, self.baudrate)
+        self.ser = serial.Serial(self.port, self.baudrate, timeout=self.read_timeout)
         self.on_connection_check()
+        self._start_io_threads()
     
     def on_connection_check(self):
         # Read GRBL startup message and extract version
         timeout = time.time() + 5  # 5 seconds timeout
+        unexpected = None
         while True:
-            startup_msg = self.ser.readline().decode().strip()
-            if startup_msg:
+            startup_msg = self.ser.readline().decode(errors="replace").strip()
+            if "Grbl" in startup_msg:
                 self.clear_stream()
                 break
+            if startup_msg:
+                # Responses still buffered for a previous connection (e.g. of a crashed process) come before the banner
+                print(f"[GRBL] Skipping before startup message: {startup_msg}")
+                unexpected = startup_msg
             if time.time() > timeout:
+                if unexpected is not None:
+                    raise ValueError("Unexpected startup message from GRBL: " + unexpected)
                 raise TimeoutError("No response from GRBL on connection check.")
         version = None
-        if "Grbl" in startup_msg:
-            # Example: "Grbl 1.1h ['$' for help]"
-            parts = startup_msg.split()
-            if len(parts) >= 2 and parts[0] == "Grbl":
-                version = parts[1]
-                print(f"[GRBL] Connected. Version: {version if version else 'Unknown'}")
-        else:
-            raise ValueError("Unexpected startup message from GRBL: " + startup_msg)
+        # Example: "Grbl 1.1h ['$' for help]"
+        parts = startup_msg.split()
+        if len(parts) >= 2 and parts[0] == "Grbl":
+            version = parts[1]
+            print(f"[GRBL] Connected. Version: {version if version else 'Unknown'}")
+
+    def _start_io_threads(self):
+        """Start the reader and the status poller, they run for the whole connection."""
+        self.io_stop_flag.clear()
+        self.read_thread = threading.Thread(target=self._read_loop, daemon=True)
+        self.read_thread.start()
+        if self.status_poll_rate > 0:
+            self.status_thread = threading.Thread(target=self._status_loop, daemon=True)
+            self.status_thread.start()
     
-    def send_command(self, cmd):
+    def send_command(self, cmd, timeout: float = 1.0):
+        """
+        Send a single line and wait for its 'ok'/'error'.
+        Returns all lines GRBL sent in response (including the 'ok'), or what arrived before timeout.
+        """
+        if not self.ser:
+            raise ConnectionError("Serial port not connected.")
+        if self.read_thread is None or not self.read_thread.is_alive():
+            raise ConnectionError("GRBL reader not running.")
+        entry = self._write_line(cmd, wait_response=True)
+        entry.done.wait(timeout)
+        return "\n".join(entry.lines)
+
+    def send_pipelined(self, commands: list[str], depth: int = 1, timeout: float = 1.0) -> list[str]:
+        """
+        Send lines keeping at most depth of them unacknowledged (and all of them within GRBL's RX buffer).
+        Returns the response of every line, in order. depth=1 is plain send-response.
+        """
         if not self.ser:
             raise ConnectionError("Serial port not connected.")
+        if self.read_thread is None or not self.read_thread.is_alive():
+            raise ConnectionError("GRBL reader not running.")
+        in_flight = deque()
+        responses = []
+        for cmd in commands:
+            if len(in_flight) >= depth:
+                entry = in_flight.popleft()
+                entry.done.wait(timeout)
+                responses.append("\n".join(entry.lines))
+            in_flight.append(self._write_line(cmd, wait_response=True))
+        for entry in in_flight:
+            entry.done.wait(timeout)
+            responses.append("\n".join(entry.lines))
+        return responses
+
+    def _write_line(self, cmd: str, wait_response: bool = False, stop_flag: threading.Event = None) -> SentCommand | None:
+        """
+        Write a line once there is room for it in GRBL's RX buffer.
+        The command is accounted before it is written, so a fast ack always finds its entry.
+        Returns None if stop_flag was set while waiting for buffer space.
+        """
+        cmd_len = len(cmd) + 1
+        with self.buffer_space_available:
+            # Sleep until the reader frees enough space, woken on every ack.
+            # A line longer than the whole buffer is sent once the buffer is empty.
+            while self.used_buffer > 0 and self.used_buffer + cmd_len > self.buffer_size:
+                if stop_flag is not None and stop_flag.is_set():
+                    return None
+                self.buffer_space_available.wait(timeout=0.1)
+            if stop_flag is not None and stop_flag.is_set():
+                return None
+            entry = SentCommand(length=cmd_len, sent_at=time.perf_counter(), done=threading.Event() if wait_response else None)
+            self.used_buffer += cmd_len
+            self.sent_commands.append(entry)
+            with self.ser_communication_lock:
+                self.ser.write((cmd + "\n").encode())
+        return entry
+
+    def _write_realtime(self, byte: bytes):
+        """Write a real-time command byte. It bypasses GRBL's RX buffer and gets no 'ok'."""
         with self.ser_communication_lock:
-            self.ser.write(f"{cmd}\n".encode())
-            time.sleep(0.1)  # Wait for response
-            response = self.ser.read_all().decode().strip()
-        return response
+            self.ser.write(byte)
 
     def _send_loop(self):
-        """Send G-code from queue, keeping GRBL buffer full."""
+        """Send G-code from loop_method, keeping GRBL buffer full, until it returns None or stop()."""
         while not self.stop_flag.is_set():
+            if not self.resume_flag.is_set():
+                self.resume_flag.wait(0.1)  # Paused, the trajectory cursor stays where it is
+                continue
             with self.buffer_data_lock:
                 cmd = self.loop_method(previous_command=self.last_command)
-            while self.used_buffer + len(cmd) + 1 > self.buffer_size and not self.stop_flag.is_set():
-                time.sleep(0.01)
-
-            if self.stop_flag.is_set():
-                break
-
-            with self.ser_communication_lock:
-                self.ser.write((cmd + "\n").encode())
-            with self.buffer_data_lock:
-                cmd_len = len(cmd) + 1
-                self.used_buffer += cmd_len
-                self.sent_cmd_lengths.put(cmd_len)
                 self.last_command = cmd
+            if cmd is None:
+                print("[GRBL] Trajectory finished.")
+                break  # Everything was sent, GRBL executes the rest of its buffers
+            if self._write_line(cmd, stop_flag=self.stop_flag) is None:
+                break
 
         print("[GRBL] Send loop stopped.")
 
     def _read_loop(self):
-        """Read GRBL responses and manage buffer space."""
-        while not self.stop_flag.is_set():
-            with self.ser_communication_lock:
-                line = self.ser.readline().decode().strip()
-            if line:
-                print(f"Reader: {line}")
-                if line.startswith("ok") or line.startswith("error"):
-                    with self.buffer_data_lock:
-                        # free space in buffer
-                        if not self.sent_cmd_lengths.empty():
-                            cmd_len = self.sent_cmd_lengths.get()
-                            self.used_buffer = max(0, self.used_buffer - cmd_len)
-                if "ALARM" in line:
-                    print("[GRBL] Alarm detected!")
+        """Read GRBL responses as soon as they arrive and manage buffer space."""
+        pending = b""
+        while not self.io_stop_flag.is_set():
+            # Blocks only until the first byte arrives (or read_timeout), then takes whatever is buffered.
+            # Reading does not need ser_communication_lock, the port is full duplex.
+            try:
+                chunk = self.ser.read(self.ser.in_waiting or 1)
+            except (serial.SerialException, TypeError, OSError) as e:
+                if not self.io_stop_flag.is_set():
+                    print(f"[GRBL] Read error: {e}")
                     self.stop_flag.set()
-            time.sleep(0.5)
+                break
+            if not chunk:
+                continue
+            pending += chunk
+            *lines, pending = pending.split(b"\n")
+            for raw_line in lines:
+                line = raw_line.decode(errors="replace").strip()
+                if line:
+                    self._handle_line(line)
         print("[GRBL] Read loop stopped.")
 
+    def _handle_line(self, line: str):
+        """Dispatch a single line received from GRBL."""
+        if line.startswith("ok") or line.startswith("error"):
+            self._on_ack(line)
+        elif line.startswith("<"):
+            self._on_status(line)
+        elif line.startswith("ALARM"):
+            print(f"[GRBL] Alarm detected! {line}")
+            self.stop_flag.set()
+            # GRBL resets on alarm and drops its RX buffer, pending commands will never be acked
+            self._clear_sent_commands()
+        else:
+            with self.buffer_data_lock:
+                waiting = self.sent_commands[0] if self.sent_commands and self.sent_commands[0].done else None
+                if waiting is not None:
+                    waiting.lines.append(line)
+            if waiting is None:
+                print(f"Reader: {line}")
+
+    def _on_ack(self, line: str):
+        """Free the buffer space of the oldest unacknowledged command."""
+        now = time.perf_counter()
+        if line.startswith("error"):
+            print(f"Reader: {line}")
+        with self.buffer_space_available:
+            if self.sent_commands:
+                entry = self.sent_commands.popleft()
+                self.used_buffer = max(0, self.used_buffer - entry.length)
+                self.acked_bytes += entry.length
+                self.ack_latency.add(now - entry.sent_at)
+                if entry.done is not None:
+                    entry.lines.append(line)
+                    entry.done.set()
+                else:
+                    self.stream_lines_acked += 1  # Only the send loop writes without waiting for the response
+            self.buffer_space_available.notify_all()
+        self.ack_rate.tick(now=now)
+
+    def _clear_sent_commands(self):
+        """Forget all unacknowledged commands and release whoever waits for them."""
+        with self.buffer_space_available:
+            for entry in self.sent_commands:
+                if entry.done is not None:
+                    entry.done.set()
+            self.sent_commands.clear()
+            self.used_buffer = 0
+            self.buffer_space_available.notify_all()
+
+    def _on_status(self, line: str):
+        """Parse a status report once and publish it as the shared snapshot."""
+        try:
+            status = GRBLStatus.parse(line)
+        except ValueError as e:
+            print(f"[GRBL] Could not parse status report: {e}")
+            return
+        with self.status_updated:
+            self.status = status
+            if status.planner_blocks_available is not None:
+                self.planner_blocks_free = max(self.planner_blocks_free or 0, status.planner_blocks_available)
+            self.status_updated.notify_all()
+        streaming = self.streaming and not self.paused and not self.stop_flag.is_set()
+        self.planner_telemetry.add(status, streaming, self.executed_stream_lines(status) if streaming else None)
+        if streaming and self.low_water_poll_rate > self.status_poll_rate and status.planner_blocks_available is not None \
+                and self.planner_blocks_free - status.planner_blocks_available <= self.planner_telemetry.low_water:
+            if not self._planner_low.is_set():
+                self._planner_low.set()
+                self._poll_wakeup.set()
+        else:
+            self._planner_low.clear()
+        for listener in self.status_listeners:
+            listener(status)
+
+    def add_status_listener(self, listener) -> None:
+        """
+        Call listener(status) with every GRBLStatus snapshot.
+        Listeners run on the reader thread, they have to be quick and must not touch the GUI.
+        """
+        if listener not in self.status_listeners:
+            self.status_listeners = self.status_listeners + [listener]
+
+    def remove_status_listener(self, listener) -> None:
+        self.status_listeners = [l for l in self.status_listeners if l is not listener]
+
+    def _status_loop(self):
+        """
+        Request a status report at status_poll_rate with the real-time '?' byte, at low_water_poll_rate while
+        a stream keeps only a few blocks in GRBL's planner. The reports travel from GRBL to the host, they take
+        nothing from the stream's direction of the link.
+        """
+        next_poll = time.monotonic()
+        while not self.io_stop_flag.is_set():
+            try:
+                self.request_status()
+            except (serial.SerialException, TypeError, OSError):
+                if not self.io_stop_flag.is_set():
+                    print("[GRBL] Status poller could not write to serial port.")
+                break
+            # Fixed rate, not fixed delay, so slow writes do not lower the poll rate
+            next_poll += 1.0 / (self.low_water_poll_rate if self._planner_low.is_set() else self.status_poll_rate)
+            delay = next_poll - time.monotonic()
+            if delay < 0:
+                next_poll = time.monotonic()
+                delay = 0
+            if self._poll_wakeup.wait(delay):
+                self._poll_wakeup.clear()
+                next_poll = time.monotonic()
+        print("[GRBL] Status poller stopped.")
+
+    def request_status(self):
+        """Ask GRBL for an immediate status report, the reader publishes it when it arrives."""
+        self._write_realtime(b'?')
+
+    def executed_stream_lines(self, status: GRBLStatus) -> int | None:
+        """
+        Number of streamed lines GRBL has finished at the time of status: acknowledged lines minus the blocks still in
+        the planner. None without 'Bf:' reports. Call it from a status listener, so acks and reports are in order.
+        """
+        if status.planner_blocks_available is None or self.planner_blocks_free is None:
+            return None
+        return self.stream_lines_acked - (self.planner_blocks_free - status.planner_blocks_available)
+
+    def set_feed_override(self, percent: int) -> int:
+        """
+        Scale the feedrate of all G1 motion (not jogs) to percent (10-200) with real-time override bytes.
+        Takes effect at once, also on the blocks already in GRBL's planner. Returns the percent requested.
+        """
+        percent = min(max(int(round(percent)), 10), 200)
+        delta = percent - 100
+        # Reset to 100 %, then coarse 10 % and fine 1 % steps, so the result does not depend on the current value
+        coarse, fine = divmod(abs(delta), 10)
+        up = delta > 0
+        data = b'\x90' + (b'\x91' if up else b'\x92') * coarse + (b'\x93' if up else b'\x94') * fine
+        requested = time.monotonic()
+
+        def listener(status: GRBLStatus):
+            if status.overrides is not None and status.overrides[0] == percent:
+                self.remove_status_listener(listener)
+                self.feed_override_latency.add(status.timestamp - requested)
+                print(f"[GRBL] Feed override {percent} % active after {(status.timestamp - requested) * 1000:.0f} ms")
+
+        # Only the latest request is timed, a value that was overtaken may never be reported
+        self.remove_status_listener(self._feed_override_listener)
+        self._feed_override_listener = listener
+        self.add_status_listener(listener)
+        self._write_realtime(data)
+        self.feed_override = percent
+        return percent
+
+    def get_stream_stats(self) -> dict:
+        """Ack latency, command rate and throughput statistics of the current/last streaming run."""
+        acked_commands = self.ack_rate.total
+        average_rate = self.ack_rate.average_rate()
+        average_line_length = self.acked_bytes / acked_commands if acked_commands else None
+        return {
+            'acked_commands': acked_commands,
+            'ack_latency': self.ack_latency.summary(),
+            'current_rate': self.ack_rate.rate,
+            'average_rate': average_rate,
+            'peak_sustained_rate': self.ack_rate.peak_rate,
+            'required_rate': self.required_rate,
+            'average_line_length': average_line_length,
+            'bytes_per_second': average_rate * average_line_length if average_line_length else 0.0,
+            'link_bytes_per_second': self.baudrate / 10,  # 8N1: 10 bits per byte
+            'planner': self.planner_telemetry.summary(),
+        }
+
+    def print_stream_stats(self):
+        stats = self.get_stream_stats()
+        print(f"[GRBL] Acked commands: {stats['acked_commands']}, "
+              f"peak sustained rate: {stats['peak_sustained_rate']:.1f} cmd/s, "
+              f"average rate: {stats['average_rate']:.1f} cmd/s")
+        print(f"[GRBL] Ack latency: {self.ack_latency}")
+        if stats['average_line_length']:
+            print(f"[GRBL] Throughput: {stats['bytes_per_second']:.0f} B/s of {stats['link_bytes_per_second']:.0f} B/s link, "
+                  f"{stats['average_line_length']:.1f} B/line, RX buffer {self.buffer_size} B")
+        if stats['required_rate']:
+            held = stats['average_rate'] >= 0.98 * stats['required_rate']
+            print(f"[GRBL] Required rate: {stats['required_rate']:.1f} cmd/s -> {'held' if held else 'NOT held (planner underrun likely)'}")
+        print(f"[GRBL] {self.planner_telemetry}")
+        if stats['planner']['reports']:
+            print(self.planner_telemetry.histogram_text())
+        for episode in self.planner_telemetry.low_episodes[:10]:
+            print(f"[GRBL] Planner low water: {episode}")
+        for underrun in self.planner_telemetry.underruns:
+            print(f"[GRBL] Planner underrun: {underrun}")
+
+    #
+    # Continuous jogging
+    #
+
+    def jog(self, axis: str, direction: int, feedrate: float) -> None:
+        """
+        Jog axis in direction (+1 / -1) at feedrate until jog_cancel(). Returns immediately.
+        Short '$J=G91' segments are streamed from a thread, paced so that at most jog_lookahead seconds of motion
+        are queued in GRBL, everything queued is dropped by the jog cancel.
+        """
+        with self._jog_lock:
+            if self.jog_thread is not None and self.jog_thread.is_alive():
+                raise RuntimeError("Already jogging, call jog_cancel() first.")
+            self.jog_stop_flag.clear()
+            self._jog_in_flight.clear()
+            self.jog_thread = threading.Thread(target=self._jog_loop, args=(axis.upper(), direction, feedrate), daemon=True)
+            self.jog_thread.start()
+
+    def _jog_loop(self, axis: str, direction: int, feedrate: float):
+        dt = self.jog_segment_time
+        line = f"$J=G91 {axis}{direction * feedrate / 60 * dt:.3f} F{feedrate:.1f}"
+        started = time.perf_counter()
+        sent = 0
+        in_flight = self._jog_in_flight
+        while not self.jog_stop_flag.is_set():
+            ahead = sent * dt - (time.perf_counter() - started)
+            if ahead > self.jog_lookahead:
+                self.jog_stop_flag.wait(ahead - self.jog_lookahead)
+                continue
+            entry = self._write_line(line, wait_response=True, stop_flag=self.jog_stop_flag)
+            if entry is None:
+                break
+            in_flight.append(entry)
+            sent += 1
+            while in_flight and in_flight[0].done.is_set():
+                response = "\n".join(in_flight.popleft().lines)
+                if "ok" not in response:
+                    print(f"[GRBL] Jog rejected: {response}")
+                    self.jog_stop_flag.set()
+                    break
+
+    def jog_cancel(self) -> float:
+        """
+        Stop jogging with the real-time jog cancel byte 0x85, GRBL decelerates and drops all queued jog motion.
+        Returns the time from the call until 0x85 was written (s).
+        """
+        requested = time.perf_counter()
+        self.jog_stop_flag.set()
+        self._write_realtime(b'\x85')
+        latency = time.perf_counter() - requested
+        self.jog_cancel_latency.add(latency)
+        with self._jog_lock:
+            if self.jog_thread is not None:
+                self.jog_thread.join(timeout=1.0)
+            # Segments still in GRBL's RX buffer when 0x85 arrived get planned after it, cancel those too
+            late = bool(self._jog_in_flight)
+            while self._jog_in_flight:
+                self._jog_in_flight.popleft().done.wait(timeout=1.0)
+            if late:
+                self._write_realtime(b'\x85')
+        return latency
+
+    @property
+    def streaming(self) -> bool:
+        return self.send_thread is not None and self.send_thread.is_alive()
+
+    @property
+    def jogging(self) -> bool:
+        return self.jog_thread is not None and self.jog_thread.is_alive()
+
     def start(self):
-        """Start streaming threads."""
-        if not "Idle" in self.get_status():
+        """Start streaming thread."""
+        status = self.get_status_snapshot(max_age=0.5)
+        if status is None or not status.is_idle:
             raise RuntimeError("GRBL not in Idle state. Cannot start streaming.")
         if self.loop_method is None:
             raise ValueError("No loop method defined for GRBLStreamer.")
         self.stop_flag.clear()
+        self.resume_flag.set()
         self.send_command('G91')  # Set to relative positioning before starting
+        self.ack_latency.reset()
+        self.ack_rate.reset()
+        self.acked_bytes = 0
+        self.stream_lines_acked = 0
+        self.planner_telemetry.start()
         self.send_thread = threading.Thread(target=self._send_loop, daemon=True)
-        self.read_thread = threading.Thread(target=self._read_loop, daemon=True)
         self.send_thread.start()
-        self.read_thread.start()
 
     def send_move_to_queue(self, gcode):
         """Queue a G-code command for sending."""
         self.cmd_queue.put(gcode)
 
-    # def pause(self):
-    #     """Pause streaming."""
-    #     if not "Run" in self.send_command('?'):
-    #         print("[GRBL] Not moving, cannot pause.")
-    #         return
-    #     print("[GRBL] Pausing...")
-    #     self.send_command('!')  # Pause command in GRBL
-    
-    # def resume(self):
-    #     """Resume streaming."""
-    #     if not "Hold" in self.send_command('?'):
-    #         print("[GRBL] Not paused, cannot resume.")
-    #         return
-    #     print("[GRBL] Resuming...")
-    #     self.send_command('~')  # Resume command in GRBL
+    def pause(self, timeout: float = 5.0) -> float:
+        """
+        Feed hold with the real-time '!' byte: GRBL decelerates to a stop and keeps its planner, the send loop parks
+        with the trajectory cursor where it is. Blocks until GRBL reports the hold complete, returns that latency (s).
+        """
+        if not self.streaming:
+            raise RuntimeError("Not streaming, nothing to pause.")
+        requested = time.monotonic()
+        self.resume_flag.clear()
+        self._write_realtime(b'!')
+        status = self._poll_until(lambda status: status.is_hold_complete, timeout, requested, "hold complete")
+        latency = status.timestamp - requested
+        self.pause_latency.add(latency)
+        print(f"[GRBL] Paused, standstill after {latency * 1000:.0f} ms")
+        return latency
+
+    def resume(self, timeout: float = 5.0) -> float:
+        """
+        Continue after pause() with the real-time '~' byte, the planned blocks and then the parked send loop carry on
+        with the rest of the stroke. Blocks until GRBL reports motion again, returns that latency (s).
+        """
+        if not self.paused:
+            raise RuntimeError("Not paused.")
+        requested = time.monotonic()
+        self._write_realtime(b'~')
+        self.resume_flag.set()
+        status = self._poll_until(lambda status: status.state == "Run" and (status.feedrate is None or status.feedrate > 0),
+                                  timeout, requested, "motion")
+        latency = status.timestamp - requested
+        self.resume_latency.add(latency)
+        print(f"[GRBL] Resumed, moving after {latency * 1000:.0f} ms")
+        return latency
+
+    @property
+    def paused(self) -> bool:
+        return not self.resume_flag.is_set()
 
     def stop(self):
         """Stop streaming and immediately halt motion."""
@@ -351,6 +969,9 @@ class GRBLStreamer:
         # First, stop the send thread to prevent new commands from being generated
         print("[GRBL] Stopping command generation...")
         self.stop_flag.set()
+        self.resume_flag.set()
+        with self.buffer_space_available:
+            self.buffer_space_available.notify_all()  # Wake the send loop if it waits for buffer space
         
         # Immediately flush the serial output buffer to prevent queued commands from being sent
         with self.ser_communication_lock:
@@ -365,24 +986,16 @@ class GRBLStreamer:
         # Soft reset causes GRBL to abort motion and enter alarm state
         self.soft_reset()
         
-        # Wait for read thread to finish
-        if self.read_thread:
-            self.read_thread.join(timeout=1.0)
-        
         # Clear command queue and buffer
         with self.buffer_data_lock:
             while not self.cmd_queue.empty():
                 self.cmd_queue.get()
-            while not self.sent_cmd_lengths.empty():
-                self.sent_cmd_lengths.get()
-            self.used_buffer = 0
             self.last_command = None
+        self.print_stream_stats()
         
         # Wait for alarm state and unlock
         print("[GRBL] Waiting for alarm state...")
-        timeout = time.time() + 2.0  # 2 second timeout
-        while "Alarm" not in self.get_status() and time.time() < timeout:
-            time.sleep(0.1)
+        self.wait_for_status(lambda status: status.state == "Alarm", timeout=2.0)
         
         print("[GRBL] Unlocking machine...")
         self.send_command('$X')  # Unlock the machine
@@ -397,9 +1010,26 @@ class GRBLStreamer:
             time.sleep(0.5)  # Wait for reset to complete
             # Clear any response data
             self.ser.reset_input_buffer()
+        # GRBL dropped its RX buffer, commands in flight will never be acked
+        self._clear_sent_commands()
+        self.feed_override = 100
         
     def close(self):
         """Close serial port."""
+        if self.jogging:
+            self.jog_cancel()
+        if self.jog_cancel_latency.summary()['count']:
+            print(f"[GRBL] Jog cancel latency: {self.jog_cancel_latency}")
+        if self.feed_override_latency.summary()['count']:
+            print(f"[GRBL] Feed override latency: {self.feed_override_latency}")
+        if self.pause_latency.summary()['count']:
+            print(f"[GRBL] Pause -> standstill: {self.pause_latency}")
+            print(f"[GRBL] Resume -> motion: {self.resume_latency}")
+        self.io_stop_flag.set()
+        self._poll_wakeup.set()
+        for thread in (self.status_thread, self.read_thread):
+            if thread:
+                thread.join(timeout=1.0)
         if self.ser:
             self.ser.close()
             print("[GRBL] Disconnected.")
@@ -417,9 +1047,82 @@ class GRBLStreamer:
         """Clear all messages from GRBL."""
         self.ser.read_all()
     
-    def get_status(self):
-        """Get current status from GRBL."""
-        return self.send_command('?')
+    def get_status(self, max_age: float = 0.25, timeout: float = 1.0) -> str:
+        """Get current status report line from GRBL (served from the status snapshot when fresh enough)."""
+        status = self.get_status_snapshot(max_age=max_age, timeout=timeout)
+        return status.raw if status else ""
+
+    def get_status_snapshot(self, max_age: float = None, timeout: float = 1.0) -> GRBLStatus | None:
+        """
+        Return the shared status snapshot without any serial I/O.
+        Only if there is none yet, or it is older than max_age seconds, a fresh report is requested and awaited.
+        Returns None if no report arrived within timeout.
+        """
+        with self.status_updated:
+            status = self.status
+            if status is not None and (max_age is None or status.age <= max_age):
+                return status
+            self.request_status()
+            self.status_updated.wait_for(lambda: self.status is not status, timeout=timeout)
+            return self.status if self.status is not status else None
+
+    def wait_for_status(self, predicate, timeout: float = None) -> GRBLStatus | None:
+        """Block until a status report satisfies predicate. Returns that report, or None on timeout."""
+        with self.status_updated:
+            if self.status_updated.wait_for(lambda: self.status is not None and predicate(self.status), timeout=timeout):
+                return self.status
+            return None
+
+    def wait_for_state(self, *states: str, timeout: float = None, after: float = None) -> GRBLStatus:
+        """
+        Block until GRBL reports one of states, e.g. wait_for_state("Idle") or wait_for_state("Alarm", "Idle").
+        Only reports received after `after` (time.monotonic(), default: now) count, so a report from before the
+        last command cannot end the wait. Raises TimeoutError.
+        """
+        return self._wait_for_report(lambda status: status.state in states, timeout, after, f"state {'/'.join(states)}")
+
+    def wait_for_idle(self, timeout: float = None, after: float = None) -> GRBLStatus:
+        """
+        Block until all motion is done: Idle with an empty planner ('Bf:' reported), a block that was acked but has
+        not started yet does not count as done. Raises TimeoutError.
+        """
+        def done(status: GRBLStatus) -> bool:
+            if not status.is_idle:
+                return False
+            return status.planner_blocks_available is None or status.planner_blocks_available >= self.planner_blocks_free
+        return self._wait_for_report(done, timeout, after, "Idle with an empty planner")
+
+    def wait_for_position(self, axis: str, target: float, tolerance: float = 0.01, timeout: float = None,
+                          idle: bool = True, after: float = None) -> GRBLStatus:
+        """
+        Block until the machine position of axis ('X', 'Y' or 'Z') is within tolerance (mm) of target,
+        with idle=True also until the move has come to a stop there. Raises TimeoutError.
+        """
+        index = AXES.index(axis.upper())
+
+        def arrived(status: GRBLStatus) -> bool:
+            if status.position is None or (idle and not status.is_idle):
+                return False
+            return abs((status.position.x, status.position.y, status.position.z)[index] - target) <= tolerance
+        return self._wait_for_report(arrived, timeout, after, f"{axis}={target:.3f}")
+
+    def _poll_until(self, predicate, timeout: float, after: float, what: str, interval: float = 0.01) -> GRBLStatus:
+        """_wait_for_report() asking for a report every interval, for latencies finer than the status poll rate."""
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                return self._wait_for_report(predicate, interval, after, what)
+            except TimeoutError:
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"GRBL did not reach {what} within {timeout} s, last status: {self.status}")
+
+    def _wait_for_report(self, predicate, timeout: float, after: float, what: str) -> GRBLStatus:
+        after = time.monotonic() if after is None else after
+        self.request_status()  # Do not wait for the next poll to see the present state
+        status = self.wait_for_status(lambda status: status.timestamp > after and predicate(status), timeout=timeout)
+        if status is None:
+            raise TimeoutError(f"GRBL did not reach {what} within {timeout} s, last status: {self.status}")
+        return status
 
 
 if __name__ == "__main__":
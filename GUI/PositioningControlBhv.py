@@ -1,54 +1,105 @@
 import time
 import threading
 
+from PySide6.QtCore import QEvent, QObject, QTimer, Qt
+from PySide6.QtWidgets import QAbstractButton, QAbstractSpinBox, QApplication, QComboBox, QFileDialog, QWidget
+
 from GUI.mainwindow import Ui_MainWindow
 from GUI.PositioningControl import PositioningController
+from GUI.JobQueue import JobQueue, JobQueueRunner
+from GUI.Recipe import Recipe, RecipePhase
+from GUI.Trajectory import STAGE_PROFILES
 from GUI.GPIOControl import GPIOController
-from GUI.ConfigParser import get_config_parser
+from GUI.ConfigParser import get_config_parser, get_config_path
+from GUI.UIUpdateBridge import UIUpdateBridge
+from GUI.CommandExecutor import CommandExecutor
 
 
 class PositioningControlBhv:
-    def __init__(self, ui: Ui_MainWindow, positioning_controller: PositioningController, gpio_controller: GPIOController):
+    def __init__(self, ui: Ui_MainWindow, positioning_controller: PositioningController, gpio_controller: GPIOController,
+                 ui_bridge: UIUpdateBridge, executor: CommandExecutor):
         self.ui = ui
         self.positioning_controller = positioning_controller
         self.gpio_controller = gpio_controller
+        self.ui_bridge = ui_bridge
+        self.executor = executor  # All GRBL I/O runs on the 'grbl' lane, never on the GUI thread
 
         self._experiment_timer: threading.Timer | None = None
         self._experiment_start_time: float | None = None
         self._experiment_duration_seconds: float = 0
         self._update_timer: threading.Timer | None = None
+        self._paused_remaining_seconds: float | None = None  # Remaining experiment time while paused
+        self._recipe: Recipe | None = None  # Recipe of the running experiment
+        self.hv_ramp = None  # HVRamp of the HV behaviour, set by the application once both exist, for recipe phases
+        # Next to the config file, a restart from another working directory still finds the interrupted jobs
+        self.job_queue = JobQueue(get_config_path("JobQueue", "File", fallback="jobs.json"))
+        self.job_runner: JobQueueRunner | None = None
+
+        # Press-and-hold jogging
+        self._jog_future = None  # jog() action of the active jog
+        self._pressed_move = None  # (axis, distance) of the move button held down
+        self._hold_timer = QTimer()
+        self._hold_timer.setSingleShot(True)
+        self._hold_timer.timeout.connect(self._start_held_jog)
+        self._jog_hold_delay = get_config_parser().getfloat("Positioning", "JogHoldDelay", fallback=0.25)
+        self._keyboard_jog_filter = KeyboardJogFilter(self)
 
         self.init()
         self.connections()
     
     def init(self):
+        # The experiment timers run on threading.Timer threads, their widget updates go through the bridge
+        self.ui_bridge.register("experiment_remaining_time", self.ui.positioning_experiment_remaining_time_value_label.setText)
+        self.ui_bridge.register("homing_progress", self.ui.positioning_home_pushButton.setText)
+        self.ui_bridge.register("planner", self._show_planner)
+        self.ui_bridge.register("recipe_phase", self.ui.positioning_experiment_recipe_phase_label.setText)
+        self.ui_bridge.register("job_queue", self.ui.positioning_experiment_queue_label.setText)
+        self.positioning_controller.grbl_streamer.add_status_listener(self._on_status)
         self._init_stage_amplitude()
+        self._init_stage_profile()
         self._init_send_command_widget()
+        self._check_interrupted_jobs()
 
     def connections(self):
         self.ui.positioning_power_checkBox.stateChanged.connect(self.toggle_positioning_power)
         self.ui.positioning_home_pushButton.clicked.connect(self.home)
         self.ui.positioning_experiment_start_pushButton.clicked.connect(self.start_experiment)
         self.ui.positioning_experiment_stop_pushButton.clicked.connect(self.stop_experiment)
+        self.ui.positioning_experiment_pause_pushButton.clicked.connect(self.toggle_pause)
+        self.ui.positioning_experiment_recipe_pushButton.clicked.connect(self.run_recipe)
+        self.ui.positioning_experiment_add_job_pushButton.clicked.connect(self.add_job)
+        self.ui.positioning_experiment_run_queue_pushButton.clicked.connect(lambda: self.run_queue())
+
+        # Move buttons: a click moves by the fixed distance, holding the button jogs until it is released
+        move_buttons = {
+            # Pump 1 controls
+            self.ui.positioning_pump_1_move_back_10_pushButton: ("X", -10),
+            self.ui.positioning_pump_1_move_back_1_pushButton: ("X", -1),
+            self.ui.positioning_pump_1_move_forward_1_pushButton: ("X", 1),
+            self.ui.positioning_pump_1_move_forward_10_pushButton: ("X", 10),
+            # Pump 2 controls
+            self.ui.positioning_pump_2_move_back_10_pushButton: ("Y", -10),
+            self.ui.positioning_pump_2_move_back_1_pushButton: ("Y", -1),
+            self.ui.positioning_pump_2_move_forward_1_pushButton: ("Y", 1),
+            self.ui.positioning_pump_2_move_forward_10_pushButton: ("Y", 10),
+            # Stage controls
+            self.ui.positioning_stage_move_back_10_pushButton: ("Z", -10),
+            self.ui.positioning_stage_move_back_1_pushButton: ("Z", -1),
+            self.ui.positioning_stage_move_forward_1_pushButton: ("Z", 1),
+            self.ui.positioning_stage_move_forward_10_pushButton: ("Z", 10),
+        }
+        for button, (axis, distance) in move_buttons.items():
+            button.pressed.connect(lambda axis=axis, distance=distance: self._move_pressed(axis, distance))
+            button.released.connect(self._move_released)
+        self.ui.positioning_stage_keyboard_jog_checkBox.toggled.connect(self.set_keyboard_jog)
 
-        # Pump 1 controls
-        self.ui.positioning_pump_1_move_back_10_pushButton.clicked.connect(lambda: self.positioning_controller.simple_move("X", -10))
-        self.ui.positioning_pump_1_move_back_1_pushButton.clicked.connect(lambda: self.positioning_controller.simple_move("X", -1))
-        self.ui.positioning_pump_1_move_forward_1_pushButton.clicked.connect(lambda: self.positioning_controller.simple_move("X", 1))
-        self.ui.positioning_pump_1_move_forward_10_pushButton.clicked.connect(lambda: self.positioning_controller.simple_move("X", 10))
-
-        # Pump 2 controls
-        self.ui.positioning_pump_2_move_back_10_pushButton.clicked.connect(lambda: self.positioning_controller.simple_move("Y", -10))
-        self.ui.positioning_pump_2_move_back_1_pushButton.clicked.connect(lambda: self.positioning_controller.simple_move("Y", -1))
-        self.ui.positioning_pump_2_move_forward_1_pushButton.clicked.connect(lambda: self.positioning_controller.simple_move("Y", 1))
-        self.ui.positioning_pump_2_move_forward_10_pushButton.clicked.connect(lambda: self.positioning_controller.simple_move("Y", 10))
-
-        # Stage controls
-        self.ui.positioning_stage_move_back_10_pushButton.clicked.connect(lambda: self.positioning_controller.simple_move("Z", -10))
-        self.ui.positioning_stage_move_back_1_pushButton.clicked.connect(lambda: self.positioning_controller.simple_move("Z", -1))
-        self.ui.positioning_stage_move_forward_1_pushButton.clicked.connect(lambda: self.positioning_controller.simple_move("Z", 1))
-        self.ui.positioning_stage_move_forward_10_pushButton.clicked.connect(lambda: self.positioning_controller.simple_move("Z", 10))
-        self.ui.positioning_stage_move_to_center_pushButton.clicked.connect(self.positioning_controller.center_stage)
+        # Live changes while the experiment runs. The spin boxes have no keyboard tracking: a typed value is applied
+        # once on Enter / focus out, not digit by digit, every change regenerates the trajectory
+        self.ui.positioning_pump_1_flow_doubleSpinBox.valueChanged.connect(self._rates_changed)
+        self.ui.positioning_pump_2_flow_doubleSpinBox.valueChanged.connect(self._rates_changed)
+        self.ui.positioning_stage_speed_spinBox.valueChanged.connect(self._rates_changed)
+        self.ui.positioning_experiment_feed_override_spinBox.valueChanged.connect(self.set_feed_override)
+        self.ui.positioning_stage_move_to_center_pushButton.clicked.connect(self.center_stage)
         self.ui.positioning_stage_calibrate_center_pushButton.clicked.connect(self.calibrate_center)
 
         # Disable hard limits and Homing when HV is powered on
@@ -56,9 +107,31 @@ class PositioningControlBhv:
 
         # DEV commands
         self.ui.positioning_send_command_pushButton.clicked.connect(
-            lambda: self.positioning_controller.grbl_streamer.send_command(self.ui.positioning_send_command_lineEdit.text())
+            lambda: self.executor.run("grbl", self.positioning_controller.send_command,
+                                      self.ui.positioning_send_command_lineEdit.text(),
+                                      widgets=(self.ui.positioning_send_command_pushButton,),
+                                      on_done=lambda response: print(f"[GRBL] {response}"),
+                                      description="Send command")
         )
 
+    def _on_status(self, status):
+        # Reader thread, every status report, the bridge only renders the newest one per frame
+        telemetry = self.positioning_controller.grbl_streamer.planner_telemetry
+        latest = telemetry.latest
+        if status.planner_blocks_available is not None and latest is not None:
+            self.ui_bridge.post("planner", *latest, len(telemetry.low_episodes), len(telemetry.underruns))
+
+    def _show_planner(self, used: int, size: int, low_episodes: int, underruns: int):
+        progress_bar = self.ui.positioning_experiment_planner_progressBar
+        progress_bar.setMaximum(size)
+        progress_bar.setValue(used)
+        text = "Planner %v/%m"
+        if low_episodes:
+            text += f", {low_episodes} low"
+        if underruns:
+            text += f", {underruns} underrun{'' if underruns == 1 else 's'}"
+        progress_bar.setFormat(text)
+
     def toggle_positioning_power(self, positioning_power_on):
         self.gpio_controller.enable_positioning_power(positioning_power_on)
         self.ui.positioning_home_pushButton.setEnabled(positioning_power_on and not self.ui.HV_power_checkBox.isChecked())
@@ -66,35 +139,348 @@ class PositioningControlBhv:
             self.ui.positioning_homing_done_widget.setEnabled(False)
 
     def home(self):
-        self.positioning_controller.home()
-        self.ui.positioning_homing_done_widget.setEnabled(True)
+        started = time.monotonic()
+
+        def on_progress(phase: str, status):
+            # Reader thread
+            self.ui_bridge.post("homing_progress", f"Homing: {phase} ({status.state}, {time.monotonic() - started:.0f} s)")
+
+        def on_done(_):
+            self.ui.positioning_homing_done_widget.setEnabled(True)
+            self.ui_bridge.post("homing_progress", "Home")  # Posted, so it replaces a progress update still pending
+
+        self.executor.run("grbl", self.positioning_controller.home, on_progress,
+                          widgets=(self.ui.positioning_home_pushButton,),
+                          on_done=on_done,
+                          on_error=lambda e: self.ui_bridge.post("homing_progress", "Home"),
+                          description="Homing")
+
+    def simple_move(self, axis: str, distance: float):
+        # Not disabled, repeated clicks queue up on the 'grbl' lane in order
+        self.executor.run("grbl", self.positioning_controller.simple_move, axis, distance,
+                          description=f"Move {axis}{distance:+g}")
+
+    def _move_pressed(self, axis: str, distance: float):
+        self._pressed_move = (axis, distance)
+        self._hold_timer.start(round(self._jog_hold_delay * 1000))
+
+    def _move_released(self):
+        if self._hold_timer.isActive():
+            # Released before the hold delay: a click
+            self._hold_timer.stop()
+            self.simple_move(*self._pressed_move)
+        else:
+            self.stop_jog()
+
+    def _start_held_jog(self):
+        axis, distance = self._pressed_move
+        fast = abs(distance) >= 10
+        self.start_jog(axis, 1 if distance > 0 else -1, fast)
+
+    def start_jog(self, axis: str, direction: int, fast: bool = False):
+        """Jog until stop_jog(), the 10 buttons and Shift jog at JogFeedrate, the others at JogSlowFeedrate."""
+        if self._jog_future is not None:
+            return
+        controller = self.positioning_controller
+        feedrate = controller.jog_feedrate if fast else controller.jog_slow_feedrate
+        self._jog_future = self.executor.run("grbl", controller.grbl_streamer.jog, axis, direction, feedrate,
+                                             description=f"Jog {axis}{'+' if direction > 0 else '-'}")
+
+    def stop_jog(self):
+        future, self._jog_future = self._jog_future, None
+        if future is None or future.cancel():
+            return  # Not jogging or the jog was still queued behind another action
+        # jog() only starts the jog thread, the cancel goes out right after it without waiting for the 'grbl' lane
+        future.add_done_callback(lambda f: self.executor.run(None, self.positioning_controller.grbl_streamer.jog_cancel,
+                                                             description="Jog cancel"))
+
+    def set_keyboard_jog(self, enabled: bool):
+        app = QApplication.instance()
+        if enabled:
+            app.installEventFilter(self._keyboard_jog_filter)
+        else:
+            app.removeEventFilter(self._keyboard_jog_filter)
+            self._keyboard_jog_filter.release()
+
+    def center_stage(self):
+        self.executor.run("grbl", self.positioning_controller.center_stage,
+                          widgets=(self.ui.positioning_stage_move_to_center_pushButton,),
+                          description="Move stage to center")
     
     def start_experiment(self):
-        self.ui.positioning_experiment_running_widget.setEnabled(False)
+        self._set_experiment_running(True)
         self._clean_experiment_timer()
-        self.positioning_controller.start_experiment(pump_1_flowrate=self.ui.positioning_pump_1_flow_doubleSpinBox.value(),
-                                                     pump_2_flowrate=self.ui.positioning_pump_2_flow_doubleSpinBox.value(),
-                                                     stage_feedrate=self.ui.positioning_stage_speed_spinBox.value(),
-                                                     stage_amplitude=self.ui.positioning_stage_amplitude_spinBox.value())
+        self.executor.run("grbl", self.positioning_controller.start_experiment,
+                          self.ui.positioning_pump_1_flow_doubleSpinBox.value(),
+                          self.ui.positioning_pump_2_flow_doubleSpinBox.value(),
+                          self.ui.positioning_stage_speed_spinBox.value(),
+                          self.ui.positioning_stage_amplitude_spinBox.value(),
+                          self.ui.positioning_stage_profile_comboBox.currentText(),
+                          on_done=self._on_experiment_started,
+                          on_error=lambda e: self._set_experiment_running(False),
+                          description="Start experiment")
+
+    def _on_experiment_started(self, _):
+        self.ui.positioning_experiment_pause_pushButton.setEnabled(True)
         duration = self.ui.positioning_experiment_duration_spinBox.value()
         if duration > 0:
-            self._experiment_duration_seconds = duration * 60  # Convert minutes to seconds
-            self._experiment_start_time = time.time()
-            self._experiment_timer = threading.Timer(self._experiment_duration_seconds, self.stop_experiment)
+            self._start_experiment_timer(duration * 60)  # Convert minutes to seconds
+
+    def _start_experiment_timer(self, seconds: float, auto_stop: bool = True):
+        """Count the remaining time down from seconds, auto_stop: stop the experiment when it is over."""
+        self._experiment_duration_seconds = seconds
+        self._experiment_start_time = time.time()
+        if auto_stop:
+            # The timer thread only hands the stop over to the GUI thread
+            self._experiment_timer = threading.Timer(self._experiment_duration_seconds,
+                                                     lambda: self.ui_bridge.call(self.stop_experiment))
             self._experiment_timer.daemon = True
             self._experiment_timer.start()
-            # Start the update timer to refresh remaining time display
-            self._update_remaining_time()
-            self._schedule_update_timer()
+        # Start the update timer to refresh remaining time display
+        self._update_remaining_time()
+        self._schedule_update_timer()
+
+    def run_recipe(self):
+        directory = get_config_path("Recipe", "Directory", fallback="Recipes")
+        path, _ = QFileDialog.getOpenFileName(self.ui.positioning_groupBox, "Run Recipe", directory,
+                                              "Recipes (*.json *.yaml *.yml)")
+        if not path:
+            return
+        try:
+            recipe = Recipe.load(path)
+        except (OSError, ValueError, ImportError) as e:
+            print(f"[GUI] Could not load recipe {path}: {e}")
+            self.ui.positioning_experiment_recipe_phase_label.setText(f"Recipe error: {e}")
+            return
+        if recipe.sets_voltage and self.hv_ramp is None:
+            print("[GUI] HV is not connected, the voltages of the recipe are not applied")
+        self._recipe = recipe
+        self._set_experiment_running(True)
+        self._clean_experiment_timer()
+        self.ui.positioning_experiment_recipe_phase_label.setText(f"{recipe.name}: starting")
+        self.executor.run("grbl", self.positioning_controller.start_recipe, recipe,
+                          self._on_recipe_phase, self._on_recipe_finished,
+                          on_done=self._on_recipe_started,
+                          on_error=lambda e: self._on_experiment_stopped(None),
+                          description=f"Start recipe {recipe.name}")
+
+    def _on_recipe_started(self, _):
+        self.ui.positioning_experiment_pause_pushButton.setEnabled(True)
+        # No automatic stop, the recipe ends with its last phase (moving phases end on whole stroke pairs)
+        self._start_experiment_timer(self._recipe.duration, auto_stop=False)
+
+    def _on_recipe_phase(self, index: int, phase: RecipePhase):
+        # Reader or timer thread, when GRBL starts executing the phase
+        recipe = self._recipe
+        if recipe is None:
+            return
+        text = f"{recipe.name}: {index + 1}/{len(recipe.phases)} {phase.name}"
+        if phase.voltage is not None and self.hv_ramp is not None:
+            self.executor.submit("hv", self.hv_ramp.start, phase.voltage)
+            text += f", HV -> {phase.voltage:.0f} V"
+        self.ui_bridge.post("recipe_phase", text)
+
+    def _on_recipe_finished(self):
+        # Reader thread, GRBL executed the last line
+        recipe = self._recipe
+        if recipe is not None:
+            self.ui_bridge.post("recipe_phase", f"{recipe.name}: finished")
+        self.ui_bridge.call(self.stop_experiment)
+
+    def add_job(self):
+        directory = get_config_path("Recipe", "Directory", fallback="Recipes")
+        path, _ = QFileDialog.getOpenFileName(self.ui.positioning_groupBox, "Add Job", directory,
+                                              "Recipes (*.json *.yaml *.yml)")
+        if not path:
+            return
+        try:
+            job = self.job_queue.add(path)
+        except (OSError, ValueError, ImportError) as e:
+            print(f"[GUI] Could not add job {path}: {e}")
+            self.ui.positioning_experiment_queue_label.setText(f"Job error: {e}")
+            return
+        print(f"[GUI] Job added: {job}")
+        self.ui_bridge.post("job_queue", f"Queue: {self.job_queue}")
+
+    def run_queue(self, home_first: bool = False):
+        """Run the pending jobs, home_first: home before the first one (after a restart of the application)."""
+        config = get_config_parser()
+        if self.job_runner is not None and self.job_runner.running:
+            return
+        if self.job_queue.next_pending() is None and not self.job_queue.interrupted():
+            self.ui.positioning_experiment_queue_label.setText(f"Queue: {self.job_queue}, nothing to run")
+            return
+        self.job_runner = JobQueueRunner(self.job_queue, self.positioning_controller,
+                                         resume_policy=config.get("JobQueue", "ResumePolicy", fallback="resume"),
+                                         max_attempts=config.getint("JobQueue", "MaxAttempts", fallback=2),
+                                         checkpoint_interval=config.getfloat("JobQueue", "CheckpointInterval",
+                                                                             fallback=5.0),
+                                         home_first=home_first,
+                                         make_safe=self._make_safe,
+                                         on_phase=lambda job, recipe, index, phase: self._on_recipe_phase(index, phase),
+                                         on_job=self._on_job,
+                                         on_idle=lambda: self.ui_bridge.call(self._on_queue_idle))
+        self._set_experiment_running(True)
+        self._clean_experiment_timer()
+        self.ui.positioning_experiment_queue_label.setText(f"Queue: {self.job_queue}, starting")
+        self.job_runner.start()
+
+    def _on_job(self, job, recipe):
+        # Job thread, recipe is None when the job ended
+        self._recipe = recipe
+        if recipe is not None:
+            self.ui_bridge.call(self._on_job_started, recipe.duration)
+            self.ui_bridge.post("job_queue", f"Job {job.name} ({job.id}), attempt {job.attempts}. Queue: {self.job_queue}")
+        else:
+            self.ui_bridge.call(self._on_job_finished)
+            self.ui_bridge.post("job_queue", f"Job {job.name}: {job.state}. Queue: {self.job_queue}")
+
+    def _on_job_started(self, duration: float):
+        self.ui.positioning_experiment_pause_pushButton.setEnabled(True)
+        self._clean_experiment_timer()
+        self._clean_update_timer()
+        self._start_experiment_timer(duration, auto_stop=False)
+
+    def _on_job_finished(self):
+        self._clean_experiment_timer()
+        self._clean_update_timer()
+        self._experiment_start_time = None
+        self._paused_remaining_seconds = None
+        self.ui.positioning_experiment_pause_pushButton.setEnabled(False)
+        self.ui.positioning_experiment_pause_pushButton.setText("Pause")
+
+    def _on_queue_idle(self):
+        self._on_job_finished()
+        self._on_experiment_stopped(None)
+        self.ui_bridge.post("job_queue", f"Queue: {self.job_queue}")
+
+    def _make_safe(self):
+        """Job thread, before interrupted jobs go on: the crashed process may have left the HV output on."""
+        self.gpio_controller.enable_HV(False)
+        if self.hv_ramp is not None:
+            hv_controller = self.hv_ramp.hv_controller
+
+            def hv_off():
+                self.hv_ramp.cancel()
+                if hv_controller.ser is not None and hv_controller.ser.is_open:
+                    hv_controller.set_voltage(0.0)
+                    hv_controller.set_enable_state(False)
+
+            try:
+                self.executor.submit("hv", hv_off).result(timeout=10.0)
+            except Exception as e:
+                print(f"[HV] Could not switch the HV off: {e}")
+        self.ui_bridge.call(self._show_hv_disabled)
+
+    def _show_hv_disabled(self):
+        # The operator enables the HV output again, the recipe phases only set the voltage
+        self.ui.HV_enable_pushButton.setChecked(False)
+        self.ui.HV_enable_pushButton.setText("Enable")
+        self.ui.HV_state_label.setText("OFF")
+
+    def _check_interrupted_jobs(self):
+        interrupted = self.job_queue.interrupted()
+        self.ui.positioning_experiment_queue_label.setText(f"Queue: {self.job_queue}")
+        if not interrupted:
+            return
+        print(f"[GUI] Job queue: interrupted by the last run: {', '.join(str(job) for job in interrupted)}")
+        if get_config_parser().getboolean("JobQueue", "AutoResume", fallback=False):
+            # Unattended: power the positioning and home before the jobs go on
+            self.ui.positioning_power_checkBox.setChecked(True)
+            self.ui.positioning_homing_done_widget.setEnabled(True)  # Stop stays reachable, the queue homes itself
+            self.run_queue(home_first=True)
+        else:
+            self.ui.positioning_experiment_queue_label.setText(
+                f"Queue: {self.job_queue}, interrupted: {interrupted[0].name}, home and run the queue to recover")
+
+    def toggle_pause(self):
+        streamer = self.positioning_controller.grbl_streamer
+        button = self.ui.positioning_experiment_pause_pushButton
+        # Real-time bytes, they must not wait behind a 'grbl' action
+        if streamer.paused:
+            self.executor.run("grbl_realtime", streamer.resume, widgets=(button,), on_done=self._on_resumed,
+                              description="Resume experiment")
+        else:
+            self.executor.run("grbl_realtime", streamer.pause, widgets=(button,), on_done=self._on_paused,
+                              description="Pause experiment")
+
+    def _on_paused(self, _):
+        self.ui.positioning_experiment_pause_pushButton.setText("Resume")
+        # Freeze the remaining time
+        if self._experiment_start_time is not None:
+            elapsed = time.time() - self._experiment_start_time
+            self._paused_remaining_seconds = max(0.0, self._experiment_duration_seconds - elapsed)
+            self._clean_experiment_timer()
+            self._clean_update_timer()
+            self._experiment_start_time = None
+
+    def _on_resumed(self, _):
+        self.ui.positioning_experiment_pause_pushButton.setText("Pause")
+        if self._paused_remaining_seconds is not None:
+            self._start_experiment_timer(self._paused_remaining_seconds, auto_stop=self._recipe is None)
+            self._paused_remaining_seconds = None
 
     def stop_experiment(self):
         print('Stopping experiment...')
         self._clean_experiment_timer()
         self._clean_update_timer()
         self._experiment_start_time = None
+        self._paused_remaining_seconds = None
+        self.ui.positioning_experiment_pause_pushButton.setEnabled(False)
+        self.ui.positioning_experiment_pause_pushButton.setText("Pause")
+        # Moves still queued behind the running action are dropped, the stop itself does not wait for the lane
+        self.executor.cancel_pending("grbl")
+        if self.job_runner is not None and self.job_runner.running:
+            # The running job ends as 'stopped' and the queue with it, on_idle resets the experiment widgets
+            self.executor.run(None, self.job_runner.stop,
+                              widgets=(self.ui.positioning_experiment_stop_pushButton,),
+                              description="Stop job queue")
+            return
+        self.executor.run(None, self._stop_streaming,
+                          widgets=(self.ui.positioning_experiment_stop_pushButton,),
+                          on_done=self._on_experiment_stopped,
+                          description="Stop experiment")
+
+    def _on_experiment_stopped(self, _):
+        self._set_experiment_running(False)
+        self._recipe = None
+        # The soft reset of the stop restored GRBL's feed override to 100 %
+        spin_box = self.ui.positioning_experiment_feed_override_spinBox
+        spin_box.blockSignals(True)
+        spin_box.setValue(100)
+        spin_box.blockSignals(False)
+
+    def _set_experiment_running(self, running: bool):
+        """While the experiment runs only the pump flows and the stage speed stay editable, they are applied live."""
+        if running:
+            self.ui.positioning_stage_keyboard_jog_checkBox.setChecked(False)
+        for button in (self.ui.positioning_experiment_recipe_pushButton, self.ui.positioning_experiment_run_queue_pushButton):
+            button.setEnabled(not running)
+        live = (self.ui.positioning_pump_1_flow_doubleSpinBox, self.ui.positioning_pump_2_flow_doubleSpinBox,
+                self.ui.positioning_stage_speed_spinBox)
+        for widget in self.ui.positioning_experiment_running_widget.findChildren(QWidget):
+            if isinstance(widget, (QAbstractButton, QAbstractSpinBox, QComboBox)) and widget not in live:
+                widget.setEnabled(not running)
+
+    def _rates_changed(self, _):
+        if not self.positioning_controller.grbl_streamer.streaming or self._recipe is not None:
+            return  # Used by the next start_experiment, a recipe sets the rates of its phases
+        self.executor.run("grbl", self.positioning_controller.set_flow_rates,
+                          self.ui.positioning_pump_1_flow_doubleSpinBox.value(),
+                          self.ui.positioning_pump_2_flow_doubleSpinBox.value(),
+                          self.ui.positioning_stage_speed_spinBox.value(),
+                          description="Change flow rates")
+
+    def set_feed_override(self, percent: int):
+        if self.positioning_controller.grbl_streamer.is_connected():
+            # Only real-time bytes: own lane, so it does not wait behind a 'grbl' action but keeps the order of changes
+            self.executor.run("grbl_realtime", self.positioning_controller.grbl_streamer.set_feed_override, percent,
+                              description="Feed override")
+
+    def _stop_streaming(self):
+        self.positioning_controller.stop_recipe()
         self.positioning_controller.grbl_streamer.stop()
         time.sleep(0.5)  # Give some time to stop
-        self.ui.positioning_experiment_running_widget.setEnabled(True)
     
     def _clean_experiment_timer(self):
         """Cancel and clear any existing experiment timer."""
@@ -142,25 +528,66 @@ class PositioningControlBhv:
         seconds = int(remaining % 60)
         time_str = f"{minutes:01d}:{seconds:02d}"
         
-        self.ui.positioning_experiment_remaining_time_value_label.setText(time_str)
+        self.ui_bridge.post("experiment_remaining_time", time_str)
         
         # If time is up, ensure we stop
         if remaining <= 0:
             self._clean_update_timer()
 
     def calibrate_center(self):
-        self.positioning_controller.calibrate_center()
-        self.ui.positioning_stage_amplitude_spinBox.setMaximum(abs(self.positioning_controller.stage_center))
+        self.executor.run("grbl", self.positioning_controller.calibrate_center,
+                          widgets=(self.ui.positioning_stage_calibrate_center_pushButton,),
+                          on_done=lambda _: self.ui.positioning_stage_amplitude_spinBox.setMaximum(
+                              abs(self.positioning_controller.stage_center)),
+                          description="Calibrate stage center")
     
     def _init_stage_amplitude(self):
         amplitude_limit = get_config_parser().getfloat("Positioning", "StageCenter")
         self.ui.positioning_stage_amplitude_spinBox.setMaximum(abs(amplitude_limit))
     
+    def _init_stage_profile(self):
+        self.ui.positioning_stage_profile_comboBox.addItems(list(STAGE_PROFILES))
+        self.ui.positioning_stage_profile_comboBox.setCurrentText(self.positioning_controller.stage_profile)
+
     def _hv_power_changed(self, hv_power_on):
         self.ui.positioning_home_pushButton.setEnabled(not hv_power_on and self.ui.positioning_power_checkBox.isChecked())
         if self.positioning_controller.grbl_streamer.is_connected():
-            self.positioning_controller.set_hard_limits(not hv_power_on)
+            self.executor.run("grbl", self.positioning_controller.set_hard_limits, not hv_power_on,
+                              description="Set hard limits")
         
     def _init_send_command_widget(self):
         self.ui.positioning_send_command_groupBox.setVisible(get_config_parser().getboolean("DEV", "EnablePositioningCMDs"))
-        
\ No newline at end of file
+        
+
+class KeyboardJogFilter(QObject):
+    """
+    Application wide key filter for the keyboard jog mode: Left / Right jog the stage (Z) while the key is held,
+    Shift jogs at the fast feedrate. Auto repeat is ignored, the jog stops on key release or when the window loses focus.
+    """
+    KEYS = {Qt.Key.Key_Left: -1, Qt.Key.Key_Right: 1}
+
+    def __init__(self, behaviour: PositioningControlBhv):
+        super().__init__()
+        self.behaviour = behaviour
+        self._held_key = None
+
+    def release(self):
+        if self._held_key is not None:
+            self._held_key = None
+            self.behaviour.stop_jog()
+
+    def eventFilter(self, watched, event):
+        if event.type() == QEvent.Type.ApplicationDeactivate:
+            self.release()
+        elif event.type() in (QEvent.Type.KeyPress, QEvent.Type.KeyRelease) and event.key() in self.KEYS:
+            if event.isAutoRepeat():
+                return True
+            if event.type() == QEvent.Type.KeyPress:
+                if self._held_key is None:
+                    self._held_key = event.key()
+                    fast = bool(event.modifiers() & Qt.KeyboardModifier.ShiftModifier)
+                    self.behaviour.start_jog("Z", self.KEYS[event.key()], fast)
+            elif event.key() == self._held_key:
+                self.release()
+            return True  # Consumed, the arrow keys do not reach the focused widget in jog mode
+        return super().eventFilter(watched, event)
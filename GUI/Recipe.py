@@ -0,0 +1,404 @@
+from bisect import bisect_right
+from collections import deque
+from dataclasses import dataclass, field, replace
+import json
+import math
+import os
+import threading
+import time
+
+import numpy as np
+
+try:
+    import yaml  # Optional, only needed for .yaml / .yml recipes
+except ImportError:
+    yaml = None
+
+from GUI.GCodeEncoder import GCodeEncoder
+from GUI.GRBLStatus import GRBLStatus
+from GUI.Trajectory import STAGE_PROFILES
+
+STILL_SEGMENT_TIME = 0.25  # s, segment length of phases in which the stage stands
+
+
+@dataclass(frozen=True)
+class RecipePhase:
+    """One step of a recipe, the stream runs it for duration seconds, then continues with the next phase."""
+    name: str
+    duration: float  # s, phases with a moving stage are rounded up to whole back-and-forth strokes
+    pump_1: float = 0.0  # ml/h
+    pump_2: float = 0.0  # ml/h
+    stage_feedrate: float = 0.0  # mm/min, 0: the stage stands at the start point
+    voltage: float | None = None  # V, HV setpoint ramped to when GRBL starts the phase, None keeps the present one
+
+    @property
+    def moves(self) -> bool:
+        return self.pump_1 > 0 or self.pump_2 > 0 or self.stage_feedrate > 0
+
+
+@dataclass(frozen=True)
+class Recipe:
+    """
+    Declarative multi-phase experiment, e.g. priming, HV ramp, deposition at several flow ratios and a purge.
+
+    Stage amplitude and profile are the same in all phases, every phase starts and ends with the stage at the
+    start point, so the G-code stream continues from one phase to the next without stopping.
+    """
+    name: str
+    phases: tuple[RecipePhase, ...]
+    stage_amplitude: float = 0.0  # mm
+    stage_profile: str | None = None  # Key of STAGE_PROFILES, None uses the configured profile
+    source: str | None = field(default=None, compare=False)  # File the recipe was loaded from
+    first_phase: int = 0  # Index of phases[0] in the loaded recipe, set by remaining()
+
+    @classmethod
+    def from_dict(cls, data: dict, source: str = None) -> "Recipe":
+        """Build and validate a recipe from its JSON / YAML structure. Raises ValueError."""
+        if not isinstance(data, dict) or not data.get('phases'):
+            raise ValueError("A recipe needs a non-empty 'phases' list")
+        phase_keys = {'name', 'duration', 'pump_1', 'pump_2', 'stage_feedrate', 'voltage'}
+        phases = []
+        for i, entry in enumerate(data['phases']):
+            unknown = set(entry) - phase_keys
+            if unknown:
+                raise ValueError(f"Phase {i + 1}: unknown keys {sorted(unknown)}")
+            if 'duration' not in entry:
+                raise ValueError(f"Phase {i + 1}: 'duration' is missing")
+            phase = RecipePhase(
+                name=str(entry.get('name', f"phase {i + 1}")),
+                duration=float(entry['duration']),
+                pump_1=float(entry.get('pump_1', 0.0)),
+                pump_2=float(entry.get('pump_2', 0.0)),
+                stage_feedrate=float(entry.get('stage_feedrate', 0.0)),
+                voltage=None if entry.get('voltage') is None else float(entry['voltage']),
+            )
+            if phase.duration <= 0:
+                raise ValueError(f"Phase '{phase.name}': duration must be positive")
+            if min(phase.pump_1, phase.pump_2, phase.stage_feedrate) < 0:
+                raise ValueError(f"Phase '{phase.name}': flow rates and stage feedrate must not be negative")
+            if phase.voltage is not None and phase.voltage < 0:
+                raise ValueError(f"Phase '{phase.name}': voltage must not be negative")
+            phases.append(phase)
+        stage_profile = data.get('stage_profile')
+        if stage_profile is not None and stage_profile not in STAGE_PROFILES:
+            raise ValueError(f"Unknown stage profile '{stage_profile}'. Available: {', '.join(STAGE_PROFILES)}")
+        stage_amplitude = float(data.get('stage_amplitude', 0.0))
+        if stage_amplitude < 0:
+            raise ValueError("stage_amplitude must not be negative")
+        name = data.get('name') or (os.path.splitext(os.path.basename(source))[0] if source else "recipe")
+        return cls(name=str(name), phases=tuple(phases), stage_amplitude=stage_amplitude, stage_profile=stage_profile,
+                   source=source)
+
+    @classmethod
+    def load(cls, path: str) -> "Recipe":
+        """Read a .json recipe, or a .yaml / .yml one if PyYAML is installed."""
+        with open(path, encoding="utf-8") as file:
+            if os.path.splitext(path)[1].lower() in ('.yaml', '.yml'):
+                if yaml is None:
+                    raise ImportError("YAML recipes need PyYAML (pip install pyyaml), or save the recipe as .json")
+                data = yaml.safe_load(file)
+            else:
+                data = json.load(file)
+        return cls.from_dict(data, source=path)
+
+    @property
+    def duration(self) -> float:
+        """Nominal duration (s), phases with a moving stage may run up to one stroke pair longer."""
+        return sum(phase.duration for phase in self.phases)
+
+    @property
+    def sets_voltage(self) -> bool:
+        return any(phase.voltage is not None for phase in self.phases)
+
+    def remaining(self, phase: int, phase_elapsed: float, min_duration: float = 1.0) -> "Recipe | None":
+        """
+        The rest of the recipe from phase_elapsed seconds into phase on, None if nothing is left. The first phase
+        gets the voltage the recipe had set by then, a remainder shorter than min_duration (s) is dropped. first_phase
+        of the result is the index its first phase has in this recipe's numbering (phase, or phase + 1 if dropped).
+        """
+        phases = list(self.phases[phase:])
+        if not phases:
+            return None
+        left = phases[0].duration - phase_elapsed
+        voltages = [p.voltage for p in self.phases[:phase + 1] if p.voltage is not None]
+        first = replace(phases[0], duration=left, voltage=voltages[-1] if voltages else None)
+        if left < min_duration:
+            if len(phases) == 1:
+                return None
+            first = replace(phases[1], voltage=first.voltage if phases[1].voltage is None else phases[1].voltage)
+            phases = phases[1:]
+            phase += 1
+        return replace(self, phases=(first, *phases[1:]), first_phase=self.first_phase + phase)
+
+
+class StillTrajectory:
+    """
+    Phase with a standing stage: segments of equal time in which only the pumps advance, for duration seconds.
+    Pump positions are rounded once on the absolute position like in OscillationTrajectory. Segments are made long
+    enough for the faster pump to move at least one step in each, a G4 dwell (which empties GRBL's planner) is
+    only written when no pump runs.
+    """
+    sub_segments = 1
+    stroke_index = 0
+    stroke_phase = 0
+
+    def __init__(self, pump_1_flowrate: float, pump_2_flowrate: float, duration: float,
+                 segment_time: float = STILL_SEGMENT_TIME, encoder: GCodeEncoder = None):
+        """
+        :param pump_1_flowrate: Pump 1 (X) feedrate (mm/min)
+        :param pump_2_flowrate: Pump 2 (Y) feedrate (mm/min)
+        :param duration: Phase duration (s), rounded to whole segments
+        :param segment_time: Shortest duration of one G-code line (s)
+        """
+        self.encoder = encoder or GCodeEncoder(compact=False)
+        for axis, flowrate in (('X', pump_1_flowrate), ('Y', pump_2_flowrate)):
+            if flowrate > 0:
+                steps_per_mm = self.encoder.steps_per_mm.get(axis, 10 ** self.encoder.decimals)
+                segment_time = max(segment_time, min(duration, 1.01 / steps_per_mm / (flowrate / 60)))
+        self.count = max(1, math.ceil(duration / segment_time - 1e-9))  # Segments of the phase
+        self.segment_time = duration / self.count
+        self.pump_1_flowrate = pump_1_flowrate
+        self.pump_2_flowrate = pump_2_flowrate
+        self.reset()
+
+    @property
+    def segment_rate(self) -> float:
+        return 1.0 / self.segment_time
+
+    def stroke_of(self, segment: int) -> int:
+        return 0
+
+    def stroke_phase_of(self, segment: int) -> int:
+        return 0
+
+    def commanded_pump_distance(self, segments: int = None) -> tuple[float, float]:
+        """Total X, Y distance (mm) commanded by the first segments (default: all returned so far)."""
+        minutes = min(self.segment_index if segments is None else segments, self.count) * self.segment_time / 60
+        return (self.encoder.written_position('X', minutes * self.pump_1_flowrate),
+                self.encoder.written_position('Y', minutes * self.pump_2_flowrate))
+
+    def reset(self):
+        self.segment_index = 0
+        self.encoder.reset()
+        self._ready = deque()
+
+    def prepare(self):
+        """Generate all lines of the phase now, next_command() then only pops them."""
+        if self._ready or self.segment_index:
+            return
+        minutes = np.arange(self.count + 1) * (self.segment_time / 60)
+        positions = {'X': minutes * self.pump_1_flowrate, 'Y': minutes * self.pump_2_flowrate}
+        self._ready.extend(self.encoder.encode(positions, segment_time=self.segment_time))
+
+    def next_command(self) -> str:
+        self.prepare()
+        self.segment_index += 1
+        return self._ready.popleft()
+
+
+class RecipeTrajectory:
+    """
+    The phase trajectories of a recipe as one stream of G-code lines for GRBLStreamer's send loop.
+
+    All phase trajectories are built and their first batch generated before the stream starts, the switch to the
+    next phase is only a pointer change between two lines. A phase with a moving stage ends at the first stroke
+    boundary after its duration at which the stage is back at the start point (an even number of strokes), a phase
+    with a standing stage (StillTrajectory) after exactly its segments. After the last phase next_command() returns None.
+    phase_starts holds the line index each phase started at, filled in as the lines are generated.
+    """
+    def __init__(self, phases: list, on_phase_generated=None):
+        """
+        :param phases: [(RecipePhase, trajectory)] in order
+        :param on_phase_generated: on_phase_generated(index) is called on the send thread with the first line of a phase
+        """
+        self.phases = phases
+        self.on_phase_generated = on_phase_generated
+        self.reset()
+
+    def reset(self):
+        for _, trajectory in self.phases:
+            trajectory.reset()
+            trajectory.prepare()
+        self.phase_index = 0
+        self.segment_index = 0
+        self.phase_starts = [0]  # Line index of the first line of every phase generated so far
+        self._stroke_offsets = [0]  # Strokes of all phases before
+        self.finished = False
+
+    @property
+    def trajectory(self):
+        return self.phases[self.phase_index][1]
+
+    @property
+    def segment_rate(self) -> float:
+        return self.trajectory.segment_rate
+
+    def phase_rate(self, index: int) -> float:
+        return self.phases[index][1].segment_rate
+
+    @property
+    def stroke_index(self) -> int:
+        return self._stroke_offsets[-1] + self.trajectory.stroke_index
+
+    def stroke_of(self, line: int) -> int:
+        """Stroke (counted over all phases) a line belongs to, thread safe against the send thread."""
+        starts, offsets = self.phase_starts, self._stroke_offsets
+        index = min(max(0, bisect_right(starts, line) - 1), len(offsets) - 1)
+        return offsets[index] + self.phases[index][1].stroke_of(line - starts[index])
+
+    def progress(self, line: int) -> dict:
+        """
+        Where the recipe is after line lines: phase index, time into the phase and the whole recipe (s, nominal time of
+        the lines), stroke and segment within the stroke of the phase, and pump X, Y distance (mm) of all phases.
+        """
+        starts = self.phase_starts
+        index = max(0, bisect_right(starts, line) - 1)
+        local = line - starts[index]
+        elapsed = 0.0
+        pump_1 = pump_2 = 0.0
+        for k in range(index + 1):
+            trajectory = self.phases[k][1]
+            segments = local if k == index else starts[k + 1] - starts[k]
+            elapsed += segments / trajectory.segment_rate
+            x, y = trajectory.commanded_pump_distance(segments)
+            pump_1 += x
+            pump_2 += y
+        trajectory = self.phases[index][1]
+        return {
+            'phase': index,
+            'phase_elapsed': local / trajectory.segment_rate,
+            'elapsed': elapsed,
+            'stroke': trajectory.stroke_of(local),
+            'stroke_phase': trajectory.stroke_phase_of(local),
+            'pump_1': pump_1,
+            'pump_2': pump_2,
+        }
+
+    def _phase_done(self) -> bool:
+        phase, trajectory = self.phases[self.phase_index]
+        if isinstance(trajectory, StillTrajectory):
+            return trajectory.segment_index >= trajectory.count
+        trajectory.prepare()  # A shaped trajectory knows where the next stroke starts once it is rendered
+        elapsed = trajectory.segment_index / trajectory.segment_rate
+        return elapsed >= phase.duration and trajectory.stroke_phase == 0 and trajectory.stroke_index % 2 == 0
+
+    def next_command(self) -> str | None:
+        if self.finished:
+            return None
+        if self._phase_done():
+            if self.phase_index + 1 == len(self.phases):
+                self.finished = True
+                print(f"[GRBL] Recipe: all {len(self.phases)} phases generated, {self.segment_index} lines")
+                return None
+            self._stroke_offsets.append(self.stroke_index)
+            self.phase_index += 1
+            self.phase_starts.append(self.segment_index)
+            if self.on_phase_generated:
+                self.on_phase_generated(self.phase_index)
+        self.segment_index += 1
+        return self.trajectory.next_command()
+
+
+class RecipeRunner:
+    """
+    Follows a recipe on GRBL's side of the stream and calls on_phase(index, phase) when GRBL starts executing the
+    first line of a phase, e.g. to change the HV setpoint exactly at the phase boundary.
+
+    The executed line is known from every status report (acknowledged lines minus the blocks in the planner).
+    When the boundary is less than lead seconds ahead, a timer is set for the predicted moment (lines left at the
+    phase's segment rate and the feed override), so the callback does not wait for the next status poll.
+    on_finished() is called once GRBL executed the last line and is idle. Callbacks run on the reader or the timer
+    thread, they have to be quick.
+    """
+    def __init__(self, grbl_streamer, trajectory: RecipeTrajectory, on_phase=None, on_finished=None, lead: float = 0.25):
+        self.grbl_streamer = grbl_streamer
+        self.trajectory = trajectory
+        self.on_phase = on_phase
+        self.on_finished = on_finished
+        self.lead = lead  # s
+        self.phase_index = -1  # Phase GRBL is executing
+        self.executed_lines = 0  # Streamed lines GRBL finished, from the newest status report
+        self.finished = False  # GRBL executed the whole recipe (done is also set by stop())
+        self.entered = []  # (phase index, time.perf_counter(), 'report' or 'predicted')
+        self.done = threading.Event()
+        self._lock = threading.Lock()
+        self._timer = None
+
+    @property
+    def phase(self) -> RecipePhase | None:
+        return self.trajectory.phases[self.phase_index][0] if self.phase_index >= 0 else None
+
+    def start(self):
+        """Call right before the stream starts, the first phase begins with it."""
+        self._enter(0, 'report')
+        self.grbl_streamer.add_status_listener(self._on_status)
+
+    def stop(self):
+        self.grbl_streamer.remove_status_listener(self._on_status)
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        self.done.set()
+
+    def _on_status(self, status: GRBLStatus):
+        executed = self.grbl_streamer.executed_stream_lines(status)
+        if executed is None or self.done.is_set():
+            return
+        self.executed_lines = executed
+        trajectory = self.trajectory
+        starts = trajectory.phase_starts
+        while self.phase_index + 1 < len(starts) and starts[self.phase_index + 1] <= executed:
+            if not self._enter(self.phase_index + 1, 'report'):  # In a loop for phases shorter than a poll interval
+                return
+        following = self.phase_index + 1
+        if following < len(trajectory.phase_starts):
+            lines_left = trajectory.phase_starts[following] - executed
+            if self._timer is None and not self.grbl_streamer.paused:
+                override = status.overrides[0] / 100 if status.overrides else 1.0
+                eta = lines_left / (trajectory.phase_rate(self.phase_index) * override)
+                if eta <= self.lead:
+                    with self._lock:
+                        self._timer = threading.Timer(eta, self._enter_predicted, (following,))
+                        self._timer.daemon = True
+                        self._timer.start()
+        elif trajectory.finished and executed >= trajectory.segment_index and status.is_idle:
+            self.finished = True
+            self.stop()
+            print(f"[GRBL] Recipe finished: {self.trajectory.segment_index} lines")
+            if self.on_finished:
+                self.on_finished()
+
+    def _enter_predicted(self, index: int):
+        with self._lock:
+            self._timer = None
+        if not self.grbl_streamer.paused:
+            self._enter(index, 'predicted')  # Otherwise the reports after resume catch the boundary
+
+    def _enter(self, index: int, how: str) -> bool:
+        with self._lock:
+            if index != self.phase_index + 1 or self.done.is_set():
+                return False
+            self.phase_index = index
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self.entered.append((index, time.perf_counter(), how))
+        phase = self.trajectory.phases[index][0]
+        print(f"[GRBL] Recipe phase {index + 1}/{len(self.trajectory.phases)} '{phase.name}' started ({how})")
+        if self.on_phase:
+            self.on_phase(index, phase)
+        return True
+
+
+if __name__ == "__main__":
+    recipe = Recipe.from_dict({
+        'name': "two ratios",
+        'stage_amplitude': 20,
+        'phases': [
+            {'name': "prime", 'duration': 2, 'pump_1': 5, 'pump_2': 5},
+            {'name': "hv ramp", 'duration': 5, 'pump_1': 1, 'pump_2': 2, 'stage_feedrate': 1000, 'voltage': 15000},
+            {'name': "wait", 'duration': 1},
+        ],
+    })
+    print(recipe.name, f"{recipe.duration:.0f} s", [phase.name for phase in recipe.phases])
@@ -0,0 +1,84 @@
+import time
+
+import numpy as np
+
+
+class SignalBuffer:
+    """
+    Fixed capacity history of a sampled signal: monotonic timestamps (float64) and values (float32).
+
+    Storage is preallocated and mirrored (every sample is written at i and i + capacity), so any window of
+    the most recent samples is one contiguous slice and is returned as a view without copying. append() is O(1).
+
+    Single writer, lock free readers: the writer fills both copies before publishing the new count, readers
+    take the count once and slice. A view of n samples stays valid for capacity - n further appends, copy it
+    if it has to be kept longer.
+    """
+    def __init__(self, capacity: int = 4096):
+        if capacity < 2:
+            raise ValueError("capacity must be at least 2")
+        self.capacity = capacity
+        self._timestamps = np.zeros(2 * capacity, dtype=np.float64)
+        self._values = np.zeros(2 * capacity, dtype=np.float32)
+        self._count = 0  # Total number of samples appended
+
+    def append(self, value: float, timestamp: float = None):
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        index = self._count % self.capacity
+        self._timestamps[index] = self._timestamps[index + self.capacity] = timestamp
+        self._values[index] = self._values[index + self.capacity] = value
+        self._count += 1
+
+    def clear(self):
+        self._count = 0
+
+    def __len__(self):
+        return min(self._count, self.capacity)
+
+    @property
+    def total(self) -> int:
+        """Number of samples appended since creation or clear(), including overwritten ones."""
+        return self._count
+
+    def _window(self, count: int, n: int) -> tuple[np.ndarray, np.ndarray]:
+        n = min(n, count, self.capacity)
+        end = count % self.capacity + self.capacity
+        return self._timestamps[end - n:end], self._values[end - n:end]
+
+    def last(self, n: int = None) -> tuple[np.ndarray, np.ndarray]:
+        """Views of the timestamps and values of the last n samples (all kept samples if n is None), oldest first."""
+        count = self._count
+        return self._window(count, self.capacity if n is None else n)
+
+    def since(self, t: float) -> tuple[np.ndarray, np.ndarray]:
+        """Views of the samples with timestamp >= t (time.monotonic() clock)."""
+        timestamps, values = self.last()
+        start = int(np.searchsorted(timestamps, t, side='left'))
+        return timestamps[start:], values[start:]
+
+    def latest(self) -> tuple[float, float] | None:
+        """(timestamp, value) of the newest sample, None if empty."""
+        count = self._count
+        if count == 0:
+            return None
+        index = (count - 1) % self.capacity
+        return float(self._timestamps[index]), float(self._values[index])
+
+    def stats(self, seconds: float = None, n: int = None) -> dict:
+        """
+        Rolling count, mean, min, max and std over the last seconds, or the last n samples (all kept samples if both are None).
+        Statistics are computed in float64, values are None if the window is empty.
+        """
+        if seconds is not None:
+            _, values = self.since(time.monotonic() - seconds)
+        else:
+            _, values = self.last(n)
+        if values.size == 0:
+            return {'count': 0, 'mean': None, 'min': None, 'max': None, 'std': None}
+        return {
+            'count': int(values.size),
+            'mean': float(values.mean(dtype=np.float64)),
+            'min': float(values.min()),
+            'max': float(values.max()),
+            'std': float(values.std(dtype=np.float64)),
+        }
@@ -0,0 +1,396 @@
+import bisect
+from collections import deque
+import math
+
+import numpy as np
+
+from GUI.GCodeEncoder import GCodeEncoder
+
+
+class OscillationTrajectory:
+    """
+    Precompiled G-code generator for the experiment motion (relative positioning, G91).
+
+    The stage (Z) oscillates between the two end points while both pumps (X, Y) advance continuously.
+    Each stroke can be split into sub_segments equal G1 moves. All positions are kept as integers in units
+    of 10^-decimals mm, computed from the absolute segment index, so rounding never accumulates:
+    - pumps: the commanded distance after any number of segments is the exact distance rounded once
+    - stage: every stroke sums up to exactly the same integer length, so the stage never wanders
+
+    Segments are produced in vectorized batches, next_command() only pops the next ready line.
+    The lines are written by a GCodeEncoder from the absolute positions (by default the full fixed point format).
+    set_rates() changes the pump distances and the feedrate while streaming, from the next segment on.
+    """
+    def __init__(self, x_stroke: float, y_stroke: float, z_stroke: float, feedrate: float,
+                 sub_segments: int = 1, decimals: int = 3, batch_size: int = 256, encoder: GCodeEncoder = None):
+        """
+        :param x_stroke: Pump 1 (X) distance per stroke (mm)
+        :param y_stroke: Pump 2 (Y) distance per stroke (mm)
+        :param z_stroke: Stage (Z) distance of the first stroke (mm), signed. Following strokes alternate direction
+        :param feedrate: Common GRBL feedrate (mm/min)
+        :param sub_segments: Number of G1 moves each stroke is split into
+        :param decimals: Number of decimals of the internal integer positions
+        :param batch_size: Number of segments generated at once
+        :param encoder: Writes the G-code lines, default GCodeEncoder(compact=False, decimals=decimals)
+        """
+        if sub_segments < 1:
+            raise ValueError("sub_segments must be at least 1")
+        self.x_stroke = x_stroke
+        self.y_stroke = y_stroke
+        self.z_stroke = z_stroke
+        self.feedrate = feedrate
+        self.sub_segments = sub_segments
+        self.decimals = decimals
+        self.batch_size = batch_size
+        self.encoder = encoder or GCodeEncoder(compact=False, decimals=decimals)
+
+        self._scale = 10 ** decimals
+        # Pump advance per segment in integer units (float, rounded only on absolute positions)
+        self._x_units_per_segment = x_stroke * self._scale / sub_segments
+        self._y_units_per_segment = y_stroke * self._scale / sub_segments
+        # (segment index, integer position) the current pump rates count from, moved by set_rates()
+        self._pump_origin = {'X': (0, 0), 'Y': (0, 0)}
+        # Stage sub-segment pattern of one stroke, sums exactly to the rounded stroke length
+        z_boundaries = np.rint(np.arange(sub_segments + 1) * (z_stroke * self._scale / sub_segments)).astype(np.int64)
+        self._z_pattern = np.diff(z_boundaries)
+
+        self._update_axes()
+
+        self.segment_index = 0  # Index of the next segment returned by next_command
+        self._generated_index = 0  # Index of the next segment to be generated
+        self._ready = deque()
+
+    @property
+    def stroke_index(self) -> int:
+        """Index of the stroke the next segment belongs to."""
+        return self.segment_index // self.sub_segments
+
+    @property
+    def stroke_phase(self) -> int:
+        """Index of the next segment within its stroke."""
+        return self.segment_index % self.sub_segments
+
+    def stroke_of(self, segment: int) -> int:
+        """Index of the stroke a segment belongs to."""
+        return segment // self.sub_segments
+
+    def stroke_phase_of(self, segment: int) -> int:
+        """Index of a segment within its stroke."""
+        return segment % self.sub_segments
+
+    def _update_axes(self):
+        # Only axes that actually move are written
+        axes = (('X', self.x_stroke), ('Y', self.y_stroke), ('Z', self.z_stroke))
+        self._axes = [axis for axis, dist in axes if dist != 0]
+
+    def reset(self, segment_index: int = 0):
+        """Restart generation at segment_index (0 = beginning of the first stroke)."""
+        self.segment_index = segment_index
+        self._generated_index = segment_index
+        self._ready.clear()
+        self.encoder.reset()
+        if segment_index == 0:
+            self._pump_origin = {'X': (0, 0), 'Y': (0, 0)}
+
+    def set_rates(self, x_stroke: float, y_stroke: float, feedrate: float):
+        """
+        Change the pump distances per stroke and the feedrate from the next segment returned on, the stage strokes
+        stay the same. Ready lines are dropped and regenerated, the pump positions continue without a jump.
+        """
+        self._move_pump_origin()
+        self.x_stroke = x_stroke
+        self.y_stroke = y_stroke
+        self.feedrate = feedrate
+        self._x_units_per_segment = x_stroke * self._scale / self.sub_segments
+        self._y_units_per_segment = y_stroke * self._scale / self.sub_segments
+        self._update_axes()
+        self._generated_index = self.segment_index
+        self._ready.clear()
+        self.encoder.reset()  # The modal state of the dropped lines is gone with them
+
+    def _move_pump_origin(self):
+        """Let the pump rates count from the next segment returned, before they are changed."""
+        index = self.segment_index
+        for axis in ('X', 'Y'):
+            self._pump_origin[axis] = (index, int(self._pump_units(axis, np.array([index]))[0]))
+
+    def _pump_units(self, axis: str, boundaries: np.ndarray) -> np.ndarray:
+        """Integer pump position (units of 10^-decimals mm) at the given segment boundaries."""
+        origin_index, origin_units = self._pump_origin[axis]
+        units_per_segment = self._x_units_per_segment if axis == 'X' else self._y_units_per_segment
+        return origin_units + np.rint((boundaries - origin_index) * units_per_segment).astype(np.int64)
+
+    def next_command(self) -> str:
+        if not self._ready:
+            self._ready.extend(self._next_batch())
+        self.segment_index += 1
+        return self._ready.popleft()
+
+    def prepare(self):
+        """Generate the next batch now if none is ready, so the following next_command() only pops a line."""
+        if not self._ready:
+            self._ready.extend(self._next_batch())
+
+    def _next_batch(self) -> list[str]:
+        lines = self._generate(self._generated_index, self.batch_size)
+        self._generated_index += self.batch_size
+        return lines
+
+    def _generate(self, start: int, count: int) -> list[str]:
+        """Generate G-code lines of segments start .. start + count - 1 (continuing the encoder's modal state)."""
+        boundaries = np.arange(start, start + count + 1, dtype=np.int64)
+        positions = {}
+        for axis in self._axes:
+            units = self._z_units(boundaries) if axis == 'Z' else self._pump_units(axis, boundaries)
+            positions[axis] = units / self._scale
+        return self.encoder.encode(positions, feedrate=self.feedrate)
+
+    def _z_units(self, boundaries: np.ndarray) -> np.ndarray:
+        """Integer stage position (units of 10^-decimals mm) at the given segment boundaries."""
+        stroke, sub = np.divmod(boundaries, self.sub_segments)
+        partial = np.concatenate(([0], np.cumsum(self._z_pattern)))  # Position within a stroke
+        return np.where(stroke & 1, partial[-1] - partial[sub], partial[sub])  # Every other stroke goes back
+
+    @property
+    def segment_rate(self) -> float:
+        """Segments (G-code lines) per second needed to keep the motion continuous."""
+        stroke_length = math.sqrt(self.x_stroke**2 + self.y_stroke**2 + self.z_stroke**2)
+        if stroke_length == 0 or self.feedrate <= 0:
+            return 0.0
+        return self.sub_segments / (stroke_length / self.feedrate * 60)
+
+    def commanded_pump_distance(self, segments: int = None) -> tuple[float, float]:
+        """Total X, Y distance (mm) commanded by the first segments (default: all returned so far)."""
+        segments = np.array([self.segment_index if segments is None else segments])
+        x = self.encoder.written_position('X', self._pump_units('X', segments)[0] / self._scale)
+        y = self.encoder.written_position('Y', self._pump_units('Y', segments)[0] / self._scale)
+        return x, y
+
+
+class StageProfile:
+    """
+    Velocity profile of a single stage stroke.
+    shape(tau) maps the fraction of stroke time (0..1) to the fraction of stroke length travelled (0..1).
+    """
+    name = "linear"
+
+    def __init__(self, dwell_time: float = 0.0):
+        self.dwell_time = dwell_time  # Seconds the stage stands still at each end point (pumps keep running)
+
+    def stroke_time(self, length: float, feedrate: float) -> float:
+        """Duration of a stroke in seconds, feedrate is the mean stage speed while moving (mm/min)."""
+        return abs(length) / feedrate * 60 + self.dwell_time
+
+    def shape(self, tau: np.ndarray, stroke_time: float) -> np.ndarray:
+        moving = 1.0 - self.dwell_time / stroke_time if stroke_time > 0 else 1.0
+        return np.clip(tau / moving, 0.0, 1.0) if moving > 0 else np.ones_like(tau)
+
+
+class SinusoidalProfile(StageProfile):
+    """Stage position follows a half cosine, speed is zero at the end points and pi/2 * feedrate in the middle."""
+    name = "sinusoidal"
+
+    def shape(self, tau: np.ndarray, stroke_time: float) -> np.ndarray:
+        moving = 1.0 - self.dwell_time / stroke_time if stroke_time > 0 else 1.0
+        tau = np.clip(tau / moving, 0.0, 1.0) if moving > 0 else np.ones_like(tau)
+        return (1.0 - np.cos(np.pi * tau)) / 2
+
+
+class DwellProfile(StageProfile):
+    """Constant stage speed with a fixed dwell at both end points."""
+    name = "dwell"
+
+    def __init__(self, dwell_time: float = 0.5):
+        super().__init__(dwell_time=dwell_time)
+
+
+STAGE_PROFILES = {profile.name: profile for profile in (StageProfile, SinusoidalProfile, DwellProfile)}
+
+
+class ShapedOscillationTrajectory(OscillationTrajectory):
+    """
+    Oscillation with a shaped stage velocity profile, rendered as many short coordinated X/Y/Z segments.
+
+    All segments have the same duration, so the pump increments per segment are constant and the pump
+    volume rates stay exactly the same whatever the stage does. Each segment gets its own feedrate
+    (segment length / segment time). Stage end points can be randomized and/or shifted in raster passes,
+    they are always kept inside the nominal [start - stroke, start] envelope.
+    set_flow_rates() changes the pump rates and the stage speed from the next segment on.
+    """
+    def __init__(self, pump_1_flowrate: float, pump_2_flowrate: float, stage_feedrate: float, stage_amplitude: float,
+                 profile: StageProfile = None, segments_per_stroke: int = 200, end_point_jitter: float = 0.0,
+                 raster_step: float = 0.0, raster_passes: int = 1, strokes_per_pass: int = 10, seed: int = None,
+                 decimals: int = 3, batch_size: int = 256, encoder: GCodeEncoder = None):
+        """
+        :param pump_1_flowrate: Pump 1 (X) feedrate (mm/min)
+        :param pump_2_flowrate: Pump 2 (Y) feedrate (mm/min)
+        :param stage_feedrate: Mean stage speed while moving (mm/min)
+        :param stage_amplitude: Stage amplitude (mm), first stroke goes from the start point by -2*amplitude
+        :param profile: Stage velocity profile (default linear)
+        :param segments_per_stroke: Number of segments of a nominal stroke, sets the segment duration
+        :param end_point_jitter: Max random shift of every end point (mm)
+        :param raster_step: End point shift between consecutive raster passes (mm)
+        :param raster_passes: Number of raster passes before the offsets repeat
+        :param strokes_per_pass: Number of strokes of each raster pass
+        :param seed: Random seed of the end point jitter (runs are reproducible)
+        """
+        if stage_amplitude <= 0:
+            raise ValueError("Shaped stage profiles need a positive stage amplitude.")
+        if stage_feedrate <= 0:
+            raise ValueError("Shaped stage profiles need a positive stage speed.")
+        self.profile = profile or StageProfile()
+        self.stage_feedrate = stage_feedrate
+        self.stage_amplitude = stage_amplitude
+        self.end_point_jitter = end_point_jitter
+        self.raster_step = raster_step
+        self.raster_passes = max(1, raster_passes)
+        self.strokes_per_pass = max(1, strokes_per_pass)
+        self.seed = seed
+
+        stroke_length = 2 * stage_amplitude
+        self.nominal_stroke_time = self.profile.stroke_time(stroke_length, stage_feedrate)  # seconds
+        self.segment_time = self.nominal_stroke_time / segments_per_stroke  # seconds
+        segment_minutes = self.segment_time / 60
+
+        super().__init__(x_stroke=pump_1_flowrate * segment_minutes, y_stroke=pump_2_flowrate * segment_minutes,
+                         z_stroke=-stroke_length, feedrate=0.0, sub_segments=1, decimals=decimals, batch_size=batch_size,
+                         encoder=encoder)
+        self._axes = ['X', 'Y', 'Z']
+        self.reset()
+
+    def reset(self, segment_index: int = 0):
+        if segment_index != 0:
+            raise ValueError("Shaped trajectories can only restart from the beginning.")
+        super().reset(0)
+        self._rng = np.random.default_rng(self.seed)
+        self._stroke_count = 0  # Strokes rendered so far
+        self._z_units = 0  # Stage position at the end of the rendered strokes (relative to start)
+        self._stroke_starts = deque()  # (first segment index, stroke index) of rendered strokes
+        self._stroke_first_segments = []  # First segment index of every rendered stroke, for stroke_of()
+        self._rendered_segments = 0
+        self._batch = (0, 0, np.zeros(0, dtype=np.int64))  # (first segment index, Z at its start, Z increments)
+
+    def set_flow_rates(self, pump_1_flowrate: float, pump_2_flowrate: float, stage_feedrate: float):
+        """
+        Change the pump rates and the stage speed from the next segment returned on. The rendered segments not
+        returned yet are dropped: the rest of the current stroke keeps its profile and end point but is resampled
+        for the new stage speed, the following strokes are rendered again with the new speed.
+        """
+        if stage_feedrate <= 0:
+            raise ValueError("Shaped stage profiles need a positive stage speed.")
+        self._move_pump_origin()
+        segment_minutes = self.segment_time / 60
+        self.x_stroke = pump_1_flowrate * segment_minutes
+        self.y_stroke = pump_2_flowrate * segment_minutes
+        self._x_units_per_segment = self.x_stroke * self._scale
+        self._y_units_per_segment = self.y_stroke * self._scale
+        speed_ratio = stage_feedrate / self.stage_feedrate
+        self.stage_feedrate = stage_feedrate
+        self.encoder.reset()  # The modal state of the dropped lines is gone with them
+        self._ready = deque()
+        index = self.segment_index
+        if index >= self._rendered_segments:
+            return  # Nothing rendered ahead, the next batch uses the new rates
+        batch_start, z_start, dz = self._batch
+        stroke = self.stroke_of(index)
+        first_segments = self._stroke_first_segments
+        stroke_end = first_segments[stroke + 1] if stroke + 1 < len(first_segments) else self._rendered_segments
+        z_units = z_start + int(dz[:index - batch_start].sum())
+        rest = self._resample(dz[index - batch_start:stroke_end - batch_start], speed_ratio)
+        # Forget the strokes after the current one, they are rendered again from its end point
+        del first_segments[stroke + 1:]
+        while self._stroke_starts and self._stroke_starts[-1][1] > stroke:
+            self._stroke_starts.pop()
+        self._stroke_count = stroke + 1
+        self._z_units = z_units + int(rest.sum())
+        self._rendered_segments = self._generated_index = index + len(rest)
+        self._batch = (index, z_units, rest)
+        self._ready.extend(self._format(index, z_units, rest))
+
+    @staticmethod
+    def _resample(dz: np.ndarray, speed_ratio: float) -> np.ndarray:
+        """Z increments covering the same path as dz, speed_ratio times faster, ending exactly where dz ends."""
+        if speed_ratio == 1.0 or len(dz) == 0:
+            return dz
+        count = max(1, int(round(len(dz) / speed_ratio)))
+        path = np.concatenate(([0], np.cumsum(dz)))
+        positions = np.rint(np.interp(np.arange(1, count + 1) * (len(dz) / count), np.arange(len(dz) + 1), path))
+        positions = positions.astype(np.int64)
+        positions[-1] = path[-1]
+        return np.diff(positions, prepend=0)
+
+    def _current_stroke(self) -> tuple[int, int]:
+        """(first segment index, stroke index) of the stroke the next segment belongs to."""
+        while len(self._stroke_starts) > 1 and self._stroke_starts[1][0] <= self.segment_index:
+            self._stroke_starts.popleft()
+        return self._stroke_starts[0] if self._stroke_starts else (0, 0)
+
+    @property
+    def stroke_index(self) -> int:
+        return self._current_stroke()[1]
+
+    @property
+    def stroke_phase(self) -> int:
+        return self.segment_index - self._current_stroke()[0]
+
+    def stroke_of(self, segment: int) -> int:
+        """Index of the stroke a rendered segment belongs to, thread safe against the generating thread."""
+        return max(0, bisect.bisect_right(self._stroke_first_segments, segment) - 1)
+
+    def stroke_phase_of(self, segment: int) -> int:
+        first_segments = self._stroke_first_segments
+        return segment - first_segments[self.stroke_of(segment)] if first_segments else segment
+
+    @property
+    def segment_rate(self) -> float:
+        return 1.0 / self.segment_time if self.segment_time > 0 else 0.0
+
+    def _end_point(self, stroke: int) -> int:
+        """Stage end point of the given stroke in integer units relative to the start position."""
+        nominal = 0.0 if stroke % 2 else self.z_stroke  # Odd strokes go back to the start side
+        offset = 0.0
+        if self.raster_step:
+            raster_pass = (stroke // self.strokes_per_pass) % self.raster_passes
+            offset += (raster_pass - (self.raster_passes - 1) / 2) * self.raster_step
+        if self.end_point_jitter:
+            offset += self._rng.uniform(-self.end_point_jitter, self.end_point_jitter)
+        # Keep inside the nominal envelope
+        low, high = min(0.0, self.z_stroke), max(0.0, self.z_stroke)
+        return int(round(min(max(nominal + offset, low), high) * self._scale))
+
+    def _render_stroke(self) -> tuple[np.ndarray, int]:
+        """Integer Z increments of the next stroke."""
+        start, end = self._z_units, self._end_point(self._stroke_count)
+        length = (end - start) / self._scale
+        stroke_time = self.profile.stroke_time(length, self.stage_feedrate)
+        count = max(1, int(round(stroke_time / self.segment_time)))
+        tau = np.arange(1, count + 1) / count
+        positions = start + np.rint((end - start) * self.profile.shape(tau, stroke_time)).astype(np.int64)
+        positions[-1] = end  # Always land exactly on the end point
+        self._stroke_starts.append((self._rendered_segments, self._stroke_count))
+        self._stroke_first_segments.append(self._rendered_segments)
+        self._rendered_segments += count
+        self._stroke_count += 1
+        self._z_units = end
+        return np.diff(positions, prepend=start)
+
+    def _next_batch(self) -> list[str]:
+        z_start = self._z_units
+        dz = [self._render_stroke()]
+        while sum(len(part) for part in dz) < self.batch_size:
+            dz.append(self._render_stroke())
+        dz = np.concatenate(dz)
+        start = self._generated_index
+        self._generated_index += len(dz)
+        self._batch = (start, z_start, dz)
+        return self._format(start, z_start, dz)
+
+    def _format(self, start: int, z_start: int, dz: np.ndarray) -> list[str]:
+        """G-code lines of the segments from start on, the stage starting at z_start with the given Z increments."""
+        boundaries = np.arange(start, start + len(dz) + 1, dtype=np.int64)
+        positions = {
+            'X': self._pump_units('X', boundaries) / self._scale,
+            'Y': self._pump_units('Y', boundaries) / self._scale,
+            'Z': (z_start + np.concatenate(([0], np.cumsum(dz)))) / self._scale,
+        }
+        return self.encoder.encode(positions, segment_time=self.segment_time)
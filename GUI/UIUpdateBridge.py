@@ -0,0 +1,118 @@
+import threading
+import time
+
+from PySide6.QtCore import QObject, QTimer, Qt, Signal
+
+from GUI.Instrumentation import LatencyStats
+
+
+class UIUpdateBridge(QObject):
+    """
+    Hands widget updates from worker threads (HV telemetry, ramp, timers) to the GUI thread.
+
+    post(key, *args) can be called from any thread, it only stores the arguments in a latest-value table.
+    The first post after a frame wakes the GUI thread through a queued signal, the table is then flushed at
+    most frame_rate times per second and the handler registered for every key is called once on the GUI thread
+    with the newest arguments. A value that is overwritten before it was rendered counts as dropped.
+    call(func, *args) is for one-shot work like completion callbacks, it runs with the next frame and is never dropped.
+    """
+    _wake = Signal()
+
+    def __init__(self, frame_rate: float = 30.0, parent: QObject = None):
+        super().__init__(parent)
+        self.frame_interval = 1.0 / frame_rate  # s
+
+        self._handlers = {}
+        self._pending = {}
+        self._calls = []
+        self._lock = threading.Lock()
+        self._wake_pending = False
+        self._last_flush = 0.0
+
+        self._frame_timer = QTimer(self)
+        self._frame_timer.setSingleShot(True)
+        self._frame_timer.timeout.connect(self._flush)
+        self._wake.connect(self._on_wake, Qt.ConnectionType.QueuedConnection)
+
+        # Instrumentation
+        self.posted = 0
+        self.rendered = 0
+        self.dropped = 0  # Overwritten before they reached a widget
+        self.frames = 0
+        self.calls = 0
+        self.flush_time = LatencyStats()  # GUI thread time per frame
+
+    def register(self, key: str, handler) -> None:
+        """handler(*args) is called on the GUI thread with the newest arguments posted under key."""
+        self._handlers[key] = handler
+
+    def post(self, key: str, *args) -> None:
+        """Thread safe, never blocks on the GUI thread."""
+        with self._lock:
+            if key in self._pending:
+                self.dropped += 1
+            self._pending[key] = args
+            self.posted += 1
+            wake = not self._wake_pending
+            self._wake_pending = True
+        if wake:
+            self._wake.emit()
+
+    def call(self, func, *args) -> None:
+        """Run func(*args) on the GUI thread with the next frame. Thread safe, calls keep their order."""
+        with self._lock:
+            self._calls.append((func, args))
+            wake = not self._wake_pending
+            self._wake_pending = True
+        if wake:
+            self._wake.emit()
+
+    def _on_wake(self):
+        delay = self.frame_interval - (time.perf_counter() - self._last_flush)
+        if delay <= 0:
+            self._flush()
+        elif not self._frame_timer.isActive():
+            self._frame_timer.start(max(1, round(delay * 1000)))
+
+    def _flush(self):
+        started = time.perf_counter()
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            calls, self._calls = self._calls, []
+            self._wake_pending = False
+        for func, args in calls:
+            try:
+                func(*args)
+            except Exception as e:
+                print(f"[GUI] UI call {getattr(func, '__name__', func)} failed: {e}")
+        self.calls += len(calls)
+        for key, args in pending.items():
+            handler = self._handlers.get(key)
+            if handler is None:
+                print(f"[GUI] No handler registered for UI update '{key}'")
+                continue
+            try:
+                handler(*args)
+            except Exception as e:
+                print(f"[GUI] UI update '{key}' failed: {e}")
+        self.rendered += len(pending)
+        self.frames += 1
+        self._last_flush = time.perf_counter()
+        self.flush_time.add(self._last_flush - started)
+
+    def stats(self) -> dict:
+        with self._lock:
+            posted, dropped, pending = self.posted, self.dropped, len(self._pending) + len(self._calls)
+        return {
+            'posted': posted,
+            'rendered': self.rendered,
+            'dropped': dropped,
+            'pending': pending,
+            'frames': self.frames,
+            'calls': self.calls,
+            'drop_ratio': dropped / posted if posted else 0.0,
+        }
+
+    def __str__(self):
+        s = self.stats()
+        return f"UI updates: {s['rendered']:,} rendered, {s['dropped']:,} dropped ({s['drop_ratio']:.0%})"